@@ -0,0 +1,82 @@
+"""
+Assignment 1: Colormap Benchmark
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Compares wave_to_rgb (float channel math + np.stack, then quantized to
+uint8 for display) with the LUT colorizer. Reports wall time, peak traced
+memory per call, the colorizer's retained index/scratch buffers and the
+largest per-channel difference of the uint8 results.
+
+Usage:
+    python benchmark_colormap.py [--size 2000] [--lut 256 4096]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import time
+import tracemalloc
+import numpy as np
+
+import pattern_generator as pg
+from colormap_lut import Colorizer
+
+
+# ----------------------------------------------------------------
+# Helpers
+# ----------------------------------------------------------------
+
+def float_path(wave):
+    rgb = pg.wave_to_rgb(wave)
+    return np.rint(rgb * 255).astype(np.uint8)
+
+def measure(fn, *args, repeat=3):
+    fn(*args)
+    tracemalloc.start()
+    fn(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, peak, result
+
+def buffer_bytes(colorizer):
+    return colorizer.lut.nbytes + colorizer._index.nbytes + colorizer._scratch.nbytes
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="wave_to_rgb vs LUT colorizer")
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--lut", type=int, nargs="+", default=[256, 4096])
+    args = parser.parse_args(argv)
+
+    wave, _ = pg.generate_pattern(grid_size=args.size)
+    mib = 2**20
+
+    base_t, base_mem, reference = measure(float_path, wave)
+    print("field %dx%d (%.1f MiB float64)" % (args.size, args.size, wave.nbytes / mib))
+    print("%-16s %10s %10s %12s %12s %10s"
+          % ("path", "seconds", "speedup", "peak MiB", "buffers MiB", "max diff"))
+    print("%-16s %10.4f %10s %12.1f %12s %10s" % ("wave_to_rgb", base_t, "1.0x", base_mem / mib, "-", "-"))
+
+    for size in args.lut:
+        colorizer = Colorizer("wave", size)
+        out = np.empty(wave.shape + (3,), dtype=np.uint8)
+        t, mem, result = measure(colorizer, wave, out)
+        diff = np.abs(result.astype(np.int16) - reference).max()
+        print("%-16s %10.4f %9.1fx %12.1f %12.1f %10d"
+              % ("lut %d" % size, t, base_t / t, mem / mib, buffer_bytes(colorizer) / mib, diff))
+
+    colorizer = Colorizer("viridis", 256)
+    t, mem, _ = measure(colorizer, wave, out)
+    print("%-16s %10.4f %9.1fx %12.1f %12.1f %10s"
+          % ("lut viridis 256", t, base_t / t, mem / mib, buffer_bytes(colorizer) / mib, "-"))
+
+
+if __name__ == "__main__":
+    main()
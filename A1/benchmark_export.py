@@ -0,0 +1,80 @@
+"""
+Assignment 1: PNG Export Benchmark
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Compares the matplotlib savefig path (figure, imshow, savefig at 300 dpi)
+with the direct zlib PNG writer for the RGB wave image, reporting wall time
+and peak traced memory for each.
+
+Usage:
+    python benchmark_export.py [--sizes 400 1000 2000]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pattern_generator as pg
+from png_writer import quantize_inplace, write_png
+
+
+# ----------------------------------------------------------------
+# Export paths
+# ----------------------------------------------------------------
+
+def savefig_export(rgb, path):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(8, 8))
+    plt.imshow(rgb)
+    plt.axis('off')
+    plt.savefig(path, dpi=300, bbox_inches="tight")
+    plt.close()
+
+def direct_export(rgb, path):
+    write_png(path, quantize_inplace(rgb, 0.0, 1.0))
+
+def measure(fn, *args):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn(*args)
+    elapsed = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+# ----------------------------------------------------------------
+# Main
+# ----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="savefig vs direct PNG export")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[400, 1000, 2000])
+    args = parser.parse_args(argv)
+
+    # Warm up matplotlib so its import time is not charged to the first size
+    with tempfile.TemporaryDirectory() as tmp:
+        savefig_export(pg.generate_pattern(grid_size=16)[1], os.path.join(tmp, "warmup.png"))
+
+    print("%-8s %-10s %10s %12s %12s" % ("size", "path", "seconds", "peak MiB", "file KiB"))
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in args.sizes:
+            for name, fn in (("savefig", savefig_export), ("direct", direct_export)):
+                _, rgb = pg.generate_pattern(grid_size=size)
+                path = os.path.join(tmp, "%s_%d.png" % (name, size))
+                elapsed, peak = measure(fn, rgb, path)
+                print("%-8d %-10s %10.3f %12.1f %12.1f"
+                      % (size, name, elapsed, peak / 2**20, os.path.getsize(path) / 2**10))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Assignment 1: Interference Throughput Benchmark
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Measures interference_field throughput in emitters x pixels per second for
+both precision paths and compares it with a naive per-emitter loop.
+
+Usage:
+    python benchmark_interference.py [--size 512] [--emitters 256]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import time
+import numpy as np
+
+from interference import interference_field, random_emitters
+
+
+# ----------------------------------------------------------------
+# Reference implementation
+# ----------------------------------------------------------------
+
+def naive_field(x, y, xs, ys, wavelengths, phases, amplitudes):
+    """One full-grid sqrt + sin per emitter, as a plain Python loop."""
+    X, Y = np.meshgrid(x, y)
+    field = np.zeros_like(X)
+    for cx, cy, wl, ph, a in zip(xs, ys, wavelengths, phases, amplitudes):
+        r = np.sqrt((X - cx)**2 + (Y - cy)**2)
+        field += a * np.sin(2 * np.pi * r / wl + ph)
+    return field
+
+
+# ----------------------------------------------------------------
+# Timing
+# ----------------------------------------------------------------
+
+def best_time(fn, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Interference throughput benchmark")
+    parser.add_argument("--size", type=int, default=512)
+    parser.add_argument("--emitters", type=int, default=256)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    x = np.linspace(-4, 4, args.size)
+    y = np.linspace(-4, 4, args.size)
+    emitters = random_emitters(args.emitters, seed=0)
+    work = args.emitters * args.size * args.size
+
+    reference = naive_field(x, y, *emitters)
+
+    print("grid %dx%d, %d emitters" % (args.size, args.size, args.emitters))
+    print("%-18s %10s %16s %12s" % ("path", "seconds", "emitter*px/s", "max error"))
+
+    t = best_time(lambda: naive_field(x, y, *emitters), args.repeat)
+    print("%-18s %10.4f %16.3e %12s" % ("naive loop", t, work / t, "-"))
+
+    for dtype in (np.float64, np.float32):
+        field = interference_field(x, y, *emitters, dtype=dtype)
+        err = np.abs(field - reference).max()
+        t = best_time(lambda: interference_field(x, y, *emitters, dtype=dtype), args.repeat)
+        print("%-18s %10.4f %16.3e %12.2e" % ("chunked " + np.dtype(dtype).name, t, work / t, err))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Assignment 1: Startup-Time Benchmark
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Shows that the array path of pattern_generator imports and runs with only
+NumPy loaded. Each measurement runs in a fresh interpreter so module caches
+do not hide import costs.
+
+Usage:
+    python benchmark_startup.py [--repeat 5]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# --- Snippets timed in a fresh interpreter; each prints a JSON line ---
+ARRAY_PATH = """
+import sys, time, json
+t0 = time.perf_counter()
+import pattern_generator
+t1 = time.perf_counter()
+wave, rgb = pattern_generator.generate_pattern()
+t2 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "compute": t2 - t1,
+                  "numpy": "numpy" in sys.modules,
+                  "matplotlib": "matplotlib" in sys.modules}))
+"""
+
+MATPLOTLIB_IMPORT = """
+import sys, time, json
+t0 = time.perf_counter()
+import numpy
+t1 = time.perf_counter()
+import matplotlib.pyplot
+t2 = time.perf_counter()
+print(json.dumps({"numpy": t1 - t0, "matplotlib": t2 - t1}))
+"""
+
+
+# ----------------------------------------------------------------
+# Helpers
+# ----------------------------------------------------------------
+
+def run_snippet(code):
+    result = subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR,
+                            capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def median(values):
+    values = sorted(values)
+    return values[len(values) // 2]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="pattern_generator startup benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    array_runs = [run_snippet(ARRAY_PATH) for _ in range(args.repeat)]
+    mpl_runs = [run_snippet(MATPLOTLIB_IMPORT) for _ in range(args.repeat)]
+
+    loaded = array_runs[0]
+    print("array path: numpy loaded=%s, matplotlib loaded=%s"
+          % (loaded["numpy"], loaded["matplotlib"]))
+    print("  import pattern_generator  %8.1f ms" % (1e3 * median(r["import"] for r in array_runs)))
+    print("  generate_pattern()        %8.1f ms" % (1e3 * median(r["compute"] for r in array_runs)))
+    print("avoided at import time:")
+    print("  import matplotlib.pyplot  %8.1f ms" % (1e3 * median(r["matplotlib"] for r in mpl_runs)))
+
+    if loaded["matplotlib"]:
+        sys.exit("matplotlib was imported on the array path")
+
+
+if __name__ == "__main__":
+    main()
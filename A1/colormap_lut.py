@@ -0,0 +1,94 @@
+"""
+Assignment 1: Colormap Lookup Tables
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Colourizes a scalar field through a precomputed uint8 lookup table instead
+of evaluating the colour mapping per pixel in floating point. The field is
+quantized to a table index (256 or 4096 entries) and the RGB triples are
+gathered directly into a preallocated uint8 output, so no float RGB image is
+ever built.
+
+Tables can be built from the A1 depth mapping ("wave", same as wave_to_rgb)
+or from any named matplotlib colormap such as the viridis used in A2;
+matplotlib is only imported for named colormaps.
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import numpy as np
+
+import pattern_generator as pg
+
+# ----------------------------------------------------------------
+# Parameters
+# ----------------------------------------------------------------
+LUT_SIZE = 4096
+RGB = np.dtype((np.void, 3))  # one packed RGB triple, gathered as a single item
+
+
+# ----------------------------------------------------------------
+# Lookup tables
+# ----------------------------------------------------------------
+
+def build_lut(cmap="wave", size=LUT_SIZE):
+    """
+    Returns a (size, 3) uint8 table sampling `cmap` over its full range.
+    cmap is "wave", a matplotlib colormap name, a Colormap object or a
+    callable mapping 0..1 values to RGB(A) floats.
+    """
+    t = np.linspace(0.0, 1.0, size)
+    if isinstance(cmap, str) and cmap == "wave":
+        colors = pg.wave_to_rgb(2 * t - 1)
+    else:
+        if isinstance(cmap, str):
+            import matplotlib
+            cmap = matplotlib.colormaps[cmap]
+        colors = np.asarray(cmap(t))[:, :3]
+    return np.ascontiguousarray(np.rint(np.clip(colors, 0, 1) * 255).astype(np.uint8))
+
+class Colorizer:
+    """
+    Maps fields in [vmin, vmax] through a lookup table. Index and output
+    buffers are kept between calls, so colourizing frames of the same shape
+    allocates nothing.
+    """
+
+    def __init__(self, cmap="wave", size=LUT_SIZE, vmin=-1.0, vmax=1.0):
+        self.lut = build_lut(cmap, size)
+        self.vmin = vmin
+        self.vmax = vmax
+        self._packed = self.lut.view(RGB).reshape(-1)
+        self._index = None
+        self._scratch = None
+
+    def _buffers(self, field):
+        if self._index is None or self._index.shape != field.shape or self._scratch.dtype != field.dtype:
+            self._index = np.empty(field.shape, dtype=np.intp)
+            self._scratch = np.empty(field.shape, dtype=field.dtype)
+        return self._index, self._scratch
+
+    def __call__(self, field, out=None):
+        """Returns field colourized as (..., 3) uint8, written into `out` if given."""
+        field = np.asarray(field)
+        if out is None:
+            out = np.empty(field.shape + (3,), dtype=np.uint8)
+        index, scratch = self._buffers(field)
+
+        # index = round((field - vmin) / (vmax - vmin) * (size - 1)); the
+        # +0.5 offset rounds through the truncating integer cast
+        n = len(self.lut)
+        scale = (n - 1) / (self.vmax - self.vmin)
+        np.multiply(field, scale, out=scratch)
+        scratch += 0.5 - self.vmin * scale
+        np.clip(scratch, 0, n - 1, out=scratch)
+        index[...] = scratch
+
+        # mode="clip" lets take write straight into out instead of buffering
+        np.take(self._packed, index, out=out.view(RGB).reshape(field.shape), mode="clip")
+        return out
+
+def colorize(field, cmap="wave", size=LUT_SIZE, vmin=-1.0, vmax=1.0, out=None):
+    """One-shot LUT colourization; use Colorizer to reuse buffers."""
+    return Colorizer(cmap, size, vmin, vmax)(field, out=out)
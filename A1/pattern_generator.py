@@ -1,9 +1,28 @@
+"""
+Assignment 1: NumPy Array Manipulation for 2D Pattern Generation
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Generates a concentric sinusoidal wave pattern from a radial distance field
+and maps it to RGB colours to visualize depth.
+
+Importing this module has no side effects and only loads NumPy; matplotlib
+is imported when annotated previews are exported. Run it as a script to
+render and save the images:
+
+    python pattern_generator.py [--no-show] [--direct]
+
+--direct writes both arrays pixel-for-pixel with the zlib PNG writer
+instead of going through matplotlib figures.
+"""
 # ----------------------------------------------------------------
-# Imports 
+# Imports
 # ----------------------------------------------------------------
 import os
 import numpy as np
-import matplotlib.pyplot as plt
+
+from png_writer import quantize_inplace, write_png
 
 # ----------------------------------------------------------------
 # Parameters for the sinusoidal wave pattern
@@ -12,24 +31,48 @@ center_x, center_y = 2, 1  # Emission point (center)
 wavelength = 0.5  # Wavelength of the waves
 num_waves = 10  # Approximate number of waves (controlled by extent/wavelength)
 grid_size = 400  # Size of the 2D array (square grid)
+extent = (-4, 4)  # Coordinate range along x and y
+
+# --- Resolve paths relative to this script ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGES_DIR = os.path.join(BASE_DIR, "images")
 
 
 # ----------------------------------------------------------------
-# Create a meshgrid for x and y coordinates
+# Field generation
 # ----------------------------------------------------------------
-x = np.linspace(-4, 4, grid_size)
-y = np.linspace(-4, 4, grid_size)
-X, Y = np.meshgrid(x, y)
 
-# Calculate radial distance from the emission point
-r = np.sqrt((X - center_x)**2 + (Y - center_y)**2)
+# --- 1-D coordinate vectors for x and y ---
+def make_grid(grid_size=grid_size, extent=extent):
+    x = np.linspace(extent[0], extent[1], grid_size)
+    y = np.linspace(extent[0], extent[1], grid_size)
+    return x, y
 
-# Generate the sinusoidal wave pattern: sin(2π r / λ)
-# This creates concentric waves emanating from the center
-wave_pattern = np.sin(2 * np.pi * r / wavelength)
+# --- Radial distance from the emission point ---
+def radial_distance(x, y, center_x=center_x, center_y=center_y, out=None):
+    """
+    x (columns) and y (rows) are 1-D vectors; the distance is formed by
+    broadcasting them instead of building meshgrids. Returns a
+    (len(y), len(x)) array, written into `out` if given.
+    """
+    dx2 = (x - center_x) ** 2
+    dy2 = (y - center_y) ** 2
+    if out is None:
+        out = np.empty((y.size, x.size), dtype=np.float64)
+    np.add(dy2[:, None], dx2[None, :], out=out)
+    np.sqrt(out, out=out)
+    return out
 
-# The resulting 2D NumPy array representing the sinusoidal wave pattern
-sinusoidal_wave_array = wave_pattern
+# --- Sinusoidal wave pattern: sin(2π r / λ) ---
+def wave_field(x, y, center_x=center_x, center_y=center_y, wavelength=wavelength, out=None):
+    """
+    Concentric waves emanating from the center, evaluated on the grid
+    spanned by the 1-D vectors x and y (see radial_distance).
+    """
+    out = radial_distance(x, y, center_x, center_y, out=out)
+    out *= 2 * np.pi / wavelength
+    np.sin(out, out=out)
+    return out
 
 # Function to manipulate RGB channels for depth visualization
 # - High values (peaks): warmer colors (more red)
@@ -38,53 +81,103 @@ sinusoidal_wave_array = wave_pattern
 def wave_to_rgb(wave):
     # Normalize wave to 0-1 range for RGB (wave is -1 to 1)
     norm_wave = (wave + 1) / 2  # 0 (trough/deep) to 1 (peak/shallow)
-    
+
     # Manipulate channels:
     # Red: increases with height (shallow)
     r = norm_wave
-    
+
     # Green: subtle in the middle for transition
     g = 0.3 * norm_wave
-    
+
     # Blue: increases with depth (low height)
     b = 1 - norm_wave
-    
+
     # Stack into RGB array (0-1 float)
     return np.stack([r, g, b], axis=-1)
 
-# Create RGB array for visualization
-rgb_wave = wave_to_rgb(sinusoidal_wave_array)
+# --- Wave field and its RGB visualization in one call ---
+def generate_pattern(grid_size=grid_size,
+                     center_x=center_x,
+                     center_y=center_y,
+                     wavelength=wavelength,
+                     extent=extent):
+    x, y = make_grid(grid_size, extent)
+    wave = wave_field(x, y, center_x, center_y, wavelength)
+    return wave, wave_to_rgb(wave)
 
 
 # ----------------------------------------------------------------
-# Setup for saving images
+# Export
 # ----------------------------------------------------------------
 
-# --- Resolve paths relative to this script ---
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-IMAGES_DIR = os.path.join(BASE_DIR, "images")
+def export_png(wave, rgb, images_dir=IMAGES_DIR):
+    """
+    Writes wave_rgb.png and wave_grayscale.png pixel-for-pixel, without
+    a figure. Both arrays are quantized to uint8 in place, so their float
+    contents are consumed.
+    """
+    os.makedirs(images_dir, exist_ok=True)
+    write_png(os.path.join(images_dir, "wave_rgb.png"), quantize_inplace(rgb, 0.0, 1.0))
+    write_png(os.path.join(images_dir, "wave_grayscale.png"), quantize_inplace(wave, -1.0, 1.0))
 
-# Ensure images folder exists
-os.makedirs(IMAGES_DIR, exist_ok=True)
+def export_images(wave, rgb, images_dir=IMAGES_DIR, show=False):
+    """
+    Saves annotated matplotlib previews (axes, colorbar) of wave_rgb.png
+    and wave_grayscale.png to images_dir. matplotlib is only imported here.
+    """
+    import matplotlib
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
 
+    # Ensure images folder exists
+    os.makedirs(images_dir, exist_ok=True)
+
+    # ------------------------------------------------------------
+    # Visualize the depth using the RGB-manipulated array
+    # ------------------------------------------------------------
+    plt.figure(figsize=(8, 8))
+    plt.imshow(rgb)
+    plt.axis('off')
+    plt.savefig(os.path.join(images_dir, "wave_rgb.png"), dpi=300, bbox_inches="tight")
+    if show:
+        plt.show()
+    plt.close()
+
+    # ------------------------------------------------------------
+    # Grayscale version for comparison
+    # ------------------------------------------------------------
+    plt.figure(figsize=(8, 8))
+    plt.imshow(wave, cmap='gray', extent=(-5, 5, -5, 5))
+    plt.title('Grayscale Wave Pattern (for reference)')
+    plt.xlabel('X')
+    plt.ylabel('Y')
+    plt.colorbar(label='Wave Amplitude')
+    plt.savefig(os.path.join(images_dir, "wave_grayscale.png"), dpi=300, bbox_inches="tight")
+    if show:
+        plt.show()
+    plt.close()
 
-# ----------------------------------------------------------------
-# Visualize the depth using the RGB-manipulated array
-# ----------------------------------------------------------------
-plt.figure(figsize=(8, 8))
-plt.imshow(rgb_wave)
-plt.axis('off')
-plt.savefig("images/wave_rgb.png", dpi=300, bbox_inches="tight")
-plt.show()
 
 # ----------------------------------------------------------------
-# Grayscale version for comparison
+# Main Execution
 # ----------------------------------------------------------------
-plt.figure(figsize=(8, 8))
-plt.imshow(sinusoidal_wave_array, cmap='gray', extent=(-5, 5, -5, 5))
-plt.title('Grayscale Wave Pattern (for reference)')
-plt.xlabel('X')
-plt.ylabel('Y')
-plt.colorbar(label='Wave Amplitude')
-plt.savefig("images/wave_grayscale.png", dpi=300, bbox_inches="tight")
-plt.show()
\ No newline at end of file
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Render the A1 wave pattern")
+    parser.add_argument("--no-show", action="store_true", help="save images without opening windows")
+    parser.add_argument("--direct", action="store_true", help="write exact arrays to PNG without matplotlib")
+    args = parser.parse_args(argv)
+
+    # The resulting 2D NumPy array representing the sinusoidal wave pattern
+    sinusoidal_wave_array, rgb_wave = generate_pattern()
+    if args.direct:
+        export_png(sinusoidal_wave_array, rgb_wave)
+    else:
+        export_images(sinusoidal_wave_array, rgb_wave, show=not args.no_show)
+
+
+if __name__ == "__main__":
+    main()
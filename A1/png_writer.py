@@ -0,0 +1,115 @@
+"""
+Assignment 1: Direct PNG Writer
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Writes uint8 grayscale or RGB arrays to PNG pixel-for-pixel using only zlib,
+without creating a matplotlib figure. Rows are compressed in bands, so
+an image can also be streamed to disk band by band with PngWriter.
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import struct
+import zlib
+import numpy as np
+
+# ----------------------------------------------------------------
+# Parameters
+# ----------------------------------------------------------------
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+COLOR_TYPES = {1: 0, 3: 2}  # channels -> PNG colour type (gray, RGB)
+BAND_ROWS = 256  # rows compressed per band
+
+
+# ----------------------------------------------------------------
+# Quantization
+# ----------------------------------------------------------------
+
+def quantize_inplace(field, vmin=0.0, vmax=1.0):
+    """
+    Maps a float field from [vmin, vmax] to 0..255 and returns it as uint8.
+    The scaling and rounding happen inside `field`, which is overwritten;
+    the only new allocation is the uint8 result.
+    """
+    field -= vmin
+    field *= 255.0 / (vmax - vmin)
+    np.clip(field, 0, 255, out=field)
+    np.rint(field, out=field)
+    return field.astype(np.uint8)
+
+
+# ----------------------------------------------------------------
+# PNG encoding
+# ----------------------------------------------------------------
+
+def _chunk(tag, data):
+    return (struct.pack(">I", len(data)) + tag + data
+            + struct.pack(">I", zlib.crc32(data, zlib.crc32(tag)) & 0xFFFFFFFF))
+
+class PngWriter:
+    """
+    Streams an 8-bit grayscale or RGB PNG to `path` band by band.
+    Rows passed to write_rows() must total `height` before close().
+    """
+
+    def __init__(self, path, width, height, channels=3, compress_level=6):
+        if channels not in COLOR_TYPES:
+            raise ValueError("channels must be 1 (gray) or 3 (RGB), got %r" % channels)
+        self.width = width
+        self.height = height
+        self.channels = channels
+        self.rows_written = 0
+        self._compressor = zlib.compressobj(compress_level)
+        self._file = open(path, "wb")
+        self._file.write(PNG_SIGNATURE)
+        header = struct.pack(">IIBBBBB", width, height, 8, COLOR_TYPES[channels], 0, 0, 0)
+        self._file.write(_chunk(b"IHDR", header))
+
+    def write_rows(self, rows):
+        """Appends a (n, width) or (n, width, channels) uint8 band."""
+        rows = np.asarray(rows, dtype=np.uint8).reshape(len(rows), -1)
+        if rows.shape[1] != self.width * self.channels:
+            raise ValueError("band row length %d does not match width %d x %d channels"
+                             % (rows.shape[1], self.width, self.channels))
+
+        # Every scanline starts with its filter byte (0 = none)
+        scanlines = np.zeros((rows.shape[0], rows.shape[1] + 1), dtype=np.uint8)
+        scanlines[:, 1:] = rows
+        data = self._compressor.compress(scanlines.tobytes())
+        if data:
+            self._file.write(_chunk(b"IDAT", data))
+        self.rows_written += rows.shape[0]
+
+    def close(self):
+        if self._file.closed:
+            return
+        data = self._compressor.flush()
+        if data:
+            self._file.write(_chunk(b"IDAT", data))
+        self._file.write(_chunk(b"IEND", b""))
+        self._file.close()
+        if self.rows_written != self.height:
+            raise ValueError("wrote %d rows, expected %d" % (self.rows_written, self.height))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._file.close()
+
+def write_png(path, pixels, compress_level=6):
+    """Writes a (H, W) grayscale or (H, W, 3) RGB uint8 array to PNG."""
+    pixels = np.asarray(pixels)
+    if pixels.dtype != np.uint8:
+        raise TypeError("write_png expects uint8 pixels, got %s" % pixels.dtype)
+    height, width = pixels.shape[:2]
+    channels = 1 if pixels.ndim == 2 else pixels.shape[2]
+
+    with PngWriter(path, width, height, channels, compress_level) as writer:
+        for r0 in range(0, height, BAND_ROWS):
+            writer.write_rows(pixels[r0:r0 + BAND_ROWS])
@@ -0,0 +1,225 @@
+"""
+Assignment 1: Parameter Sweep Renderer
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Renders every combination of wavelength, emission point and grid size of the
+A1 wave pattern across a process pool and writes a JSON manifest of the
+outputs.
+
+Variants are grouped by (grid_size, center): each worker computes the radial
+distance field once per group and derives every wavelength from it. The x/y
+coordinate vectors of each grid size live in shared memory and are attached
+by name in the workers instead of being pickled per task.
+
+Usage:
+    python sweep.py --wavelength 0.3 0.5 0.8 --center 2,1 0,0 --grid-size 400 800
+    python sweep.py --grid sweep.json [--workers 4] [--out images/sweep]
+
+sweep.json holds lists under "wavelength", "center" ([x, y] pairs) and
+"grid_size"; missing keys fall back to the pattern_generator defaults.
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+
+import pattern_generator as pg
+from png_writer import write_png
+from tiled_renderer import wave_tile_to_rgb
+
+
+# ----------------------------------------------------------------
+# Parameter grid
+# ----------------------------------------------------------------
+
+def load_grid(path):
+    with open(path) as f:
+        spec = json.load(f)
+    return {
+        "wavelength": [float(v) for v in spec.get("wavelength", [pg.wavelength])],
+        "center": [tuple(map(float, c)) for c in spec.get("center", [(pg.center_x, pg.center_y)])],
+        "grid_size": [int(v) for v in spec.get("grid_size", [pg.grid_size])],
+    }
+
+def validate_grid(grid):
+    """
+    Raises ValueError for an empty or invalid list, or for values that would
+    render to the same file name (names use %g formatting).
+    """
+    checks = (("wavelength", lambda v: v > 0), ("center", lambda v: len(v) == 2),
+              ("grid_size", lambda v: v > 0))
+    for key, valid in checks:
+        values = list(grid.get(key, ()))
+        if not values:
+            raise ValueError("sweep needs at least one %s" % key)
+        bad = [v for v in values if not valid(v)]
+        if bad:
+            raise ValueError("invalid %s values: %s" % (key, bad))
+        names = ["%g" % v if key != "center" else "%g_%g" % tuple(v) for v in values]
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            raise ValueError("duplicate %s values: %s" % (key, ", ".join(duplicates)))
+
+def group_variants(grid):
+    """
+    Returns {(grid_size, center): [wavelength, ...]} so variants that share a
+    distance field are rendered by the same task.
+    """
+    groups = {}
+    for size, center in itertools.product(grid["grid_size"], grid["center"]):
+        groups[(size, center)] = list(grid["wavelength"])
+    return groups
+
+
+# ----------------------------------------------------------------
+# Shared coordinate vectors
+# ----------------------------------------------------------------
+
+def share_coordinates(grid_sizes, extent=pg.extent):
+    """
+    Places the x and y vectors of every grid size in one shared-memory block
+    each. Returns {grid_size: SharedMemory}; the caller unlinks them.
+    """
+    blocks = {}
+    for size in set(grid_sizes):
+        x, y = pg.make_grid(size, extent)
+        shm = shared_memory.SharedMemory(create=True, size=2 * x.nbytes)
+        coords = np.ndarray((2, size), dtype=np.float64, buffer=shm.buf)
+        coords[0], coords[1] = x, y
+        blocks[size] = shm
+    return blocks
+
+def render_wavelengths(coords, center, wavelengths, out_dir):
+    """Renders every wavelength from one shared distance field."""
+    x, y = coords[0], coords[1]
+    size = x.size
+
+    t0 = time.perf_counter()
+    r = pg.radial_distance(x, y, center[0], center[1])
+    distance_time = time.perf_counter() - t0
+
+    wave = np.empty_like(r)
+    scratch = np.empty_like(r)
+    rgb = np.empty(r.shape + (3,), dtype=np.uint8)
+
+    records = []
+    for wl in wavelengths:
+        t0 = time.perf_counter()
+        np.multiply(r, 2 * np.pi / wl, out=wave)
+        np.sin(wave, out=wave)
+        wave_tile_to_rgb(wave, out=rgb, scratch=scratch)
+
+        name = "wave_n%d_c%g_%g_l%g.png" % (size, center[0], center[1], wl)
+        write_png(os.path.join(out_dir, name), rgb)
+        records.append({
+            "file": name,
+            "grid_size": size,
+            "center_x": center[0],
+            "center_y": center[1],
+            "wavelength": wl,
+            "seconds": time.perf_counter() - t0,
+        })
+    records[0]["seconds"] += distance_time
+    return records
+
+def render_group(shm_name, size, center, wavelengths, out_dir):
+    """Worker: attaches the shared x/y vectors and renders one group."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    coords = np.ndarray((2, size), dtype=np.float64, buffer=shm.buf)
+    try:
+        records = render_wavelengths(coords, center, wavelengths, out_dir)
+    except BaseException:
+        # The traceback can still hold views into the buffer, so close() may
+        # raise BufferError; that must not replace the rendering error
+        coords = None
+        try:
+            shm.close()
+        except BufferError:
+            pass
+        raise
+    # Views into the buffer must be released before closing it
+    coords = None
+    shm.close()
+    return records
+
+
+# ----------------------------------------------------------------
+# Sweep
+# ----------------------------------------------------------------
+
+def run_sweep(grid, out_dir, workers=None):
+    """Renders the whole grid into out_dir and returns the manifest dict."""
+    validate_grid(grid)
+    os.makedirs(out_dir, exist_ok=True)
+    groups = group_variants(grid)
+    blocks = share_coordinates(grid["grid_size"])
+
+    t0 = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(render_group, blocks[size].name, size, center, wls, out_dir)
+                for (size, center), wls in groups.items()
+            ]
+            outputs = [rec for fut in futures for rec in fut.result()]
+    finally:
+        for shm in blocks.values():
+            shm.close()
+            shm.unlink()
+
+    manifest = {
+        "parameters": {k: list(v) for k, v in grid.items()},
+        "variants": len(outputs),
+        "seconds": time.perf_counter() - t0,
+        "outputs": outputs,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+# ----------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------
+
+def parse_center(text):
+    cx, cy = text.split(",")
+    return float(cx), float(cy)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="A1 wave parameter sweep")
+    parser.add_argument("--grid", help="JSON parameter grid (overrides the list options)")
+    parser.add_argument("--wavelength", type=float, nargs="+", default=[pg.wavelength])
+    parser.add_argument("--center", type=parse_center, nargs="+", default=[(pg.center_x, pg.center_y)],
+                        help="emission points as x,y")
+    parser.add_argument("--grid-size", type=int, nargs="+", default=[pg.grid_size])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", default=os.path.join(pg.IMAGES_DIR, "sweep"))
+    args = parser.parse_args(argv)
+
+    if args.grid:
+        grid = load_grid(args.grid)
+    else:
+        grid = {"wavelength": args.wavelength, "center": args.center, "grid_size": args.grid_size}
+
+    try:
+        validate_grid(grid)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    manifest = run_sweep(grid, args.out, args.workers)
+    print("Rendered %d variants in %.2f s -> %s"
+          % (manifest["variants"], manifest["seconds"], os.path.join(args.out, "manifest.json")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Assignment 1: Tiled Wave Renderer
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Renders the concentric wave pattern from pattern_generator.py at print
+scale (e.g. 40k x 40k pixels). Instead of building full meshgrids, the
+radial sine field and its RGB mapping are computed one tile at a time by
+broadcasting 1-D x/y coordinate slices, and each tile is streamed into a
+memory-mapped uint8 .npy file. Peak memory depends on the tile size only,
+not on the size of the output image.
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import os
+import numpy as np
+
+import pattern_generator as pg
+from pattern_generator import wave_field
+
+# ----------------------------------------------------------------
+# Default parameters (same as pattern_generator.py)
+# ----------------------------------------------------------------
+CENTER_X, CENTER_Y = pg.center_x, pg.center_y
+WAVELENGTH = pg.wavelength
+EXTENT = pg.extent
+TILE_SIZE = 2048
+
+
+# ----------------------------------------------------------------
+# Tile kernels
+# ----------------------------------------------------------------
+
+# --- Same colour mapping as wave_to_rgb, quantized straight to uint8 ---
+def wave_tile_to_rgb(wave, out=None, scratch=None):
+    """
+    Maps a wave tile (-1..1) to uint8 RGB:
+    red rises with height, green is 0.3 * red, blue falls with height.
+    `scratch` is an optional float buffer of the tile shape.
+    """
+    if out is None:
+        out = np.empty(wave.shape + (3,), dtype=np.uint8)
+    if scratch is None:
+        scratch = np.empty_like(wave)
+
+    # norm_wave * 255 = (wave + 1) * 127.5
+    np.add(wave, 1.0, out=scratch)
+    scratch *= 127.5
+    np.rint(scratch, out=out[..., 0], casting="unsafe")
+    np.subtract(255, out[..., 0], out=out[..., 2])
+    scratch *= 0.3
+    np.rint(scratch, out=out[..., 1], casting="unsafe")
+    return out
+
+
+# ----------------------------------------------------------------
+# Tiled rendering
+# ----------------------------------------------------------------
+
+def iter_tiles(height, width, tile_size):
+    """Yields (row0, row1, col0, col1) tile bounds in row-major order."""
+    for r0 in range(0, height, tile_size):
+        for c0 in range(0, width, tile_size):
+            yield r0, min(r0 + tile_size, height), c0, min(c0 + tile_size, width)
+
+def render_tiled(path,
+                 grid_size,
+                 center_x=CENTER_X,
+                 center_y=CENTER_Y,
+                 wavelength=WAVELENGTH,
+                 extent=EXTENT,
+                 tile_size=TILE_SIZE):
+    """
+    Renders a grid_size x grid_size RGB wave image into a memory-mapped
+    uint8 .npy file at `path` and returns the memmap.
+    """
+    x = np.linspace(extent[0], extent[1], grid_size)
+    y = np.linspace(extent[0], extent[1], grid_size)
+
+    image = np.lib.format.open_memmap(
+        path, mode="w+", dtype=np.uint8, shape=(grid_size, grid_size, 3)
+    )
+
+    # Buffers are reused for every tile, so memory stays bounded by tile_size
+    t = min(tile_size, grid_size)
+    wave_buf = np.empty((t, t), dtype=np.float64)
+    scratch_buf = np.empty((t, t), dtype=np.float64)
+    rgb_buf = np.empty((t, t, 3), dtype=np.uint8)
+
+    for r0, r1, c0, c1 in iter_tiles(grid_size, grid_size, t):
+        h, w = r1 - r0, c1 - c0
+        wave = wave_field(x[c0:c1], y[r0:r1], center_x, center_y, wavelength,
+                          out=wave_buf[:h, :w])
+        rgb = wave_tile_to_rgb(wave, out=rgb_buf[:h, :w], scratch=scratch_buf[:h, :w])
+        image[r0:r1, c0:c1] = rgb
+
+    image.flush()
+    return image
+
+
+# ----------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tiled, memory-bounded wave renderer")
+    parser.add_argument("--size", type=int, default=40000, help="output width/height in pixels")
+    parser.add_argument("--tile", type=int, default=TILE_SIZE, help="tile edge length in pixels")
+    parser.add_argument("--center", type=float, nargs=2, default=(CENTER_X, CENTER_Y))
+    parser.add_argument("--wavelength", type=float, default=WAVELENGTH)
+    parser.add_argument("--out", default=None, help="output .npy path")
+    args = parser.parse_args(argv)
+
+    out = args.out
+    if out is None:
+        images_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), "images")
+        os.makedirs(images_dir, exist_ok=True)
+        out = os.path.join(images_dir, "wave_rgb_%d.npy" % args.size)
+
+    render_tiled(out, args.size,
+                 center_x=args.center[0], center_y=args.center[1],
+                 wavelength=args.wavelength, tile_size=args.tile)
+    print("Wrote %s" % out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Assignment 1: Phase-Sweep Animation
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Animates the concentric waves by stepping the phase:
+
+    frame_t = sin(2*pi*r / wavelength + phi_t)
+
+The scaled distance field 2*pi*r / wavelength is computed once. Every frame
+is then a single add, a sine and the uint8 colour mapping (arithmetic for the
+default depth colours, a lookup table for named colormaps), all written into
+preallocated buffers with out= ufuncs. Frames can be saved as a PNG sequence
+or piped as raw rgb24 video, e.g. into ffmpeg:
+
+    python wave_animation.py --raw | ffmpeg -f rawvideo -pix_fmt rgb24 \\
+        -s 1920x1080 -r 30 -i - waves.mp4
+
+    python wave_animation.py --frames 60 --out images/frames
+    python wave_animation.py --benchmark
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import functools
+import os
+import sys
+import time
+import numpy as np
+
+import pattern_generator as pg
+from colormap_lut import Colorizer
+from png_writer import write_png
+from tiled_renderer import wave_tile_to_rgb
+
+# ----------------------------------------------------------------
+# Parameters
+# ----------------------------------------------------------------
+WIDTH, HEIGHT = 1920, 1080
+FRAMES = 120  # one full phase cycle
+
+
+# ----------------------------------------------------------------
+# Frame generation
+# ----------------------------------------------------------------
+
+def frame_grid(width, height, extent=pg.extent):
+    """
+    x/y vectors for a width x height frame with square pixels; `extent`
+    spans the shorter side.
+    """
+    mid = (extent[1] + extent[0]) / 2.0
+    step = (extent[1] - extent[0]) / max(min(width, height) - 1, 1)
+    x = mid + (np.arange(width) - (width - 1) / 2.0) * step
+    y = mid + (np.arange(height) - (height - 1) / 2.0) * step
+    return x, y
+
+def phase_frames(width=WIDTH,
+                 height=HEIGHT,
+                 center_x=pg.center_x,
+                 center_y=pg.center_y,
+                 wavelength=pg.wavelength,
+                 frames=FRAMES,
+                 phases=None,
+                 dtype=np.float32,
+                 cmap="wave"):
+    """
+    Yields (height, width, 3) uint8 RGB frames for successive phases.
+    `phases` defaults to `frames` steps over one cycle; `cmap` is any
+    colormap accepted by colormap_lut.build_lut. The same output
+    buffer is yielded every time; copy it if a frame must be kept.
+    """
+    if phases is None:
+        phases = 2 * np.pi * np.arange(frames) / frames
+
+    x, y = frame_grid(width, height)
+
+    # Distance field scaled to radians, computed once
+    kr = pg.radial_distance(x, y, center_x, center_y)
+    kr *= 2 * np.pi / wavelength
+    kr = kr.astype(dtype, copy=False)
+
+    wave = np.empty_like(kr)
+    rgb = np.empty((height, width, 3), dtype=np.uint8)
+    if cmap == "wave":
+        # The linear depth mapping is cheaper as arithmetic than as a gather
+        scratch = np.empty_like(kr)
+        colorize = functools.partial(wave_tile_to_rgb, scratch=scratch)
+    else:
+        colorize = Colorizer(cmap)
+
+    for phi in phases:
+        # A plain float keeps the add in the field's precision
+        np.add(kr, float(phi % (2 * np.pi)), out=wave)
+        np.sin(wave, out=wave)
+        yield colorize(wave, out=rgb)
+
+
+# ----------------------------------------------------------------
+# Frame sinks
+# ----------------------------------------------------------------
+
+def write_sequence(frames, out_dir, prefix="frame"):
+    """Saves frames as numbered PNGs and returns the number written."""
+    os.makedirs(out_dir, exist_ok=True)
+    count = 0
+    for i, frame in enumerate(frames):
+        write_png(os.path.join(out_dir, "%s_%05d.png" % (prefix, i)), frame, compress_level=1)
+        count += 1
+    return count
+
+def write_raw(frames, stream):
+    """Writes frames as raw rgb24 bytes (e.g. to stdout or an ffmpeg pipe)."""
+    count = 0
+    for frame in frames:
+        stream.write(memoryview(frame).cast("B"))
+        count += 1
+    stream.flush()
+    return count
+
+def measure_fps(frames, warmup=3):
+    """Consumes a frame iterator and returns steady-state frames per second."""
+    frames = iter(frames)
+    for _ in range(warmup):
+        next(frames, None)
+    count = 0
+    t0 = time.perf_counter()
+    for _ in frames:
+        count += 1
+    elapsed = time.perf_counter() - t0
+    return count / elapsed if elapsed > 0 else float("inf")
+
+
+# ----------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Phase-sweep wave animation")
+    parser.add_argument("--size", type=int, nargs=2, default=(WIDTH, HEIGHT), metavar=("W", "H"))
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--wavelength", type=float, default=pg.wavelength)
+    parser.add_argument("--float64", action="store_true", help="use the float64 path")
+    parser.add_argument("--cmap", default="wave", help='"wave" or a matplotlib colormap name')
+    sink = parser.add_mutually_exclusive_group()
+    sink.add_argument("--out", help="directory for a PNG sequence")
+    sink.add_argument("--raw", action="store_true", help="write raw rgb24 frames to stdout")
+    sink.add_argument("--benchmark", action="store_true", help="report steady frames per second")
+    args = parser.parse_args(argv)
+
+    width, height = args.size
+    dtype = np.float64 if args.float64 else np.float32
+    frames = phase_frames(width, height, wavelength=args.wavelength, frames=args.frames,
+                          dtype=dtype, cmap=args.cmap)
+
+    if args.raw:
+        write_raw(frames, sys.stdout.buffer)
+    elif args.benchmark:
+        fps = measure_fps(frames)
+        print("%dx%d %s: %.1f frames/s" % (width, height, np.dtype(dtype).name, fps))
+    else:
+        out_dir = args.out or os.path.join(pg.IMAGES_DIR, "frames")
+        count = write_sequence(frames, out_dir)
+        print("Wrote %d frames to %s" % (count, out_dir))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Assignment 2: Multi-Attractor Steering
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Space-colonization style steering with many attractor points instead of the
+single global `attractor = (5, 20)`. Each growing tip turns toward the mean
+direction of its k nearest live attractors within an influence radius, and
+attractors closer than a kill radius to a new tip are consumed.
+
+Lookups go through a scipy cKDTree built over the attractors, so a whole
+generation of tips is steered with one batched query rather than a scan over
+every attractor per tip. Consumed attractors are masked out and skipped in
+queries; the tree is rebuilt over the survivors once a set fraction of it is
+dead, which keeps queries close to O(log M) as the set shrinks.
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import itertools
+import numpy as np
+from scipy.spatial import cKDTree
+
+# ----------------------------------------------------------------
+# Parameters
+# ----------------------------------------------------------------
+REBUILD_FRACTION = 0.25  # rebuild the tree when this share of it is consumed
+
+
+# ----------------------------------------------------------------
+# Attractor field
+# ----------------------------------------------------------------
+
+class AttractorField:
+    """
+    A consumable set of attractor points.
+
+    points           (M, 2) attractor coordinates
+    k                number of nearest attractors steering each tip
+    influence_radius attractors further away are ignored (None = no limit)
+    kill_radius      attractors within this distance of a new tip are consumed
+    """
+
+    def __init__(self, points, k=1, influence_radius=None, kill_radius=0.5):
+        self.points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        self.k = k
+        self.influence_radius = np.inf if influence_radius is None else influence_radius
+        self.kill_radius = kill_radius
+        self.alive = np.ones(len(self.points), dtype=bool)
+        self.consumed = 0
+        self._build()
+
+    def _build(self):
+        """(Re)builds the KD-tree over the attractors still alive."""
+        self._ids = np.flatnonzero(self.alive)
+        self._tree = cKDTree(self.points[self._ids]) if len(self._ids) else None
+        self._dead_in_tree = 0
+
+    def __len__(self):
+        return len(self.points) - self.consumed
+
+    # ------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------
+
+    def nearest(self, tips, k=None):
+        """
+        k nearest live attractors for every tip. Returns attractor indices
+        as an (N, k) int array, -1 where fewer than k are in range.
+        """
+        k = self.k if k is None else k
+        tips = np.asarray(tips, dtype=np.float64).reshape(-1, 2)
+        result = np.full((len(tips), k), -1, dtype=np.int64)
+        if self._tree is None or not len(tips):
+            return result
+
+        pending = np.arange(len(tips))
+        k_query = k + min(self._dead_in_tree, k)
+        size = len(self._ids)
+        while pending.size:
+            kq = min(k_query, size)
+            _, idx = self._tree.query(tips[pending], k=kq, distance_upper_bound=self.influence_radius)
+            idx = idx.reshape(len(pending), kq)
+
+            in_range = idx < size
+            ids = np.where(in_range, self._ids[np.minimum(idx, size - 1)], -1)
+            live = in_range & self.alive[np.maximum(ids, 0)]
+
+            # Rows are done once k live hits are found, or the query ran out of candidates
+            done = (live.sum(axis=1) >= k) | ~in_range.all(axis=1) | (kq == size)
+            # First k live hits per row, in distance order
+            first = np.argsort(~live[done], axis=1, kind="stable")[:, :k]
+            picked = np.take_along_axis(ids[done], first, axis=1)
+            picked[~np.take_along_axis(live[done], first, axis=1)] = -1
+            result[pending[done], :picked.shape[1]] = picked
+            pending = pending[~done]
+            k_query *= 2
+        return result
+
+    def steer(self, x, y, heading, strength):
+        """
+        Turns headings (degrees) toward the mean unit direction of each tip's
+        nearest attractors by `strength` of the shortest signed rotation.
+        Tips without attractors in range keep their heading.
+        """
+        tips = np.stack([x, y], axis=-1)
+        idx = self.nearest(tips)
+        valid = idx >= 0
+
+        targets = self.points[np.maximum(idx, 0)]                 # (N, k, 2)
+        vec = targets - tips[:, None, :]
+        norm = np.hypot(vec[..., 0], vec[..., 1])
+        norm[norm == 0] = 1.0
+        unit = vec / norm[..., None] * valid[..., None]
+        direction = unit.sum(axis=1)
+
+        has_target = valid.any(axis=1) & (np.abs(direction).sum(axis=1) > 0)
+        target_angle = np.degrees(np.arctan2(direction[:, 1], direction[:, 0]))
+        diff = (target_angle - heading + 540) % 360 - 180  # shortest signed rotation
+        return np.where(has_target, heading + diff * strength, heading)
+
+    # ------------------------------------------------------------
+    # Consumption
+    # ------------------------------------------------------------
+
+    def consume(self, x, y):
+        """Removes attractors within kill_radius of the tips; returns how many."""
+        if self._tree is None or self.kill_radius <= 0 or not np.size(x):
+            return 0
+        tips = np.stack([np.ravel(x), np.ravel(y)], axis=-1)
+        hits = self._tree.query_ball_point(tips, self.kill_radius, return_sorted=False)
+        flat = np.fromiter(itertools.chain.from_iterable(hits), dtype=np.int64)
+        if not flat.size:
+            return 0
+
+        ids = self._ids[np.unique(flat)]
+        ids = ids[self.alive[ids]]
+        self.alive[ids] = False
+        self.consumed += len(ids)
+        self._dead_in_tree += len(ids)
+
+        if self._dead_in_tree > REBUILD_FRACTION * len(self._ids):
+            self._build()
+        return len(ids)
+
+def random_attractors(count, bounds=(-20, 5, 30, 40), seed=None):
+    """Uniformly scattered attractor points inside x_min, y_min, x_max, y_max."""
+    rng = np.random.default_rng(seed)
+    xmin, ymin, xmax, ymax = bounds
+    return np.column_stack([rng.uniform(xmin, xmax, count), rng.uniform(ymin, ymax, count)])
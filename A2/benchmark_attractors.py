@@ -0,0 +1,79 @@
+"""
+Assignment 2: Attractor Lookup Benchmark
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Scales the number of attractors from 10^2 to 10^5 and compares the
+KD-tree lookup of AttractorField with a linear scan over all attractors per
+tip (vectorized in chunks, O(tips x attractors)). Also times a full
+multi-attractor growth run with consumption.
+
+Usage:
+    python benchmark_attractors.py [--tips 4096] [--depth 14]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import time
+import numpy as np
+
+from attractors import AttractorField, random_attractors
+from growth_engine import grow_generations
+
+
+# ----------------------------------------------------------------
+# Reference
+# ----------------------------------------------------------------
+
+def linear_scan(tips, points, k, chunk=256):
+    """k nearest attractors by computing every tip-attractor distance."""
+    result = np.empty((len(tips), k), dtype=np.int64)
+    for t0 in range(0, len(tips), chunk):
+        t = tips[t0:t0 + chunk]
+        d2 = ((t[:, None, :] - points[None, :, :]) ** 2).sum(axis=-1)
+        result[t0:t0 + chunk] = np.argpartition(d2, k - 1, axis=1)[:, :k]
+    return result
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - t0, result
+
+
+# ----------------------------------------------------------------
+# Main
+# ----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="KD-tree vs linear attractor lookup")
+    parser.add_argument("--tips", type=int, default=4096)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=14)
+    parser.add_argument("--counts", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(0)
+    tips = np.column_stack([rng.uniform(-20, 30, args.tips), rng.uniform(5, 40, args.tips)])
+
+    print("%d tips, k=%d" % (args.tips, args.k))
+    print("%10s %12s %12s %10s %14s %10s"
+          % ("attractors", "build s", "kd query s", "linear s", "grow s", "segments"))
+    for count in args.counts:
+        points = random_attractors(count, seed=1)
+
+        build_t, field = timed(AttractorField, points, k=args.k)
+        kd_t, kd_idx = timed(field.nearest, tips)
+        lin_t, lin_idx = timed(linear_scan, tips, points, args.k)
+        assert (np.sort(kd_idx, axis=1) == np.sort(lin_idx, axis=1)).all()
+
+        grow_field = AttractorField(points, k=args.k, influence_radius=6.0, kill_radius=0.3)
+        grow_t, (segments, _) = timed(grow_generations, depth=args.depth, attractor=grow_field,
+                                      strength=0.3, seed=1)
+        print("%10d %12.4f %12.4f %10.4f %14.4f %10d"
+              % (count, build_t, kd_t, lin_t, grow_t, len(segments)))
+
+
+if __name__ == "__main__":
+    main()
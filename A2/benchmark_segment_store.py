@@ -0,0 +1,77 @@
+"""
+Assignment 2: Segment Store Memory Benchmark
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Compares the memory used by N grown segments kept as a list of
+(LineString, stem_id) tuples, as grow_branch does, with the same segments in
+a SegmentStore, and scales both to one million segments.
+
+tracemalloc only sees Python and NumPy allocations, not the GEOS
+coordinate buffers behind each LineString, so the tuple-list figure is a
+lower bound.
+
+Usage:
+    python benchmark_segment_store.py [--depth 18]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import time
+import tracemalloc
+from shapely.geometry import LineString
+
+from growth_engine import grow_generations
+from segment_store import SegmentStore
+
+
+# ----------------------------------------------------------------
+# Measurements
+# ----------------------------------------------------------------
+
+def measure(build):
+    """Returns (seconds, bytes still allocated) for build()."""
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - t0
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return elapsed, current
+
+def tuple_list(segments, stem_ids):
+    return [(LineString(seg), int(stem)) for seg, stem in zip(segments.tolist(), stem_ids.tolist())]
+
+def column_store(segments, stem_ids):
+    store = SegmentStore.from_arrays(segments, stem_ids)
+    store.trim()
+    return store
+
+
+# ----------------------------------------------------------------
+# Main
+# ----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tuple list vs SegmentStore memory")
+    parser.add_argument("--depth", type=int, default=18)
+    args = parser.parse_args(argv)
+
+    segments, stem_ids = grow_generations(depth=args.depth, obstacles=None, seed=0)
+    n = len(segments)
+    print("%d segments (depth %d)" % (n, args.depth))
+    print("%-22s %10s %14s %16s" % ("layout", "build s", "bytes/segment", "MB per million"))
+
+    for name, build in (("(LineString, stem) list", tuple_list), ("SegmentStore", column_store)):
+        elapsed, current = measure(lambda: build(segments, stem_ids))
+        per_segment = current / n
+        print("%-22s %10.3f %14.1f %16.1f" % (name, elapsed, per_segment, per_segment * 1e6 / 2 ** 20))
+
+    print("SegmentStore columns: %d bytes/segment" % SegmentStore.bytes_per_segment())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Assignment 2: Benchmark Suite
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Measures how growth, obstacle culling and rendering scale with the A2
+parameters, each stage timed on its own:
+
+- depth    iterations from 5 to 20
+- step     STEP length at a fixed depth
+- obstacles number of random obstacle boxes
+- strength attractor strength
+
+The cull stage tests the unpruned tree (the same growth without obstacles,
+i.e. every candidate branch) against the obstacles, so its rate counts
+candidates. Every run records wall time per stage, segments per second and
+the peak memory of each stage (tracemalloc, measured in a separate pass so
+the tracing overhead does not skew the timings). Results are written to
+JSON; pass a previous file with --compare to print the time ratios per run.
+
+Usage:
+    python benchmark_suite.py [--out results.json] [--compare old.json] [--quick]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import json
+import platform
+import random
+import time
+import tracemalloc
+import numpy as np
+
+import fractal_generator as fg
+from fractal_render import rasterize_segments, stem_colors
+from growth_engine import grow_tree
+from obstacles import ObstacleSet
+
+# ----------------------------------------------------------------
+# Parameters
+# ----------------------------------------------------------------
+DEPTHS = list(range(5, 21))
+STEPS = [2, 4, 6, 8, 12]
+OBSTACLE_COUNTS = [1, 10, 100, 1000]
+STRENGTHS = [0.0, 0.04, 0.08, 0.16, 0.32]
+SWEEP_DEPTH = 14       # depth used for the step/obstacle/strength sweeps
+RENDER_SIZE = 1000     # raster size in pixels
+
+
+# ----------------------------------------------------------------
+# Stages
+# ----------------------------------------------------------------
+
+def random_obstacles(count, seed=0):
+    """Boxes scattered above the trunk, plus the original OBSTACLE_BOUNDS."""
+    rng = np.random.default_rng(seed)
+    x0 = rng.uniform(-30, 30, count - 1)
+    y0 = rng.uniform(10, 40, count - 1)
+    size = rng.uniform(0.5, 3.0, (count - 1, 2))
+    boxes = np.column_stack([x0, y0, x0 + size[:, 0], y0 + size[:, 1]])
+    return ObstacleSet(boxes=np.vstack([fg.OBSTACLE_BOUNDS, boxes]))
+
+def candidate_segments(depth, step, strength):
+    """The tree grown without obstacles: every branch the obstacles could cut."""
+    random.seed(fg.SEED)
+    segments, _ = grow_tree(step=step, depth=depth, attractor=fg.attractor,
+                            strength=strength, obstacles=None, angle=fg.ANGLE)
+    return segments
+
+def run_stages(depth, step, obstacles, strength, candidates):
+    """Runs grow, cull and render once; returns (outputs, seconds per stage)."""
+    times = {}
+
+    t0 = time.perf_counter()
+    random.seed(fg.SEED)
+    segments, stem_ids = grow_tree(step=step, depth=depth, attractor=fg.attractor,
+                                   strength=strength, obstacles=obstacles, angle=fg.ANGLE)
+    times["grow"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    hit = obstacles.hits(candidates)
+    times["cull"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    rasterize_segments(segments, stem_colors(stem_ids), RENDER_SIZE, RENDER_SIZE)
+    times["render"] = time.perf_counter() - t0
+    return (segments, hit), times
+
+def stage_peaks(depth, step, obstacles, strength, candidates):
+    """Peak traced memory in bytes of each stage."""
+    peaks = {}
+
+    def traced(name, fn):
+        tracemalloc.start()
+        result = fn()
+        peaks[name] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result
+
+    random.seed(fg.SEED)
+    segments, stem_ids = traced("grow", lambda: grow_tree(
+        step=step, depth=depth, attractor=fg.attractor, strength=strength,
+        obstacles=obstacles, angle=fg.ANGLE))
+    traced("cull", lambda: obstacles.hits(candidates))
+    traced("render", lambda: rasterize_segments(segments, stem_colors(stem_ids),
+                                                RENDER_SIZE, RENDER_SIZE))
+    return peaks
+
+def benchmark(sweep, depth, step, obstacle_count, strength, repeat, memory):
+    obstacles = random_obstacles(obstacle_count)
+    candidates = candidate_segments(depth, step, strength)
+    best = None
+    for _ in range(repeat):
+        (segments, _), times = run_stages(depth, step, obstacles, strength, candidates)
+        best = times if best is None else {k: min(best[k], v) for k, v in times.items()}
+
+    record = {
+        "sweep": sweep,
+        "depth": depth,
+        "step": step,
+        "obstacles": obstacle_count,
+        "strength": strength,
+        "segments": int(len(segments)),
+        "candidates": int(len(candidates)),
+        "seconds": best,
+        "segments_per_s": {k: (len(candidates) if k == "cull" else len(segments)) / v if v > 0 else None
+                           for k, v in best.items()},
+    }
+    if memory:
+        record["peak_bytes"] = stage_peaks(depth, step, obstacles, strength, candidates)
+    return record
+
+
+# ----------------------------------------------------------------
+# Comparison
+# ----------------------------------------------------------------
+
+def run_key(record):
+    return (record["sweep"], record["depth"], record["step"], record["obstacles"], record["strength"])
+
+def compare(results, baseline_path):
+    """Prints new/old time ratio per stage for runs present in both files."""
+    with open(baseline_path) as f:
+        baseline = {run_key(r): r for r in json.load(f)["runs"]}
+    print("\n%-10s %6s %6s %6s %8s %8s %8s %8s"
+          % ("sweep", "depth", "step", "obst", "strength", "grow x", "cull x", "render x"))
+    for record in results:
+        old = baseline.get(run_key(record))
+        if old is None:
+            continue
+        ratios = [record["seconds"][k] / old["seconds"][k] if old["seconds"][k] else float("nan")
+                  for k in ("grow", "cull", "render")]
+        print("%-10s %6d %6g %6d %8g %8.2f %8.2f %8.2f" % (run_key(record) + tuple(ratios)))
+
+
+# ----------------------------------------------------------------
+# Main
+# ----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="A2 growth / culling / rendering benchmarks")
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    parser.add_argument("--repeat", type=int, default=3, help="best of N timings")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--quick", action="store_true", help="depths 5-14 only, one repeat")
+    args = parser.parse_args(argv)
+
+    depths = [d for d in DEPTHS if d <= 14] if args.quick else DEPTHS
+    repeat = 1 if args.quick else args.repeat
+
+    runs = [("depth", d, fg.STEP, 1, fg.attract_strength) for d in depths]
+    runs += [("step", SWEEP_DEPTH, s, 1, fg.attract_strength) for s in STEPS]
+    runs += [("obstacles", SWEEP_DEPTH, fg.STEP, n, fg.attract_strength) for n in OBSTACLE_COUNTS]
+    runs += [("strength", SWEEP_DEPTH, fg.STEP, 1, k) for k in STRENGTHS]
+
+    print("%-10s %6s %6s %6s %8s %10s %9s %9s %9s %12s %10s"
+          % ("sweep", "depth", "step", "obst", "strength", "segments",
+             "grow s", "cull s", "render s", "grow seg/s", "peak MB"))
+    results = []
+    for sweep, depth, step, count, strength in runs:
+        record = benchmark(sweep, depth, step, count, strength, repeat, not args.no_memory)
+        results.append(record)
+        sec = record["seconds"]
+        peak = max(record["peak_bytes"].values()) / 2 ** 20 if "peak_bytes" in record else float("nan")
+        print("%-10s %6d %6g %6d %8g %10d %9.4f %9.4f %9.4f %12.0f %10.1f"
+              % (sweep, depth, step, count, strength, record["segments"],
+                 sec["grow"], sec["cull"], sec["render"], record["segments_per_s"]["grow"] or 0, peak))
+
+    with open(args.out, "w") as f:
+        json.dump({"python": platform.python_version(), "numpy": np.__version__,
+                   "machine": platform.machine(), "runs": results}, f, indent=2)
+    print("\nWrote %s" % args.out)
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
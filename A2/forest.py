@@ -0,0 +1,240 @@
+"""
+Assignment 2: Path-Keyed Parallel Growth
+
+Author: Hroar Holm Bertelsen
+
+Description:
+grow_branch draws its jitter from the global `random` stream, so every value
+depends on how many branches were grown before it, and the tree can only be
+grown in one fixed order. Here every branch draws from a counter-based
+generator instead: its two uniforms are a splitmix64 hash of
+(seed, tree index, heap index, slot), where the heap index is the branch's
+path from the root (root = 1, children 2h and 2h + 1).
+
+A branch's values then do not depend on traversal order, so:
+
+- whole generations are grown as arrays, as in grow_generations,
+- the tree is split into subtrees after a few generations and the subtrees
+  are grown across a process pool,
+- forests of many trees with different roots are grown in the same pool,
+
+and the result is bit-identical for any worker count. Output is sorted by
+(tree, heap index), i.e. breadth-first per tree.
+
+The same tree rules apply (steering toward one attractor point, step and
+angle jitter, obstacle pruning); the jitter values differ from the
+SEED-driven recursive version.
+
+Usage:
+    python forest.py [--trees 4] [--depth 16] [--workers 1 2 4]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import hashlib
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from growth_engine import ANGLE, ANGLE_JITTER, STEP_JITTER, STEP_SCALE, steer_headings
+from obstacles import ObstacleSet
+from segment_store import SegmentStore
+
+# ----------------------------------------------------------------
+# Parameters
+# ----------------------------------------------------------------
+TASKS_PER_WORKER = 4  # subtrees handed to each worker
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MUL1 = np.uint64(0xBF58476D1CE4E5B9)
+_MUL2 = np.uint64(0x94D049BB133111EB)
+
+
+# ----------------------------------------------------------------
+# Counter-based random numbers
+# ----------------------------------------------------------------
+
+def _mix(z):
+    """splitmix64 finalizer on uint64 arrays."""
+    z = (z ^ (z >> np.uint64(30))) * _MUL1
+    z = (z ^ (z >> np.uint64(27))) * _MUL2
+    return z ^ (z >> np.uint64(31))
+
+def path_uniform(seed, tree, heap, slot):
+    """
+    Uniform [0, 1) value for each (tree, heap index) pair and draw slot
+    (0 = step jitter, 1 = angle jitter). Pure function of its arguments.
+    """
+    with np.errstate(over="ignore"):
+        key = _mix(np.asarray(seed, dtype=np.uint64) + _GOLDEN)
+        z = _mix(key ^ (np.asarray(tree, dtype=np.uint64) * _GOLDEN))
+        z = _mix(z ^ (np.asarray(heap, dtype=np.uint64) * np.uint64(4) + np.uint64(slot)))
+    return (z >> np.uint64(11)) * (1.0 / (1 << 53))
+
+
+# ----------------------------------------------------------------
+# Growth
+# ----------------------------------------------------------------
+
+def grow_front(front, step, generations, attractor, strength, obstacles, angle, seed):
+    """
+    Grows `generations` levels from the tips in `front`, a tuple of arrays
+    (tree, heap, x, y, heading, stem). Returns (columns, front): columns are
+    arrays tree, heap, x0, y0, x1, y1, stem of the grown segments and front
+    holds the tips left after the last generation.
+    """
+    obstacles = ObstacleSet.coerce(obstacles)
+    tree, heap, x, y, heading, stem = front
+    lo, hi = STEP_JITTER
+    alo, ahi = ANGLE_JITTER
+    parts = []
+
+    for _ in range(generations):
+        if not x.size:
+            break
+        heading = steer_headings(x, y, heading, attractor, strength, exact=False)
+
+        rad = np.radians(heading)
+        step_variation = step * (lo + (hi - lo) * path_uniform(seed, tree, heap, 0))
+        x2 = x + step_variation * np.cos(rad)
+        y2 = y + step_variation * np.sin(rad)
+
+        # obstacle pruning for the whole generation in one call
+        segments = np.stack([np.stack([x, y], axis=-1), np.stack([x2, y2], axis=-1)], axis=1)
+        keep = ~obstacles.hits(segments) if len(obstacles) else np.ones(x.size, dtype=bool)
+        tree, heap, stem = tree[keep], heap[keep], stem[keep]
+        x, y, x2, y2, heading = x[keep], y[keep], x2[keep], y2[keep], heading[keep]
+        parts.append((tree, heap, x, y, x2, y2, stem))
+
+        angle_variation = angle + (alo + (ahi - alo) * path_uniform(seed, tree, heap, 1))
+
+        # Left child (heading + angle) is 2h, right child 2h + 1
+        tree = np.concatenate([tree, tree])
+        heap = np.concatenate([2 * heap, 2 * heap + 1])
+        x = np.concatenate([x2, x2])
+        y = np.concatenate([y2, y2])
+        heading = np.concatenate([heading + angle_variation, heading - angle_variation])
+        stem = np.concatenate([stem + 1, stem + 1])
+        step *= STEP_SCALE
+
+    if parts:
+        columns = tuple(np.concatenate(cols) for cols in zip(*parts))
+    else:
+        columns = (tree[:0], heap[:0], x[:0], y[:0], x[:0], y[:0], stem[:0])
+    return columns, (tree, heap, x, y, heading, stem)
+
+def _grow_task(front, step, generations, attractor, strength, obstacles, angle, seed):
+    return grow_front(front, step, generations, attractor, strength, obstacles, angle, seed)[0]
+
+def _split_depth(trees, depth, tasks):
+    """Generations grown up front so the frontier has about `tasks` tips."""
+    split = 0
+    while split < depth and trees * 2 ** split < tasks:
+        split += 1
+    return split
+
+def grow_forest(roots,
+                step=6,
+                depth=5,
+                attractor=(5, 20),
+                strength=0.08,
+                obstacles=(-2, 12, 4, 14),
+                angle=ANGLE,
+                stem_id=0,
+                seed=0,
+                workers=1):
+    """
+    Grows one tree per (x, y, heading) root and returns a SegmentStore per
+    tree, in breadth-first order with parent indices. The result is the same
+    for any `workers` (None = one per CPU).
+    """
+    if depth > 62:
+        raise ValueError("heap indices of depth %d do not fit in 64 bits" % depth)
+    roots = np.asarray(roots, dtype=np.float64).reshape(-1, 3)
+    workers = os.cpu_count() if workers is None else workers
+    obstacles = ObstacleSet.coerce(obstacles)
+    n = len(roots)
+    front = (np.arange(n, dtype=np.int64), np.ones(n, dtype=np.int64),
+             roots[:, 0], roots[:, 1], roots[:, 2], np.full(n, stem_id, dtype=np.int64))
+    args = (attractor, strength, obstacles, angle, seed)
+
+    if workers <= 1:
+        columns, _ = grow_front(front, step, depth, *args)
+        results = [columns]
+    else:
+        # Grow the trunk levels here, then hand out subtrees
+        split = _split_depth(n, depth, workers * TASKS_PER_WORKER)
+        top, front = grow_front(front, step, split, *args)
+        chunks = np.array_split(np.arange(front[0].size), workers * TASKS_PER_WORKER)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_grow_task, tuple(col[idx] for col in front),
+                                   step * STEP_SCALE ** split, depth - split, *args)
+                       for idx in chunks if idx.size]
+            results = [top] + [f.result() for f in futures]
+
+    tree, heap, x0, y0, x1, y1, stem = (np.concatenate(cols) for cols in zip(*results))
+    order = np.lexsort((heap, tree))
+    tree, heap, x0, y0, x1, y1, stem = (c[order] for c in (tree, heap, x0, y0, x1, y1, stem))
+
+    stores = []
+    bounds = np.searchsorted(tree, np.arange(n + 1))
+    for t in range(n):
+        s = slice(bounds[t], bounds[t + 1])
+        h = heap[s]
+        parent = np.where(h > 1, np.searchsorted(h, h // 2), -1)
+        store = SegmentStore(capacity=max(1, h.size))
+        store.extend(x0[s], y0[s], x1[s], y1[s], stem[s] - stem_id, parent, stem[s])
+        stores.append(store)
+    return stores
+
+def grow_keyed(x=0.0,
+               y=0.0,
+               heading=90.0,
+               step=6,
+               depth=5,
+               attractor=(5, 20),
+               strength=0.08,
+               obstacles=(-2, 12, 4, 14),
+               angle=ANGLE,
+               stem_id=0,
+               seed=0,
+               workers=1):
+    """Single tree with path-keyed jitter; returns its SegmentStore."""
+    return grow_forest([(x, y, heading)], step, depth, attractor, strength, obstacles,
+                       angle, stem_id, seed, workers)[0]
+
+
+# ----------------------------------------------------------------
+# Main
+# ----------------------------------------------------------------
+
+def digest(stores):
+    """sha256 over all columns, to compare runs."""
+    h = hashlib.sha256()
+    for store in stores:
+        for name in ("x0", "y0", "x1", "y1", "depth", "parent", "stem"):
+            h.update(getattr(store, name).tobytes())
+    return h.hexdigest()[:16]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reproducible parallel forest growth")
+    parser.add_argument("--trees", type=int, default=4)
+    parser.add_argument("--depth", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=28)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    args = parser.parse_args(argv)
+
+    # Roots spread along the x axis, all growing upward
+    roots = [(20.0 * i, 0.0, 90.0) for i in range(args.trees)]
+    print("%8s %10s %12s %18s" % ("workers", "seconds", "segments", "digest"))
+    for workers in args.workers:
+        t0 = time.perf_counter()
+        stores = grow_forest(roots, depth=args.depth, seed=args.seed, workers=workers)
+        elapsed = time.perf_counter() - t0
+        print("%8d %10.3f %12d %18s" % (workers, elapsed, sum(map(len, stores)), digest(stores)))
+
+
+if __name__ == "__main__":
+    main()
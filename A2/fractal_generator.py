@@ -5,16 +5,25 @@ Author: Hroar Holm Bertelsen
 
 Description:
 This script generates fractal patterns using recursive functions and geometric transformations.
+
+grow_branch is the recursive reference implementation. The main script grows
+the tree with growth_engine.grow_tree, which produces identical segments for
+the same SEED without recursion, so `iterations` can go well beyond 15.
 """
 # ----------------------------------------------------------------
 # Imports
 # ----------------------------------------------------------------
 import math
-import matplotlib.pyplot as plt
-from shapely.geometry import LineString, MultiLineString
+import os
+from shapely.geometry import LineString
 from shapely.affinity import scale
 from shapely.geometry import box  
 import random
+import shapely
+
+import growth_engine
+from fractal_render import render_linecollection
+from segment_store import SegmentStore
 
 # ----------------------------------------------------------------
 # Parameters
@@ -26,7 +35,12 @@ STEP = 6            # step length
 
 OBSTACLE_BOUNDS = (-2, 12, 4, 14)  # x_min, y_min, x_max, y_max
 
-random.seed(SEED)
+attractor = (5, 20)
+attract_strength = 0.08
+
+# --- Resolve paths relative to this script ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+IMAGES_DIR = os.path.join(BASE_DIR, "images")
 
 # ----------------------------------------------------------------
 # Helper functions
@@ -76,80 +90,83 @@ def grow_branch(x, y, heading, step, depth, lines, stem_id):
 # Main Execution
 # ----------------------------------------------------------------
 
-attractor = (5, 20)
-attract_strength = 0.08
-
-lines = []
-grow_branch(
-    x=0.0,
-    y=0.0,
-    heading=90.0,
-    step=STEP,
-    depth=iterations,
-    lines=lines,
-    stem_id=0
-)
-
-geometry = MultiLineString([line for line, _ in lines])
-stem_ids = [sid for _, sid in lines]
-max_stem_id = max(stem_ids) if stem_ids else 1
-
-# --- Apply transformations ---
-geometry = scale(geometry, xfact=1, yfact=1)
-
-
-# ----------------------------------------------------------------
-# Visualization
-# ----------------------------------------------------------------
-
-# --- Visualization with Matplotlib including Attractor ---
-fig, ax = plt.subplots(figsize=(8, 8))
-num_lines = len(geometry.geoms)
-for line, stem_id in zip(geometry.geoms, stem_ids):
-    x, y = line.xy
-    color = plt.cm.viridis(stem_id / max_stem_id)
-    ax.plot(x, y, color=color, linewidth=1.2)
-
-# ---Draw forbidden box---
-x_min, y_min, x_max, y_max = constraint_box.bounds
-ax.add_patch(plt.Rectangle((x_min, y_min),
-                           x_max - x_min,
-                           y_max - y_min,
-                           color='red', alpha=0.3, label='Forbidden zone'))
-
-
-
-# --- Draw attractor point --- 
-ax.plot(attractor[0], attractor[1], 'yo', markersize=8, label='Attractor')
-ax.set_aspect("equal", "datalim")
-ax.axis("off")
-
-# --- Expand plot bounds to avoid cropping attractor ---
-xmin, xmax = ax.get_xlim()
-ymin, ymax = ax.get_ylim()
-
-padding = 1  # padding space 
-ax.set_xlim(xmin, xmax)
-ax.set_ylim(ymin, ymax + padding)
-
-# --- Final clean export ---
-ax.set_aspect("equal", adjustable="box")
-ax.axis("off")
-plt.margins(0)
-
-# --- Resolve paths relative to this script ---
-import os
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-IMAGES_DIR = os.path.join(BASE_DIR, "images")
-
-# Ensure images folder exists
-os.makedirs(IMAGES_DIR, exist_ok=True)
-
-# ---Save tightly cropped, high-resolution image ---
-plt.savefig(
-    os.path.join(IMAGES_DIR, "fractal_output.png"),
-    bbox_inches="tight",
-    pad_inches=0,
-    dpi=300
-)
-plt.close(fig)
+def main():
+    import matplotlib.pyplot as plt
+
+    random.seed(SEED)
+
+    # Same segments as grow_branch(0, 0, 90, STEP, iterations, lines, 0)
+    store = SegmentStore()
+    growth_engine.grow_tree(
+        x=0.0,
+        y=0.0,
+        heading=90.0,
+        step=STEP,
+        depth=iterations,
+        attractor=attractor,
+        strength=attract_strength,
+        obstacles=OBSTACLE_BOUNDS,
+        angle=ANGLE,
+        stem_id=0,
+        store=store
+    )
+    stem_ids = store.stem
+
+    geometry = store.to_multilinestring()
+
+    # --- Apply transformations ---
+    geometry = scale(geometry, xfact=1, yfact=1)
+    segments = shapely.get_coordinates(geometry).reshape(-1, 2, 2)
+
+
+    # ----------------------------------------------------------------
+    # Visualization
+    # ----------------------------------------------------------------
+
+    # --- Visualization with Matplotlib including Attractor ---
+    fig, ax = plt.subplots(figsize=(8, 8))
+    # One LineCollection for all branches instead of one ax.plot per segment
+    render_linecollection(ax, segments, stem_ids, linewidth=1.2)
+
+    # ---Draw forbidden box---
+    x_min, y_min, x_max, y_max = constraint_box.bounds
+    ax.add_patch(plt.Rectangle((x_min, y_min),
+                               x_max - x_min,
+                               y_max - y_min,
+                               color='red', alpha=0.3, label='Forbidden zone'))
+
+
+
+    # --- Draw attractor point --- 
+    ax.plot(attractor[0], attractor[1], 'yo', markersize=8, label='Attractor')
+    ax.set_aspect("equal", "datalim")
+    ax.axis("off")
+
+    # --- Expand plot bounds to avoid cropping attractor ---
+    xmin, xmax = ax.get_xlim()
+    ymin, ymax = ax.get_ylim()
+
+    padding = 1  # padding space 
+    ax.set_xlim(xmin, xmax)
+    ax.set_ylim(ymin, ymax + padding)
+
+    # --- Final clean export ---
+    ax.set_aspect("equal", adjustable="box")
+    ax.axis("off")
+    plt.margins(0)
+
+    # Ensure images folder exists
+    os.makedirs(IMAGES_DIR, exist_ok=True)
+
+    # ---Save tightly cropped, high-resolution image ---
+    plt.savefig(
+        os.path.join(IMAGES_DIR, "fractal_output.png"),
+        bbox_inches="tight",
+        pad_inches=0,
+        dpi=300
+    )
+    plt.close(fig)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Assignment 2: Batched Fractal Rendering
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Draws the packed (N, 2, 2) segment array of a grown tree in one go instead
+of one ax.plot call (and one Line2D artist) per branch.
+
+- render_linecollection adds a single matplotlib LineCollection, coloured
+  from the stem_ids array with one vectorized colormap call.
+- rasterize_segments draws anti-aliased lines straight into a NumPy canvas:
+  every segment is sampled at half-pixel spacing, and the samples are
+  splatted onto their four nearest pixels with bilinear weights using
+  np.bincount. The PNG writer of A1 (png_writer.py) saves the canvas with
+  zlib, so this path needs no matplotlib at all.
+
+Usage:
+    python fractal_render.py [--depth 16] [--size 2000] [--out images/fractal_raster.png]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import os
+import sys
+import numpy as np
+
+# The zlib PNG writer of Assignment 1
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "A1"))
+from png_writer import write_png
+
+# ----------------------------------------------------------------
+# Parameters
+# ----------------------------------------------------------------
+SAMPLE_SPACING = 0.5     # pixels between samples along a segment
+SAMPLE_BUDGET = 1 << 21  # samples splatted per chunk
+
+# viridis sampled at 17 stops, so the raster path does not need matplotlib
+VIRIDIS = np.array([
+    [68, 1, 84], [72, 24, 106], [71, 45, 123], [66, 64, 134], [59, 82, 139],
+    [51, 99, 141], [44, 114, 142], [38, 130, 142], [33, 145, 140], [31, 160, 136],
+    [40, 174, 128], [63, 188, 115], [94, 201, 98], [132, 212, 75], [173, 220, 48],
+    [216, 226, 25], [253, 231, 37],
+], dtype=np.float64) / 255.0
+
+
+# ----------------------------------------------------------------
+# Colours
+# ----------------------------------------------------------------
+
+def stem_colors(stem_ids, cmap=None):
+    """
+    (N, 3) float RGB for the stem ids in one call, normalized by the largest
+    id as in fractal_generator.py. cmap is a matplotlib colormap or None for
+    the built-in viridis stops.
+    """
+    stem_ids = np.asarray(stem_ids, dtype=np.float64)
+    max_stem_id = stem_ids.max() if stem_ids.size and stem_ids.max() > 0 else 1
+    t = stem_ids / max_stem_id
+    if cmap is not None:
+        return np.asarray(cmap(t))[:, :3]
+    pos = t * (len(VIRIDIS) - 1)
+    i = np.clip(np.floor(pos).astype(np.int64), 0, len(VIRIDIS) - 2)
+    f = (pos - i)[:, None]
+    return VIRIDIS[i] * (1 - f) + VIRIDIS[i + 1] * f
+
+
+# ----------------------------------------------------------------
+# Matplotlib
+# ----------------------------------------------------------------
+
+def render_linecollection(ax, segments, stem_ids, linewidth=1.2):
+    """Adds all segments to `ax` as a single LineCollection and returns it."""
+    import matplotlib.pyplot as plt
+    from matplotlib.collections import LineCollection
+
+    collection = LineCollection(segments, colors=stem_colors(stem_ids, plt.cm.viridis),
+                                linewidths=linewidth)
+    ax.add_collection(collection)
+    ax.autoscale_view()
+    return collection
+
+
+# ----------------------------------------------------------------
+# NumPy rasterizer
+# ----------------------------------------------------------------
+
+def rasterize_segments(segments,
+                       colors,
+                       width,
+                       height,
+                       bounds=None,
+                       line_width=1.0,
+                       background=(1.0, 1.0, 1.0),
+                       antialias=True):
+    """
+    Draws (N, 2, 2) world-space segments with (N, 3) float colours into an
+    (height, width, 3) uint8 image. `bounds` (x_min, y_min, x_max, y_max)
+    defaults to the segment extent; the aspect ratio is preserved.
+    """
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+    colors = np.asarray(colors, dtype=np.float64).reshape(-1, 3)
+    if bounds is None and len(segments):
+        pts = segments.reshape(-1, 2)
+        bounds = (*pts.min(axis=0), *pts.max(axis=0))
+    xmin, ymin, xmax, ymax = bounds if bounds is not None else (0, 0, 1, 1)
+
+    # World -> pixel, y flipped, centred in the canvas
+    pad = line_width + 1
+    scale = min((width - 2 * pad) / max(xmax - xmin, 1e-12), (height - 2 * pad) / max(ymax - ymin, 1e-12))
+    ox = (width - (xmax - xmin) * scale) / 2
+    oy = (height - (ymax - ymin) * scale) / 2
+    px = (segments[..., 0] - xmin) * scale + ox
+    py = (ymax - segments[..., 1]) * scale + oy
+
+    coverage = np.zeros(width * height)
+    color_sum = np.zeros((3, width * height))
+
+    # Perpendicular offsets give lines wider than one pixel
+    lanes = max(1, int(np.ceil(line_width / SAMPLE_SPACING)))
+    offsets = (np.arange(lanes) - (lanes - 1) / 2) * (line_width / lanes)
+    lane_weight = line_width / lanes if line_width > 1 else 1.0 / lanes
+
+    length = np.hypot(px[:, 1] - px[:, 0], py[:, 1] - py[:, 0])
+    counts = np.maximum(np.ceil(length / SAMPLE_SPACING).astype(np.int64), 1) + 1
+    ends = np.cumsum(counts)
+
+    s0 = 0
+    while s0 < len(segments):
+        # Segments whose samples fit in the budget (at least one)
+        base = ends[s0 - 1] if s0 else 0
+        s1 = max(s0 + 1, int(np.searchsorted(ends, base + SAMPLE_BUDGET // lanes, side="right")))
+        _splat_chunk(px[s0:s1], py[s0:s1], counts[s0:s1], length[s0:s1], colors[s0:s1],
+                     offsets, lane_weight, width, height, antialias, coverage, color_sum)
+        s0 = s1
+
+    alpha = np.minimum(coverage, 1.0)
+    mean_color = color_sum / np.maximum(coverage, 1e-12)
+    image = mean_color * alpha + np.asarray(background, dtype=np.float64)[:, None] * (1 - alpha)
+    image = np.rint(np.clip(image, 0, 1) * 255).astype(np.uint8)
+    return image.T.reshape(height, width, 3)
+
+def _splat_chunk(px, py, counts, length, colors, offsets, lane_weight,
+                 width, height, antialias, coverage, color_sum):
+    """Samples one chunk of segments and accumulates them into the canvas."""
+    seg = np.repeat(np.arange(len(counts)), counts)
+    start = np.repeat(np.cumsum(counts) - counts, counts)
+    t = (np.arange(len(seg)) - start) / np.maximum(counts[seg] - 1, 1)
+
+    # Each sample stands for length / (count - 1) pixels of line
+    step = np.where(counts > 1, length / np.maximum(counts - 1, 1), 1.0)[seg]
+
+    dx, dy = px[:, 1] - px[:, 0], py[:, 1] - py[:, 0]
+    norm = np.maximum(np.hypot(dx, dy), 1e-12)
+    nx, ny = (-dy / norm)[seg], (dx / norm)[seg]
+    sx = px[seg, 0] + t * dx[seg]
+    sy = py[seg, 0] + t * dy[seg]
+
+    for off in offsets:
+        x = sx + off * nx - 0.5
+        y = sy + off * ny - 0.5
+        weight = step * lane_weight
+        if antialias:
+            ix, iy = np.floor(x).astype(np.int64), np.floor(y).astype(np.int64)
+            fx, fy = x - ix, y - iy
+            taps = ((0, 0, (1 - fx) * (1 - fy)), (1, 0, fx * (1 - fy)),
+                    (0, 1, (1 - fx) * fy), (1, 1, fx * fy))
+        else:
+            ix, iy = np.rint(x).astype(np.int64), np.rint(y).astype(np.int64)
+            taps = ((0, 0, 1.0),)
+
+        for ddx, ddy, w in taps:
+            cx, cy = ix + ddx, iy + ddy
+            inside = (cx >= 0) & (cx < width) & (cy >= 0) & (cy < height)
+            flat = (cy * width + cx)[inside]
+            wt = (weight * w)[inside] if np.ndim(w) else weight[inside] * w
+            coverage += np.bincount(flat, weights=wt, minlength=coverage.size)
+            for c in range(3):
+                color_sum[c] += np.bincount(flat, weights=wt * colors[seg[inside], c],
+                                            minlength=coverage.size)
+
+
+# ----------------------------------------------------------------
+# Command line
+# ----------------------------------------------------------------
+
+def main(argv=None):
+    import random
+    import fractal_generator as fg
+    from growth_engine import grow_tree
+
+    parser = argparse.ArgumentParser(description="Rasterize the A2 fractal without matplotlib")
+    parser.add_argument("--depth", type=int, default=fg.iterations)
+    parser.add_argument("--size", type=int, default=2000)
+    parser.add_argument("--line-width", type=float, default=1.0)
+    parser.add_argument("--out", default=os.path.join(fg.IMAGES_DIR, "fractal_raster.png"))
+    args = parser.parse_args(argv)
+
+    random.seed(fg.SEED)
+    segments, stem_ids = grow_tree(step=fg.STEP, depth=args.depth, attractor=fg.attractor,
+                                   strength=fg.attract_strength, obstacles=fg.OBSTACLE_BOUNDS,
+                                   angle=fg.ANGLE)
+    image = rasterize_segments(segments, stem_colors(stem_ids), args.size, args.size,
+                               line_width=args.line_width)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    write_png(args.out, image)
+    print("Wrote %d segments to %s" % (len(segments), args.out))
+
+
+if __name__ == "__main__":
+    main()
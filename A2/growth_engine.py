@@ -0,0 +1,371 @@
+"""
+Assignment 2: Iterative Growth Engine
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Grows the same binary branching tree as grow_branch in fractal_generator.py
+without recursion, and returns exactly the same segments and stem ids for
+the same random state.
+
+The recursive version draws two numbers from the global `random` stream per
+branch (step jitter, then angle jitter) in depth-first order, and a branch
+cut by the obstacle draws only one. The engine reproduces that order with a
+running draw offset:
+
+- The stream is drawn as a NumPy array from a copy of the Mersenne Twister
+  state, so value k is exactly the k-th random.random() call. It is drawn
+  in chunks as far as the growth consumes it, so memory follows the grown
+  tree rather than the full 2**depth tree.
+- Branches whose whole subtree cannot reach the obstacle (the subtree lies
+  within a disc of radius sum of maximum step lengths) cannot be pruned, so
+  their subtree uses a known number of draws. They are set aside with their
+  offset, and the offset skips ahead.
+- Branches close to the obstacle are grown one by one on an explicit stack,
+  in the same order as the recursion.
+- The set-aside subtrees are then expanded one whole generation at a time
+  with NumPy arrays (steering, cos/sin, step and angle jitter).
+
+Segments are finally ordered by their draw offset, which is the depth-first
+order the recursive version appends them in.
+
+grow_generations is a faster, fully breadth-first variant that does not
+follow the `random` stream: each generation draws its jitter from a NumPy
+Generator and is pruned against the obstacles in a single batched call.
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import math
+import random
+import numpy as np
+
+from attractors import AttractorField
+from obstacles import ObstacleSet
+
+# ----------------------------------------------------------------
+# Parameters (same as fractal_generator.py)
+# ----------------------------------------------------------------
+ANGLE = 45
+STEP_SCALE = 0.75            # child step = parent step * STEP_SCALE
+STEP_JITTER = (0.85, 1.15)   # random.uniform range for step length
+ANGLE_JITTER = (-2, 2)       # random.uniform range added to ANGLE
+
+# math.atan2 element-wise; np.arctan2 can differ from libm by one ulp
+_atan2 = np.frompyfunc(math.atan2, 2, 1)
+
+
+# ----------------------------------------------------------------
+# Random stream
+# ----------------------------------------------------------------
+
+def _random_state(rng):
+    """Copies a random.Random state into a NumPy RandomState."""
+    version, internal, gauss_next = rng.getstate()
+    state = np.random.RandomState()
+    state.set_state(("MT19937", np.array(internal[:-1], dtype=np.uint32), internal[-1]))
+    return state
+
+class LazyStream:
+    """
+    The coming rng.random() values as an array, without advancing `rng`
+    (use advance_stream once the consumption is known). upto(n) returns at
+    least the first n values, drawing further chunks from the copied state
+    only when needed.
+    """
+
+    CHUNK = 1 << 16
+    LIMIT = 1 << 28      # 2 GiB of draws, about 1.3e8 segments
+
+    def __init__(self, rng=random):
+        self.state = _random_state(rng)
+        self.values = np.empty(0)
+
+    def upto(self, n):
+        if n > self.LIMIT:
+            raise MemoryError("tree needs %d random draws (limit %d); lower the depth or prune more"
+                              % (n, self.LIMIT))
+        if n > len(self.values):
+            more = min(max(n - len(self.values), len(self.values), self.CHUNK), self.LIMIT - len(self.values))
+            self.values = np.concatenate([self.values, self.state.random_sample(more)])
+        return self.values
+
+    def __getitem__(self, k):
+        return float(self.upto(k + 1)[k])
+
+def advance_stream(count, rng=random):
+    """Advances `rng` as if random() had been called `count` times."""
+    version, internal, gauss_next = rng.getstate()
+    state = _random_state(rng)
+    state.random_sample(count)
+    _, key, pos = state.get_state()[:3]
+    rng.setstate((version, tuple(int(k) for k in key) + (int(pos),), gauss_next))
+
+def subtree_draws(depth):
+    """Draws consumed by an unpruned subtree of the given remaining depth."""
+    return 2 * (2 ** depth - 1)
+
+
+# ----------------------------------------------------------------
+# Geometry helpers
+# ----------------------------------------------------------------
+
+def subtree_reach(step, depth):
+    """Upper bound on how far a subtree can extend from its start point."""
+    return STEP_JITTER[1] * step * (1 - STEP_SCALE ** depth) / (1 - STEP_SCALE)
+
+# --- Vectorized steer_toward_attractor ---
+def steer_headings(x, y, heading, attractor, strength, exact=True):
+    """exact=True matches math.atan2 bit for bit; False uses np.arctan2."""
+    ax, ay = attractor
+    if exact:
+        target_angle = np.degrees(_atan2(ay - y, ax - x).astype(np.float64))
+    else:
+        target_angle = np.degrees(np.arctan2(ay - y, ax - x))
+    diff = (target_angle - heading + 540) % 360 - 180
+    return heading + diff * strength
+
+
+# ----------------------------------------------------------------
+# Generation expansion
+# ----------------------------------------------------------------
+
+def expand_subtrees(front, stream, attractor, strength, angle=ANGLE):
+    """
+    Grows unprunable subtrees one generation per iteration.
+    `front` holds arrays x, y, heading, step, depth, stem, offset, parent
+    where offset is the position of each branch's first draw in `stream`
+    and parent is the offset of its parent branch (-1 for none).
+    Returns arrays (x0, y0, x1, y1, stem, offset, parent) of all segments.
+    """
+    x, y, heading, step, depth, stem, offset, parent = front
+    parts = []
+    lo, hi = STEP_JITTER
+    alo, ahi = ANGLE_JITTER
+
+    while x.size:
+        heading = steer_headings(x, y, heading, attractor, strength)
+
+        rad = np.radians(heading)
+        step_variation = step * (lo + (hi - lo) * stream[offset])
+        x2 = x + step_variation * np.cos(rad)
+        y2 = y + step_variation * np.sin(rad)
+        parts.append((x, y, x2, y2, stem, offset, parent))
+
+        angle_variation = angle + (alo + (ahi - alo) * stream[offset + 1])
+
+        # Children of branches with levels left; right child skips the left subtree
+        keep = depth > 1
+        x2, y2, heading, angle_variation = x2[keep], y2[keep], heading[keep], angle_variation[keep]
+        child_step = step[keep] * STEP_SCALE
+        child_depth = depth[keep] - 1
+        child_stem = stem[keep] + 1
+        parent_offset = offset[keep]
+
+        x = np.concatenate([x2, x2])
+        y = np.concatenate([y2, y2])
+        heading = np.concatenate([heading + angle_variation, heading - angle_variation])
+        step = np.concatenate([child_step, child_step])
+        depth = np.concatenate([child_depth, child_depth])
+        stem = np.concatenate([child_stem, child_stem])
+        offset = np.concatenate([parent_offset + 2, parent_offset + 2 ** (child_depth + 1)])
+        parent = np.concatenate([parent_offset, parent_offset])
+
+    return tuple(np.concatenate(cols) for cols in zip(*parts))
+
+
+# ----------------------------------------------------------------
+# Tree growth
+# ----------------------------------------------------------------
+
+def grow_tree(x=0.0,
+              y=0.0,
+              heading=90.0,
+              step=6,
+              depth=5,
+              attractor=(5, 20),
+              strength=0.08,
+              obstacles=(-2, 12, 4, 14),
+              angle=ANGLE,
+              stem_id=0,
+              rng=random,
+              store=None):
+    """
+    Iterative equivalent of fractal_generator.grow_branch. Returns
+    (segments, stem_ids): an (N, 2, 2) array of [[x0, y0], [x1, y1]] and
+    an (N,) int array, in the order grow_branch appends them. `rng` is
+    advanced by the same number of draws as the recursive version.
+    `obstacles` is an ObstacleSet, one bounds tuple or a list of them.
+
+    With a SegmentStore as `store`, the segments are also appended to it
+    together with their depth and parent index.
+    """
+    obstacles = ObstacleSet.coerce(obstacles)
+    if depth <= 0:
+        return _result(np.empty((0, 2, 2)), np.empty(0, dtype=np.int64), stem_id, None, store)
+
+    stream = LazyStream(rng)
+    lo, hi = STEP_JITTER
+    alo, ahi = ANGLE_JITTER
+    ax, ay = attractor
+
+    near = []      # segments grown one by one: (x0, y0, x1, y1, stem, offset, parent)
+    deferred = []  # unprunable subtree roots: (x, y, heading, step, depth, stem, offset, parent)
+    cursor = 0
+
+    # Explicit stack in the recursion's order: left child popped first.
+    # parent is the draw offset of the parent branch.
+    stack = [(x, y, heading, step, depth, stem_id, -1)]
+    while stack:
+        x, y, heading, step, depth, stem, parent = stack.pop()
+        if depth == 0:
+            continue
+
+        if obstacles.distance_lower_bound(x, y) > subtree_reach(step, depth) * (1 + 1e-9):
+            deferred.append((x, y, heading, step, depth, stem, cursor, parent))
+            cursor += subtree_draws(depth)
+            continue
+
+        # steer toward attractor
+        target_angle = math.degrees(math.atan2(ay - y, ax - x))
+        diff = (target_angle - heading + 540) % 360 - 180
+        heading = heading + diff * strength
+
+        # compute endpoint
+        rad = math.radians(heading)
+        step_variation = step * (lo + (hi - lo) * stream[cursor])
+        x2 = x + step_variation * math.cos(rad)
+        y2 = y + step_variation * math.sin(rad)
+        offset = cursor
+        cursor += 1
+
+        # obstacle pruning
+        if obstacles.hits_segment(x, y, x2, y2):
+            continue
+
+        near.append((x, y, x2, y2, stem, offset, parent))
+
+        angle_variation = angle + (alo + (ahi - alo) * stream[cursor])
+        cursor += 1
+
+        stack.append((x2, y2, heading - angle_variation, step * STEP_SCALE, depth - 1, stem + 1, offset))
+        stack.append((x2, y2, heading + angle_variation, step * STEP_SCALE, depth - 1, stem + 1, offset))
+
+    advance_stream(cursor, rng)
+
+    parts = []
+    if near:
+        parts.append([np.array(col) for col in zip(*near)])
+
+    # Whole generations of the unprunable subtrees at once
+    if deferred:
+        cols = list(zip(*deferred))
+        front = [np.array(c, dtype=np.float64) for c in cols[:4]] + \
+                [np.array(c, dtype=np.int64) for c in cols[4:]]
+        parts.append(expand_subtrees(front, stream.upto(cursor), attractor, strength, angle))
+
+    if not parts:
+        return _result(np.empty((0, 2, 2)), np.empty(0, dtype=np.int64), stem_id, None, store)
+    x0, y0, x1, y1, stems, offsets, parents = (np.concatenate(cols) for cols in zip(*parts))
+
+    # Draw offsets increase in depth-first order
+    order = np.argsort(offsets, kind="stable")
+    segments = np.stack([np.stack([x0, y0], axis=-1), np.stack([x1, y1], axis=-1)], axis=1)
+    segments, stems = segments[order], stems[order].astype(np.int64)
+    if store is None:
+        return segments, stems
+
+    # Parent offsets -> parent positions in the sorted output
+    offsets, parents = offsets[order], parents[order]
+    parents = np.where(parents >= 0, np.searchsorted(offsets, parents), -1)
+    return _result(segments, stems, stem_id, parents, store)
+
+def _result(segments, stems, stem_id, parents, store):
+    """(segments, stem_ids), also appended to `store` if one is given."""
+    if store is not None:
+        base = len(store)
+        parents = -1 if parents is None else np.where(parents >= 0, parents + base, -1)
+        store.extend(segments[:, 0, 0], segments[:, 0, 1], segments[:, 1, 0], segments[:, 1, 1],
+                     stems - stem_id, parents, stems)
+    return segments, stems
+
+
+def grow_generations(x=0.0,
+                     y=0.0,
+                     heading=90.0,
+                     step=6,
+                     depth=5,
+                     attractor=(5, 20),
+                     strength=0.08,
+                     obstacles=(-2, 12, 4, 14),
+                     angle=ANGLE,
+                     stem_id=0,
+                     seed=None,
+                     store=None):
+    """
+    Breadth-first growth with the same rules as grow_tree. Every generation
+    is steered, jittered and pruned as whole arrays; jitter comes from
+    np.random.default_rng(seed), so the result is reproducible per seed but
+    differs from the recursive version. Segments are returned generation by
+    generation as (segments, stem_ids).
+
+    `attractor` is either one (x, y) point or an AttractorField; with a
+    field, each tip steers toward its nearest live attractors and the
+    attractors reached by a generation are consumed before the next one.
+
+    With a SegmentStore as `store`, segments are also appended to it with
+    their depth and parent index.
+    """
+    obstacles = ObstacleSet.coerce(obstacles)
+    rng = np.random.default_rng(seed)
+    lo, hi = STEP_JITTER
+    alo, ahi = ANGLE_JITTER
+
+    x = np.array([x], dtype=np.float64)
+    y = np.array([y], dtype=np.float64)
+    heading = np.array([heading], dtype=np.float64)
+    step = float(step)
+    stem = stem_id
+    parent = np.array([-1], dtype=np.int64)  # index of each tip's parent segment
+    count = 0
+    seg_parts, stem_parts, parent_parts = [], [], []
+
+    for _ in range(depth):
+        if not x.size:
+            break
+        if isinstance(attractor, AttractorField):
+            heading = attractor.steer(x, y, heading, strength)
+        else:
+            heading = steer_headings(x, y, heading, attractor, strength, exact=False)
+
+        rad = np.radians(heading)
+        step_variation = step * rng.uniform(lo, hi, x.size)
+        x2 = x + step_variation * np.cos(rad)
+        y2 = y + step_variation * np.sin(rad)
+
+        # obstacle pruning for the whole generation in one call
+        segments = np.stack([np.stack([x, y], axis=-1), np.stack([x2, y2], axis=-1)], axis=1)
+        keep = ~obstacles.hits(segments) if len(obstacles) else np.ones(x.size, dtype=bool)
+        segments = segments[keep]
+        seg_parts.append(segments)
+        stem_parts.append(np.full(len(segments), stem, dtype=np.int64))
+        parent_parts.append(parent[keep])
+        index = np.arange(count, count + len(segments))
+        count += len(segments)
+
+        angle_variation = angle + rng.uniform(alo, ahi, len(segments))
+        x2, y2, heading = x2[keep], y2[keep], heading[keep]
+        if isinstance(attractor, AttractorField):
+            attractor.consume(x2, y2)
+
+        x = np.concatenate([x2, x2])
+        y = np.concatenate([y2, y2])
+        heading = np.concatenate([heading + angle_variation, heading - angle_variation])
+        parent = np.concatenate([index, index])
+        step *= STEP_SCALE
+        stem += 1
+
+    if not seg_parts:
+        return _result(np.empty((0, 2, 2)), np.empty(0, dtype=np.int64), stem_id, None, store)
+    return _result(np.concatenate(seg_parts), np.concatenate(stem_parts), stem_id,
+                   np.concatenate(parent_parts), store)
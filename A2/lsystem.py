@@ -0,0 +1,375 @@
+"""
+Assignment 2: L-System Engine
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Real L-system grammars (axiom, production rules, stochastic rules) drawn by
+a turtle into a SegmentStore, without ever building the expanded string.
+
+Turtle commands:
+    F, G   move forward one step and draw a segment
+    f      move forward without drawing
+    + -    turn left / right by the angle
+    [ ]    push / pop the turtle state (a branch)
+Any other symbol (X, Y, ...) only takes part in rewriting.
+
+Two ways of producing the segments:
+
+- Streaming: expand() walks the derivation tree with an explicit stack and
+  yields one symbol at a time, so memory is O(depth). interpret() runs the
+  turtle over that stream and flushes segments into the store in chunks.
+  Stochastic rules pick their successor from a hash of the symbol's path in
+  the derivation tree, so a seed always gives the same plant.
+- Compiled (deterministic grammars with balanced brackets in every rule):
+  each (symbol, depth) is turned once into a block of segments in its own
+  turtle frame plus its end pose. A block is built from the blocks of its
+  successor symbols by rotating and translating their arrays, so the cost
+  is in NumPy and proportional to the number of segments, not symbols.
+
+grow_lsystem picks the compiled path when it can.
+
+Usage:
+    python lsystem.py [--preset plant] [--depth 8] [--stream]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import math
+import time
+import numpy as np
+
+from segment_store import SegmentStore
+
+# ----------------------------------------------------------------
+# Parameters
+# ----------------------------------------------------------------
+DRAW = "FG"
+MOVE = "f"
+CHUNK = 1 << 16  # segments buffered before each store.extend
+
+PRESETS = {
+    # Lindenmayer's fractal plant
+    "plant": dict(axiom="X", rules={"X": "F+[[X]-X]-F[-FX]+X", "F": "FF"}, angle=25),
+    # Binary tree close to grow_branch
+    "binary": dict(axiom="F", rules={"F": "G[+F][-F]", "G": "GG"}, angle=45),
+    # Stochastic bush: successors chosen with equal weight
+    "bush": dict(axiom="F", rules={"F": [("F[+F]F[-F]F", 1), ("F[+F]F", 1), ("F[-F]F", 1)]}, angle=25.7),
+}
+
+_M64 = (1 << 64) - 1
+
+
+# ----------------------------------------------------------------
+# Grammar
+# ----------------------------------------------------------------
+
+def parse_rules(rules):
+    """
+    Normalizes rules to {symbol: [(successor, cumulative_probability), ...]}.
+    A rule is a string (deterministic) or a list of (successor, weight).
+    """
+    parsed = {}
+    for symbol, rule in rules.items():
+        options = [(rule, 1.0)] if isinstance(rule, str) else list(rule)
+        total = float(sum(w for _, w in options))
+        acc, table = 0.0, []
+        for successor, weight in options:
+            acc += weight / total
+            table.append((successor, acc))
+        table[-1] = (table[-1][0], 1.0)
+        parsed[symbol] = table
+    return parsed
+
+def is_deterministic(rules):
+    return all(len(options) == 1 for options in parse_rules(rules).values())
+
+def is_compilable(rules, axiom=""):
+    """Deterministic, and the axiom and every successor have balanced brackets."""
+    parsed = parse_rules(rules)
+    return _balanced(axiom) and all(len(options) == 1 and _balanced(options[0][0]) for options in parsed.values())
+
+def count_symbols(axiom, rules, depth):
+    """Length of the expanded string of a deterministic grammar (exact int)."""
+    rules = {s: opts[0][0] for s, opts in parse_rules(rules).items()}
+    counts = {}  # symbol -> length after the current number of rewrites
+    for d in range(depth + 1):
+        counts = {s: (sum(counts.get(c, 1) for c in rules[s]) if d and s in rules else 1)
+                  for s in set(axiom).union(*rules.values(), rules)}
+    return sum(counts.get(c, 1) for c in axiom)
+
+# --- splitmix64 on Python ints, for path-keyed choices ---
+def _mix64(z):
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _M64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _M64
+    return z ^ (z >> 31)
+
+def _choose(options, key):
+    if len(options) == 1:
+        return options[0][0]
+    u = (key >> 11) * (1.0 / (1 << 53))
+    for successor, cumulative in options:
+        if u < cumulative:
+            return successor
+    return options[-1][0]
+
+def expand(axiom, rules, depth, seed=0):
+    """
+    Yields the symbols of the depth-times rewritten axiom one by one.
+    Each symbol's key is derived from its parent's key and its position in
+    the successor, so stochastic choices only depend on the seed and path.
+    """
+    rules = parse_rules(rules)
+    root = _mix64((seed + 0x9E3779B97F4A7C15) & _M64)
+    stack = [(axiom, 0, depth, root)]
+    while stack:
+        text, i, d, key = stack.pop()
+        if i >= len(text):
+            continue
+        stack.append((text, i + 1, d, key))
+        symbol = text[i]
+        options = rules.get(symbol) if d > 0 else None
+        if options is None:
+            yield symbol
+            continue
+        child_key = _mix64(key ^ ((i + 1) * 0x9E3779B97F4A7C15 & _M64))
+        stack.append((_choose(options, child_key), 0, d - 1, child_key))
+
+
+# ----------------------------------------------------------------
+# Streaming turtle
+# ----------------------------------------------------------------
+
+def interpret(symbols, angle=25, step=1.0, x=0.0, y=0.0, heading=90.0, store=None, chunk=CHUNK):
+    """
+    Runs the turtle over an iterable of symbols and appends the segments to
+    `store` (a new SegmentStore if None), `chunk` at a time. depth is the
+    bracket nesting level; parent is the segment drawn before on the same
+    branch (-1 at the root).
+    """
+    store = SegmentStore() if store is None else store
+    base = len(store)
+    turn = math.radians(angle)
+    theta = math.radians(heading)
+    last, level = -1, 0
+    stack = []
+    buf = ([], [], [], [], [], [])
+    count = 0
+
+    for symbol in symbols:
+        if symbol in DRAW:
+            x2 = x + step * math.cos(theta)
+            y2 = y + step * math.sin(theta)
+            for col, value in zip(buf, (x, y, x2, y2, level, last)):
+                col.append(value)
+            last = base + count
+            count += 1
+            x, y = x2, y2
+            if len(buf[0]) >= chunk:
+                _flush(store, buf)
+        elif symbol == "+":
+            theta += turn
+        elif symbol == "-":
+            theta -= turn
+        elif symbol == "[":
+            stack.append((x, y, theta, last))
+            level += 1
+        elif symbol == "]":
+            x, y, theta, last = stack.pop()
+            level -= 1
+        elif symbol in MOVE:
+            x += step * math.cos(theta)
+            y += step * math.sin(theta)
+
+    _flush(store, buf)
+    return store
+
+def _flush(store, buf):
+    if buf[0]:
+        x0, y0, x1, y1, level, parent = buf
+        store.extend(np.array(x0), np.array(y0), np.array(x1), np.array(y1),
+                     np.array(level), np.array(parent), np.array(level))
+        for col in buf:
+            col.clear()
+
+
+# ----------------------------------------------------------------
+# Compiled blocks
+# ----------------------------------------------------------------
+
+class _Block:
+    """
+    Segments of one (symbol, depth) in the frame of the turtle entering it.
+    parent -1 means "the segment drawn before the block"; last is the index
+    of the last segment on the block's main path (-1 if none); end is the
+    turtle pose (x, y, theta) when leaving the block.
+    """
+    __slots__ = ("x0", "y0", "x1", "y1", "level", "parent", "last", "end")
+
+    def __init__(self, cols, last, end):
+        self.x0, self.y0, self.x1, self.y1, self.level, self.parent = cols
+        self.last = last
+        self.end = end
+
+    def __len__(self):
+        return len(self.x0)
+
+def _balanced(text):
+    level = 0
+    for c in text:
+        level += (c == "[") - (c == "]")
+        if level < 0:
+            return False
+    return level == 0
+
+def _check_axiom(axiom):
+    # A "]" without its "[" would pop an empty turtle stack in either path
+    if not _balanced(axiom):
+        raise ValueError("axiom %r has unbalanced brackets" % axiom)
+
+def _empty_cols():
+    return tuple(np.empty(0) for _ in range(4)) + (np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64))
+
+def _terminal(symbol, step, turn):
+    empty = _empty_cols()
+    if symbol in DRAW:
+        cols = (np.zeros(1), np.zeros(1), np.full(1, float(step)), np.zeros(1),
+                np.zeros(1, dtype=np.int32), np.full(1, -1, dtype=np.int64))
+        return _Block(cols, 0, (float(step), 0.0, 0.0))
+    if symbol in MOVE:
+        return _Block(empty, -1, (float(step), 0.0, 0.0))
+    if symbol == "+":
+        return _Block(empty, -1, (0.0, 0.0, turn))
+    if symbol == "-":
+        return _Block(empty, -1, (0.0, 0.0, -turn))
+    return _Block(empty, -1, (0.0, 0.0, 0.0))
+
+def _compose(text, depth, block_of):
+    """Places the blocks of `text` one after another along the turtle path."""
+    x = y = theta = 0.0
+    last, level, size = -1, 0, 0
+    stack, parts = [], []
+
+    for symbol in text:
+        if symbol == "[":
+            stack.append((x, y, theta, last))
+            level += 1
+            continue
+        if symbol == "]":
+            x, y, theta, last = stack.pop()
+            level -= 1
+            continue
+
+        block = block_of(symbol, depth)
+        if len(block):
+            c, s = math.cos(theta), math.sin(theta)
+            parent = np.where(block.parent >= 0, block.parent + size, last)
+            parts.append((x + c * block.x0 - s * block.y0, y + s * block.x0 + c * block.y0,
+                          x + c * block.x1 - s * block.y1, y + s * block.x1 + c * block.y1,
+                          block.level + level, parent))
+        if block.last >= 0:
+            last = block.last + size
+        size += len(block)
+
+        bx, by, bt = block.end
+        c, s = math.cos(theta), math.sin(theta)
+        x, y, theta = x + c * bx - s * by, y + s * bx + c * by, theta + bt
+
+    cols = tuple(np.concatenate(c) for c in zip(*parts)) if parts else _empty_cols()
+    return _Block(cols, last, (x, y, theta))
+
+def compile_lsystem(axiom, rules, depth, angle=25, step=1.0):
+    """
+    Segments of a deterministic grammar as a _Block in the turtle's start
+    frame (heading along +x). Blocks are cached per (symbol, depth).
+    """
+    _check_axiom(axiom)
+    if not is_compilable(rules):
+        raise ValueError("compiled mode needs deterministic rules with balanced brackets")
+    rules = {s: opts[0][0] for s, opts in parse_rules(rules).items()}
+    turn = math.radians(angle)
+    cache = {}
+
+    def block_of(symbol, d):
+        key = (symbol, d)
+        if key not in cache:
+            if d > 0 and symbol in rules:
+                cache[key] = _compose(rules[symbol], d - 1, block_of)
+            else:
+                cache[key] = _terminal(symbol, step, turn)
+        return cache[key]
+
+    # Build bottom-up so the recursion in block_of stays shallow
+    for d in range(depth):
+        for symbol in rules:
+            block_of(symbol, d)
+    return _compose(axiom, depth, block_of)
+
+
+# ----------------------------------------------------------------
+# Entry point
+# ----------------------------------------------------------------
+
+def grow_lsystem(axiom,
+                 rules,
+                 depth,
+                 angle=25,
+                 step=1.0,
+                 x=0.0,
+                 y=0.0,
+                 heading=90.0,
+                 seed=0,
+                 store=None,
+                 stream=None):
+    """
+    Draws the grammar into `store` (a new SegmentStore if None) and returns
+    it. stream=None uses the compiled path for deterministic grammars with
+    balanced rules and streaming otherwise.
+    """
+    _check_axiom(axiom)
+    if stream is None:
+        stream = not is_compilable(rules, axiom)
+    if stream:
+        return interpret(expand(axiom, rules, depth, seed), angle, step, x, y, heading, store)
+
+    store = SegmentStore() if store is None else store
+    block = compile_lsystem(axiom, rules, depth, angle, step)
+    base = len(store)
+    theta = math.radians(heading)
+    c, s = math.cos(theta), math.sin(theta)
+    store.extend(x + c * block.x0 - s * block.y0, y + s * block.x0 + c * block.y0,
+                 x + c * block.x1 - s * block.y1, y + s * block.x1 + c * block.y1,
+                 block.level, np.where(block.parent >= 0, block.parent + base, -1), block.level)
+    return store
+
+
+# ----------------------------------------------------------------
+# Main
+# ----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grow an L-system into a SegmentStore")
+    parser.add_argument("--preset", choices=sorted(PRESETS), default="plant")
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--stream", action="store_true", help="force the streaming interpreter")
+    parser.add_argument("--out", help="write the segments as GeoJSON")
+    args = parser.parse_args(argv)
+
+    preset = PRESETS[args.preset]
+    if is_deterministic(preset["rules"]):
+        print("expanded string: %d symbols" % count_symbols(preset["axiom"], preset["rules"], args.depth))
+
+    t0 = time.perf_counter()
+    store = grow_lsystem(preset["axiom"], preset["rules"], args.depth, preset["angle"],
+                         seed=args.seed, stream=True if args.stream else None)
+    elapsed = time.perf_counter() - t0
+    print("%d segments in %.3f s (%.0f segments/s), %.1f MB"
+          % (len(store), elapsed, len(store) / max(elapsed, 1e-9), store.nbytes / 2 ** 20))
+    if args.out:
+        store.to_geojson(args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Assignment 2: Batched Obstacle Culling
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Tests whole arrays of branch segments against many obstacles in one call,
+instead of building a shapely LineString per branch and calling
+.intersects(constraint_box).
+
+- Axis-aligned boxes use a vectorized Liang–Barsky clip over the
+  (segments x boxes) pairs, in chunks to bound memory.
+- Arbitrary polygons use shapely 2.x: the segments become LineStrings in one
+  shapely.linestrings call and are matched against an STRtree of the
+  polygons with the "intersects" predicate.
+
+Obstacles are closed sets, as with shapely: touching a boundary counts as a
+hit.
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import math
+import numpy as np
+import shapely
+from shapely import STRtree
+
+# ----------------------------------------------------------------
+# Parameters
+# ----------------------------------------------------------------
+PAIR_BUDGET = 1 << 22  # max (segment, box) pairs tested per chunk
+
+
+# ----------------------------------------------------------------
+# Boxes
+# ----------------------------------------------------------------
+
+def segments_hit_boxes(segments, boxes):
+    """
+    Liang–Barsky for every (segment, box) pair. segments is (N, 2, 2),
+    boxes is (M, 4) as x_min, y_min, x_max, y_max. Returns an (N,) bool
+    mask of segments touching at least one box.
+    """
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    hit = np.zeros(len(segments), dtype=bool)
+    if not len(segments) or not len(boxes):
+        return hit
+
+    chunk = max(1, PAIR_BUDGET // len(boxes))
+    xmin, ymin, xmax, ymax = (boxes[None, :, i] for i in range(4))
+
+    for s0 in range(0, len(segments), chunk):
+        seg = segments[s0:s0 + chunk]
+        x0, y0 = seg[:, 0, 0, None], seg[:, 0, 1, None]
+        dx, dy = seg[:, 1, 0, None] - x0, seg[:, 1, 1, None] - y0
+
+        t0 = np.zeros((len(seg), len(boxes)))
+        t1 = np.ones((len(seg), len(boxes)))
+        inside = np.ones((len(seg), len(boxes)), dtype=bool)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for p, q in ((-dx, x0 - xmin), (dx, xmax - x0), (-dy, y0 - ymin), (dy, ymax - y0)):
+                p = np.broadcast_to(p, q.shape)
+                parallel = p == 0
+                # Parallel to this edge: hit only if on the inner side
+                inside &= ~(parallel & (q < 0))
+                t = q / p
+                t0 = np.where(~parallel & (p < 0), np.maximum(t0, t), t0)
+                t1 = np.where(~parallel & (p > 0), np.minimum(t1, t), t1)
+
+        hit[s0:s0 + len(seg)] = (inside & (t0 <= t1)).any(axis=1)
+    return hit
+
+def box_distance(x, y, boxes):
+    """Distance from point(s) to the nearest of the boxes (0 inside)."""
+    boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+    x = np.asarray(x, dtype=np.float64)[..., None]
+    y = np.asarray(y, dtype=np.float64)[..., None]
+    dx = np.maximum(np.maximum(boxes[:, 0] - x, x - boxes[:, 2]), 0.0)
+    dy = np.maximum(np.maximum(boxes[:, 1] - y, y - boxes[:, 3]), 0.0)
+    return np.hypot(dx, dy).min(axis=-1) if len(boxes) else np.full(x.shape[:-1], np.inf)
+
+
+# ----------------------------------------------------------------
+# Polygons
+# ----------------------------------------------------------------
+
+def segments_hit_polygons(segments, tree):
+    """(N,) bool mask of segments intersecting any geometry in the STRtree."""
+    segments = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+    hit = np.zeros(len(segments), dtype=bool)
+    if not len(segments):
+        return hit
+    lines = shapely.linestrings(segments)
+    seg_idx, _ = tree.query(lines, predicate="intersects")
+    hit[seg_idx] = True
+    return hit
+
+
+# ----------------------------------------------------------------
+# Obstacle set
+# ----------------------------------------------------------------
+
+class ObstacleSet:
+    """
+    Boxes and polygons tested together. `boxes` is a sequence of
+    (x_min, y_min, x_max, y_max); `polygons` holds shapely geometries.
+    """
+
+    def __init__(self, boxes=(), polygons=()):
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.polygons = list(polygons)
+        self.tree = STRtree(self.polygons) if self.polygons else None
+
+        # Bounding boxes of everything, for conservative distance tests
+        poly_bounds = shapely.bounds(self.polygons).reshape(-1, 4) if self.polygons else np.empty((0, 4))
+        self.bounds = np.vstack([self.boxes, poly_bounds])
+
+        # Plain lists for the scalar paths
+        self._box_list = self.boxes.tolist()
+        self._bounds_list = self.bounds.tolist()
+
+    @classmethod
+    def coerce(cls, obstacles):
+        """Accepts an ObstacleSet, a single bounds tuple or a list of them."""
+        if obstacles is None:
+            return cls()
+        if isinstance(obstacles, cls):
+            return obstacles
+        return cls(boxes=obstacles)
+
+    def __len__(self):
+        return len(self.boxes) + len(self.polygons)
+
+    def hits(self, segments):
+        """(N,) bool mask of segments touching any obstacle."""
+        hit = segments_hit_boxes(segments, self.boxes)
+        if self.tree is not None:
+            hit |= segments_hit_polygons(segments, self.tree)
+        return hit
+
+    def hits_segment(self, x0, y0, x1, y1):
+        """Single-segment test, used where branches must be checked one by one."""
+        for xmin, ymin, xmax, ymax in self._box_list:
+            if _segment_hits_box(x0, y0, x1, y1, xmin, ymin, xmax, ymax):
+                return True
+        if self.tree is not None:
+            line = shapely.linestrings([[x0, y0], [x1, y1]])
+            return len(self.tree.query(line, predicate="intersects")) > 0
+        return False
+
+    def distance_lower_bound(self, x, y):
+        """
+        Distance to the nearest obstacle bounding box; never more than the
+        true distance. Scalars take a plain-Python path.
+        """
+        if np.ndim(x) == 0 and np.ndim(y) == 0:
+            best = math.inf
+            for xmin, ymin, xmax, ymax in self._bounds_list:
+                dx = max(xmin - x, x - xmax, 0.0)
+                dy = max(ymin - y, y - ymax, 0.0)
+                best = min(best, math.hypot(dx, dy))
+            return best
+        return box_distance(x, y, self.bounds)
+
+# --- Scalar Liang–Barsky, for single segments ---
+def _segment_hits_box(x0, y0, x1, y1, xmin, ymin, xmax, ymax):
+    dx, dy = x1 - x0, y1 - y0
+    t0, t1 = 0.0, 1.0
+    for p, q in ((-dx, x0 - xmin), (dx, xmax - x0), (-dy, y0 - ymin), (dy, ymax - y0)):
+        if p == 0:
+            if q < 0:
+                return False
+        else:
+            t = q / p
+            if p < 0:
+                t0 = max(t0, t)
+            else:
+                t1 = min(t1, t)
+            if t0 > t1:
+                return False
+    return True
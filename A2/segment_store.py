@@ -0,0 +1,188 @@
+"""
+Assignment 2: Segment Store
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Keeps grown branches as NumPy columns instead of a Python list of
+(LineString, stem_id) tuples. Each segment costs 44 bytes: x0, y0, x1, y1
+as float64 and depth, parent and stem as int32. The columns are
+preallocated and doubled when full, so appending stays amortized O(1).
+
+Shapely geometry is only built when asked for (to_shapely,
+to_multilinestring), and GeoJSON/WKB export is done for the whole store in
+one call.
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import json
+import numpy as np
+import shapely
+
+# ----------------------------------------------------------------
+# Parameters
+# ----------------------------------------------------------------
+INITIAL_CAPACITY = 1024
+FLOAT_COLUMNS = ("x0", "y0", "x1", "y1")
+INT_COLUMNS = ("depth", "parent", "stem")
+COLUMNS = FLOAT_COLUMNS + INT_COLUMNS
+
+
+# ----------------------------------------------------------------
+# Segment store
+# ----------------------------------------------------------------
+
+class SegmentStore:
+    """
+    Growable column store of branch segments.
+
+    depth   generation of the segment (0 = trunk)
+    parent  index of the parent segment in this store, -1 for roots
+    stem    stem id, as passed to grow_branch
+    """
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self._size = 0
+        self._capacity = max(1, int(capacity))
+        self._data = {name: np.empty(self._capacity, dtype=np.float64) for name in FLOAT_COLUMNS}
+        self._data.update({name: np.empty(self._capacity, dtype=np.int32) for name in INT_COLUMNS})
+
+    @classmethod
+    def from_arrays(cls, segments, stem_ids, depth=None, parent=None):
+        """Builds a store from an (N, 2, 2) segment array and (N,) stem ids."""
+        segments = np.asarray(segments, dtype=np.float64).reshape(-1, 2, 2)
+        stem_ids = np.asarray(stem_ids)
+        if depth is None:
+            # Stem ids grow by one per generation
+            depth = stem_ids - stem_ids.min() if len(stem_ids) else 0
+        store = cls(capacity=len(segments))
+        store.extend(segments[:, 0, 0], segments[:, 0, 1], segments[:, 1, 0], segments[:, 1, 1],
+                     depth, -1 if parent is None else parent, stem_ids)
+        return store
+
+    def __len__(self):
+        return self._size
+
+    def __getattr__(self, name):
+        # Column views trimmed to the stored segments: store.x0, store.stem, ...
+        data = self.__dict__.get("_data")
+        if data is not None and name in data:
+            return data[name][:self._size]
+        raise AttributeError(name)
+
+    # ------------------------------------------------------------
+    # Appending
+    # ------------------------------------------------------------
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if needed <= self._capacity:
+            return
+        while self._capacity < needed:
+            self._capacity *= 2
+        for name, column in self._data.items():
+            grown = np.empty(self._capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._data[name] = grown
+
+    def append(self, x0, y0, x1, y1, depth=0, parent=-1, stem=0):
+        """Adds one segment and returns its index."""
+        self._reserve(1)
+        i = self._size
+        for name, value in zip(COLUMNS, (x0, y0, x1, y1, depth, parent, stem)):
+            self._data[name][i] = value
+        self._size += 1
+        return i
+
+    def extend(self, x0, y0, x1, y1, depth=0, parent=-1, stem=0):
+        """Adds a batch of segments (arrays or scalars broadcast to the batch)."""
+        count = np.broadcast(x0, y0, x1, y1).size
+        self._reserve(count)
+        s = slice(self._size, self._size + count)
+        for name, value in zip(COLUMNS, (x0, y0, x1, y1, depth, parent, stem)):
+            self._data[name][s] = value
+        self._size += count
+        return np.arange(s.start, s.stop)
+
+    def trim(self):
+        """Releases unused capacity."""
+        self._capacity = max(1, self._size)
+        for name, column in self._data.items():
+            self._data[name] = column[:self._capacity].copy()
+
+    # ------------------------------------------------------------
+    # Access
+    # ------------------------------------------------------------
+
+    @property
+    def segments(self):
+        """(N, 2, 2) array of [[x0, y0], [x1, y1]] (a copy)."""
+        n = self._size
+        out = np.empty((n, 2, 2))
+        out[:, 0, 0], out[:, 0, 1] = self.x0, self.y0
+        out[:, 1, 0], out[:, 1, 1] = self.x1, self.y1
+        return out
+
+    def select(self, mask):
+        """New store with the segments where `mask` (bool or index array) holds."""
+        index = np.flatnonzero(mask) if np.asarray(mask).dtype == bool else np.asarray(mask)
+        subset = SegmentStore(capacity=len(index))
+        # Parents outside the selection become -1
+        remap = np.full(self._size + 1, -1, dtype=np.int64)
+        remap[index] = np.arange(len(index))
+        cols = [getattr(self, name)[index] for name in COLUMNS]
+        cols[5] = remap[cols[5]]
+        subset.extend(*cols)
+        return subset
+
+    def by_depth(self, lo, hi=None):
+        """Segments with lo <= depth < hi (only depth == lo if hi is None)."""
+        depth = self.depth
+        mask = depth == lo if hi is None else (depth >= lo) & (depth < hi)
+        return self.select(mask)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the columns, including spare capacity."""
+        return sum(column.nbytes for column in self._data.values())
+
+    @staticmethod
+    def bytes_per_segment():
+        return 8 * len(FLOAT_COLUMNS) + 4 * len(INT_COLUMNS)
+
+    # ------------------------------------------------------------
+    # Conversion and export
+    # ------------------------------------------------------------
+
+    def to_shapely(self):
+        """(N,) array of shapely LineStrings, built in one call."""
+        return shapely.linestrings(self.segments)
+
+    def to_multilinestring(self):
+        return shapely.multilinestrings(self.to_shapely())
+
+    def to_wkb(self, hex=False):
+        """(N,) array of WKB bytes (or hex strings), one per segment."""
+        return shapely.to_wkb(self.to_shapely(), hex=hex)
+
+    def to_geojson(self, path=None):
+        """
+        FeatureCollection with one LineString feature per segment and
+        depth/parent/stem as properties. Written to `path` if given.
+        """
+        coords = self.segments.tolist()
+        props = zip(self.depth.tolist(), self.parent.tolist(), self.stem.tolist())
+        collection = {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature",
+                 "geometry": {"type": "LineString", "coordinates": c},
+                 "properties": {"depth": d, "parent": p, "stem": s}}
+                for c, (d, p, s) in zip(coords, props)
+            ],
+        }
+        if path is not None:
+            with open(path, "w") as f:
+                json.dump(collection, f)
+        return collection
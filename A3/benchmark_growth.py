@@ -0,0 +1,88 @@
+"""
+Assignment 3: Tree Growth Benchmark
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Times the recursive fractal_tree_radial (one tree at a time, Rhino vectors
+and pipes per branch) against grow_forest_arrays (all trees level by level
+as arrays) for a forest of random tree bases, using the slider values of
+the headless runner. The array engine is timed on its own; with
+--materialize also with the Lines and instanced pipes the Grasshopper
+outputs need (slow headless, where every mesh vertex is a Python object).
+
+Usage:
+    python benchmark_growth.py [--trees 120] [--levels 6] [--recursive-trees 5] [--materialize]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import random
+import time
+import numpy as np
+
+import run_canopy
+
+
+# ----------------------------------------------------------------
+# Main
+# ----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recursive vs level-synchronous tree growth")
+    parser.add_argument("--trees", type=int, default=120)
+    parser.add_argument("--levels", type=int, default=6)
+    parser.add_argument("--recursive-trees", type=int, default=5,
+                        help="trees grown recursively; the time is scaled to --trees")
+    parser.add_argument("--materialize", action="store_true", help="also build Lines and pipes")
+    args = parser.parse_args(argv)
+
+    params = run_canopy.load_params()
+    ns = run_canopy.run(params)
+    rg = ns["rg"]
+
+    rng = np.random.default_rng(0)
+    bases = np.column_stack([rng.uniform(0, params["size_x"], args.trees),
+                             rng.uniform(0, params["size_y"], args.trees),
+                             np.zeros(args.trees)])
+    growth = dict(trunk_length=params["trunk_length"],
+                  first_level_min_branches=params["first_level_min_branches"],
+                  first_level_max_branches=params["first_level_max_branches"],
+                  first_level_angle_min=params["first_level_angle_min"],
+                  first_level_angle_max=params["first_level_angle_max"],
+                  levels=args.levels,
+                  min_branches=params["min_branches"],
+                  max_branches=params["max_branches"],
+                  length_factor=params["length_factor"],
+                  randomness=params["randomness"],
+                  trunk_radius=params["trunk_radius"])
+
+    random.seed(params["seed"])
+    t0 = time.perf_counter()
+    recursive = 0
+    for base in bases[:args.recursive_trees].tolist():
+        lines, _, _ = ns["fractal_tree_radial"](rg.Point3d(*base), **growth)
+        recursive += len(lines)
+    per_tree = (time.perf_counter() - t0) / args.recursive_trees
+
+    t0 = time.perf_counter()
+    starts, ends, radii, _, _ = ns["grow_forest_arrays"](bases, seed=params["seed"], **growth)
+    arrays = time.perf_counter() - t0
+
+    print("%d trees, %d levels: %d branches (recursive: %d for %d trees)"
+          % (args.trees, args.levels, len(starts), recursive, args.recursive_trees))
+    print("%-24s %10s" % ("method", "seconds"))
+    print("%-24s %10.2f   (estimated from %d trees)" % ("recursive", per_tree * args.trees,
+                                                        args.recursive_trees))
+    print("%-24s %10.4f" % ("arrays", arrays))
+
+    if args.materialize:
+        t0 = time.perf_counter()
+        lines = [rg.Line(rg.Point3d(*a), rg.Point3d(*b)) for a, b in zip(starts.tolist(), ends.tolist())]
+        ns["instanced_pipe_meshes"](lines, radii)
+        print("%-24s %10.4f" % ("arrays + lines/pipes", arrays + time.perf_counter() - t0))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Assignment 3: Pipe Instancing Benchmark
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Times three ways of meshing the branch pipes of parametric_canopy.py for a
+set of random branches:
+
+- per branch   mesh_pipe_from_line tessellating a new cylinder every time
+- instanced    copies of one unit pipe, each placed by a transform
+- merged       all pipes in one vertex/face buffer through one batched
+               matrix product (instance_pipes)
+
+The merged vertices are checked against the per-branch meshes. The script
+is loaded through the headless runner.
+
+Usage:
+    python benchmark_pipes.py [--branches 5000] [--sides 24]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import time
+import numpy as np
+
+import run_canopy
+
+
+# ----------------------------------------------------------------
+# Main
+# ----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Instanced vs per-branch pipe meshing")
+    parser.add_argument("--branches", type=int, default=5000)
+    parser.add_argument("--sides", type=int, default=24)
+    args = parser.parse_args(argv)
+
+    ns = run_canopy.run(run_canopy.load_params())
+    rg = ns["rg"]
+    # The script's functions read their flags from the module globals
+    script_globals = ns["mesh_pipe_from_line"].__globals__
+
+    # Random branches pointing mostly upwards, radii as after a few reductions
+    rng = np.random.default_rng(0)
+    starts = rng.uniform(0, 50, (args.branches, 3))
+    ends = starts + rng.normal(0, 1, (args.branches, 3)) * [2, 2, 1] + [0, 0, 3]
+    radii = 0.3 * 0.5 ** rng.integers(0, 4, args.branches)
+    lines = [rg.Line(rg.Point3d(*a), rg.Point3d(*b)) for a, b in zip(starts.tolist(), ends.tolist())]
+
+    timings = {}
+
+    script_globals["PIPE_INSTANCING"] = False
+    t0 = time.perf_counter()
+    reference = [ns["mesh_pipe_from_line"](l, r, args.sides) for l, r in zip(lines, radii.tolist())]
+    timings["per branch"] = time.perf_counter() - t0
+    script_globals["PIPE_INSTANCING"] = True
+
+    t0 = time.perf_counter()
+    ns["instanced_pipe_meshes"](lines, radii, args.sides)
+    timings["instanced"] = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    vertices, faces, _ = ns["instance_pipes"](starts, ends, radii, args.sides)
+    timings["merged"] = time.perf_counter() - t0
+
+    expected = np.array([(p.X, p.Y, p.Z) for m in reference for p in m.Vertices])
+    deviation = np.abs(vertices - expected).max()
+
+    print("%d branches, %d sides: %d vertices, %d faces (max deviation %.2g)"
+          % (args.branches, args.sides, len(vertices), len(faces), deviation))
+    print("%-12s %10s %10s" % ("method", "seconds", "speedup"))
+    for name, seconds in timings.items():
+        print("%-12s %10.4f %9.1fx" % (name, seconds, timings["per branch"] / seconds))
+
+
+if __name__ == "__main__":
+    main()
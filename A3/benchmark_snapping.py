@@ -0,0 +1,79 @@
+"""
+Assignment 3: Grid Snapping Benchmark
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Times snapping branch tips to the nearest canopy grid point with
+CanopyGridIndex (KD-tree and grid-window modes) against the linear scan of
+nearest_grid_point, on a 500 x 500 grid with 10^4 tips. Both come from
+parametric_canopy.py, loaded through the headless runner.
+
+The linear scan is far too slow to run for every tip, so it is timed on a
+sample of tips and extrapolated; the sampled results are checked against
+the grid-window index.
+
+Usage:
+    python benchmark_snapping.py [--grid 500] [--tips 10000] [--sample 5]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import time
+import numpy as np
+
+import run_canopy
+
+
+# ----------------------------------------------------------------
+# Main
+# ----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grid index vs linear nearest-point scan")
+    parser.add_argument("--grid", type=int, default=500)
+    parser.add_argument("--tips", type=int, default=10000)
+    parser.add_argument("--sample", type=int, default=5, help="tips timed with the linear scan")
+    args = parser.parse_args(argv)
+
+    params = run_canopy.load_params()
+    ns = run_canopy.run(params)
+    rg = ns["rg"]
+
+    # Canopy grid as in section 4, at the benchmark resolution
+    U, V = ns["uv_grid"](args.grid, args.grid)
+    H = ns["heightmap"](U, V, params["amplitude"], params["frequency"], params["phase"])
+    X, Y, Z = U * params["size_x"], V * params["size_y"], H + params["z_offset"]
+    flat_points = [rg.Point3d(x, y, z) for x, y, z in zip(X.ravel(), Y.ravel(), Z.ravel())]
+
+    # Tips scattered around the canopy
+    rng = np.random.default_rng(0)
+    tips = np.column_stack([rng.uniform(0, params["size_x"], args.tips),
+                            rng.uniform(0, params["size_y"], args.tips),
+                            rng.uniform(Z.min() - 3, Z.max() + 3, args.tips)])
+
+    timings = {}
+    for name, use_kdtree in (("KD-tree", True), ("grid window", False)):
+        t0 = time.perf_counter()
+        index = ns["CanopyGridIndex"](X, Y, Z, use_kdtree=use_kdtree)
+        build = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        nearest, dist = index.query(tips)
+        timings[name] = (build, time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    for k, tip in enumerate(tips[:args.sample]):
+        pt, d = ns["nearest_grid_point"](rg.Point3d(*tip), flat_points)
+        assert abs(d - dist[k]) < 1e-9 and pt == flat_points[nearest[k]]
+    scan = (time.perf_counter() - t0) / args.sample * args.tips
+
+    print("%d x %d grid, %d tips" % (args.grid, args.grid, args.tips))
+    print("%-18s %10s %10s %10s" % ("method", "build s", "query s", "speedup"))
+    for name, (build, query) in timings.items():
+        print("%-18s %10.4f %10.4f %9.0fx" % (name, build, query, scan / (build + query)))
+    print("%-18s %10s %10.1f   (estimated from %d tips)" % ("linear scan", "-", scan, args.sample))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Assignment 3: Config Flag Checks
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Runs parametric_canopy.py headless with a performance flag of section 2
+off and on, and compares the Grasshopper outputs of the two runs, so the
+old and new paths cannot drift apart unnoticed. Flags whose paths should
+agree must give the same outputs; the others are held to what they
+promise (see the check functions, listed in CHECKS).
+
+Each variant is a copy of the script with the flag line changed, run
+through the headless runner with random and np.random seeded from the
+"seed" input first, since the heightmap noise is drawn before the script
+seeds them itself. Exits with status 1 if a check fails.
+
+Usage:
+    python check_flags.py [--params params.json] [--set levels=3] [--only PIPE_INSTANCING]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import contextlib
+import io
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import numpy as np
+
+import headless_rhino
+import run_canopy
+
+# ----------------------------------------------------------------
+# Parameters
+# ----------------------------------------------------------------
+POINT_TOLERANCE = 0.1       # batched samples, as a fraction of the sample spacing
+CURVATURE_TOLERANCE = 0.1   # batched curvature, as a fraction of its range
+
+
+# ----------------------------------------------------------------
+# Variants
+# ----------------------------------------------------------------
+
+def write_variant(source, directory, **flags):
+    """Copy of the script source with the given section 2 flags set; returns its path."""
+    for name, value in sorted(flags.items()):
+        source, count = re.subn(r"^%s = \S+" % name, "%s = %r" % (name, value), source, flags=re.M)
+        if count != 1:
+            raise ValueError("flag %s not found in %s" % (name, run_canopy.CANOPY_SCRIPT))
+    tag = "_".join("%s_%s" % item for item in sorted(flags.items())) or "default"
+    path = os.path.join(directory, "canopy_%s.py" % tag)
+    with open(path, "w") as f:
+        f.write(source)
+    return path
+
+def run_variant(params, path, keep_cache=False):
+    """Runs one variant headless, quietly; sc.sticky is cleared first unless keep_cache."""
+    headless_rhino.install()
+    if not keep_cache:
+        sys.modules["scriptcontext"].sticky.clear()
+    random.seed(params["seed"])
+    np.random.seed(params["seed"])
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_canopy.run(params, path)
+
+
+# ----------------------------------------------------------------
+# Outputs as arrays
+# ----------------------------------------------------------------
+
+def points(values):
+    return np.array([(p.X, p.Y, p.Z) for p in values], dtype=float).reshape(-1, 3)
+
+def polylines(values):
+    return [None if q is None else points(q) for q in values]
+
+def lines(values):
+    return np.array([[(l.From.X, l.From.Y, l.From.Z), (l.To.X, l.To.Y, l.To.Z)]
+                     for l in values], dtype=float).reshape(-1, 2, 3)
+
+def colors(values):
+    return [None if c is None else (c.R, c.G, c.B) for c in values]
+
+def mesh_vertices(meshes):
+    return points([v for m in meshes if m is not None for v in m.Vertices])
+
+def mesh_face_count(meshes):
+    return sum(m.Faces.Count for m in meshes if m is not None)
+
+def outputs(ns):
+    """The Grasshopper outputs (section 7) in comparable form."""
+    return {
+        "b": points(ns["b"]),
+        "c": polylines(ns["c"]),
+        "d": polylines(ns["d"]),
+        "e": colors(ns["e"]),
+        "fractal_supports": lines(ns["fractal_supports"]),
+        "tree_meshes": mesh_vertices(ns["tree_meshes"]),
+        "tree_mesh_color": colors(ns["tree_mesh_color"] or []),
+    }
+
+def differences(old, new, tolerance=0.0):
+    """Names of the outputs that differ between two outputs() dicts."""
+    def same(a, b):
+        if isinstance(a, list):
+            return len(a) == len(b) and all(
+                (x is None and y is None) or (x is not None and y is not None and same(x, y))
+                for x, y in zip(a, b))
+        if isinstance(a, np.ndarray):
+            return a.shape == b.shape and (a.size == 0 or np.abs(a - b).max() <= tolerance)
+        return a == b
+    return [name for name in old if not same(old[name], new[name])]
+
+
+# ----------------------------------------------------------------
+# Checks, one per flag: (passed, detail)
+# ----------------------------------------------------------------
+
+def check_identical(params, source, tmp, flag, off, on, tolerance=0.0):
+    """Both settings of `flag` give the same outputs (arrays within `tolerance`)."""
+    old = outputs(run_variant(params, write_variant(source, tmp, **{flag: off})))
+    new = outputs(run_variant(params, write_variant(source, tmp, **{flag: on})))
+    diff = differences(old, new, tolerance)
+    return not diff, "outputs differ: %s" % ", ".join(diff) if diff else "same outputs"
+
+def check_batched_surface(params, source, tmp):
+    """
+    Heightmap samples instead of NURBS samples: points and curvature within
+    POINT_TOLERANCE and CURVATURE_TOLERANCE.
+    """
+    old = run_variant(params, write_variant(source, tmp, BATCHED_SURFACE_EVAL=False))
+    new = run_variant(params, write_variant(source, tmp, BATCHED_SURFACE_EVAL=True))
+    P0 = np.array([points(row) for row in old["pts"]])
+    P1 = np.array([points(row) for row in new["pts"]])
+    K0 = np.asarray(old["curvature_grid"], dtype=float)
+    K1 = np.asarray(new["curvature_grid"], dtype=float)
+    if P0.shape != P1.shape or K0.shape != K1.shape:
+        return False, "sample grids %s and %s" % (P0.shape, P1.shape)
+
+    spacing = min(params["size_x"] / max(params["divU"], 1), params["size_y"] / max(params["divV"], 1))
+    dP = np.abs(P1 - P0).max() / spacing
+    dK = np.abs(K1 - K0).max() / max(np.ptp(K0), 1e-12)
+    passed = dP <= POINT_TOLERANCE and dK <= CURVATURE_TOLERANCE
+    return passed, "points %.1f%% of spacing, curvature %.1f%% of range" % (100 * dP, 100 * dK)
+
+def check_cross_check(params, source, tmp):
+    """CROSS_CHECK_SAMPLES only reports, so the batched outputs stay the same."""
+    old = outputs(run_variant(params, write_variant(source, tmp, BATCHED_SURFACE_EVAL=True)))
+    new = outputs(run_variant(params, write_variant(source, tmp, BATCHED_SURFACE_EVAL=True,
+                                                    CROSS_CHECK_SAMPLES=16)))
+    diff = differences(old, new)
+    return not diff, "outputs differ: %s" % ", ".join(diff) if diff else "same outputs"
+
+def check_anchors(params, source, tmp):
+    """Other anchors by design: all local minima of Z, the lowest point among them."""
+    old = run_variant(params, write_variant(source, tmp, LOCAL_MINIMA_ANCHORS=False))
+    new = run_variant(params, write_variant(source, tmp, LOCAL_MINIMA_ANCHORS=True))
+    Z = new["Z"]
+    padded = np.pad(Z, 1, constant_values=np.inf)
+    rows, cols = Z.shape
+    lowest = np.min([padded[1 + di:1 + di + rows, 1 + dj:1 + dj + cols]
+                     for di in (-1, 0, 1) for dj in (-1, 0, 1)], axis=0)
+    local = {tuple(p) for p in np.column_stack([new["X"][Z <= lowest], new["Y"][Z <= lowest]]).tolist()}
+
+    anchors = points(new["anchors"])
+    strays = sum(tuple(p) not in local for p in anchors[:, :2].tolist())
+    if strays:
+        return False, "%d anchors are not local minima" % strays
+    if points(old["anchors"])[:, 2].min() != anchors[:, 2].min():
+        return False, "lowest point missing from the local minima"
+    return True, "%d anchors, all local minima, lowest point kept" % len(anchors)
+
+def check_merged_mesh(params, source, tmp):
+    """The merged mesh holds the vertices and faces of the separate branch pipes."""
+    ns = run_variant(params, write_variant(source, tmp, MERGED_TREE_MESH=True))
+    pipes = ns["all_trees_pipes"]
+    vertices, faces = ns["tree_mesh_buffers"][:2]
+    if len(vertices) != len(mesh_vertices(pipes)) or len(faces) != mesh_face_count(pipes):
+        return False, "%d vertices / %d faces, branch pipes have %d / %d" % (
+            len(vertices), len(faces), len(mesh_vertices(pipes)), mesh_face_count(pipes))
+    deviation = np.abs(np.asarray(vertices) - mesh_vertices(pipes)).max()
+    return deviation <= 1e-9, "%d vertices, max deviation %.2g" % (len(vertices), deviation)
+
+def check_growth(params, source, tmp):
+    """
+    Own random stream, so other trees: same trunks, and branch counts
+    within what the branching sliders allow.
+    """
+    old = run_variant(params, write_variant(source, tmp, VECTORIZED_GROWTH=False))
+    new = run_variant(params, write_variant(source, tmp, VECTORIZED_GROWTH=True))
+
+    def trunks(ns):
+        bases = {(p.X, p.Y, p.Z) for p in ns["treeBases"]}
+        return sorted(tuple(l.ravel()) for l in lines(ns["all_trees_lines"]) if tuple(l[0]) in bases)
+    if trunks(old) != trunks(new):
+        return False, "trunks differ"
+
+    # trunk + first-level branches, each with levels-1 generations below it
+    levels = int(params["levels"])
+    per_branch = [sum(b ** k for k in range(levels)) for b in (params["min_branches"], params["max_branches"])]
+    trees = len(new["treeBases"])
+    low = trees * (1 + params["first_level_min_branches"] * per_branch[0])
+    high = trees * (1 + params["first_level_max_branches"] * per_branch[1])
+    counts = [len(old["all_trees_lines"]), len(new["all_trees_lines"])]
+    passed = all(low <= n <= high for n in counts)
+    return passed, "same trunks, %d and %d branches (allowed %d-%d)" % (counts[0], counts[1], low, high)
+
+def check_stage_cache(params, source, tmp):
+    """A second cached run reuses every stage and matches an uncached run."""
+    uncached = outputs(run_variant(params, write_variant(source, tmp, STAGE_CACHE=False)))
+    path = write_variant(source, tmp, STAGE_CACHE=True)
+    run_variant(params, path)
+    ns = run_variant(params, path, keep_cache=True)
+    misses = [name for name, status, _ in ns["stage_cache"].log if status != "hit"]
+    diff = differences(uncached, outputs(ns))
+    if misses:
+        return False, "second run recomputed %s" % ", ".join(misses)
+    return not diff, "outputs differ: %s" % ", ".join(diff) if diff else "all stages reused, same outputs"
+
+CHECKS = {
+    "BATCHED_SURFACE_EVAL": check_batched_surface,
+    "CROSS_CHECK_SAMPLES": check_cross_check,
+    "BATCHED_SNAPPING": lambda p, s, t: check_identical(p, s, t, "BATCHED_SNAPPING", False, True),
+    "LOCAL_MINIMA_ANCHORS": check_anchors,
+    "ARRAY_PANELS": lambda p, s, t: check_identical(p, s, t, "ARRAY_PANELS", False, True),
+    "PIPE_INSTANCING": lambda p, s, t: check_identical(p, s, t, "PIPE_INSTANCING", False, True, 1e-9),
+    "MERGED_TREE_MESH": check_merged_mesh,
+    "VECTORIZED_GROWTH": check_growth,
+    "STAGE_CACHE": check_stage_cache,
+}
+
+
+# ----------------------------------------------------------------
+# Main
+# ----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the old and new path of each canopy flag")
+    parser.add_argument("--params", help="JSON file or JSON string with Grasshopper inputs")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="override one parameter (repeatable)")
+    parser.add_argument("--only", nargs="+", choices=sorted(CHECKS), help="run only these checks")
+    args = parser.parse_args(argv)
+
+    try:
+        params = run_canopy.load_params(args.params, args.set)
+    except ValueError as exc:
+        parser.error(str(exc))
+    with open(run_canopy.CANOPY_SCRIPT) as f:
+        source = f.read()
+
+    tmp = tempfile.mkdtemp(prefix="canopy_flags_")
+    failed = 0
+    try:
+        print("%-22s %-5s %s" % ("flag", "", "detail"))
+        for name in args.only or CHECKS:
+            passed, detail = CHECKS[name](params, source, tmp)
+            failed += not passed
+            print("%-22s %-5s %s" % (name, "ok" if passed else "FAIL", detail))
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
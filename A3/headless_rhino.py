@@ -0,0 +1,768 @@
+"""
+Assignment 3: Headless Rhino Backend
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Pure-Python/NumPy stand-ins for the parts of RhinoCommon, scriptcontext,
+ghpythonlib and System.Drawing that parametric_canopy.py uses, so the canopy
+pipeline can run (and be profiled) on plain Linux without Rhino.
+
+- Point3d, Vector3d, Line, Polyline, Plane, Circle, Cylinder, Interval,
+  Transform (rotations), with RhinoCommon names and semantics.
+- NurbsSurface.CreateThroughPoints fits a tensor-product B-spline surface
+  that interpolates the point grid (chord-length parameters, averaged
+  knots). PointAt and CurvatureAt evaluate it exactly; evaluate_grid does a
+  whole UV grid at once.
+- Mesh with vertex/face lists, CreateFromCylinder, normals and vertex colours.
+
+install() registers the stand-ins under the Rhino module names in
+sys.modules. It does nothing when the real Rhino modules are importable,
+unless forced.
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import math
+import sys
+import types
+import uuid
+import numpy as np
+
+# ----------------------------------------------------------------
+# Parameters
+# ----------------------------------------------------------------
+ZERO_TOLERANCE = 1e-12
+
+
+# ----------------------------------------------------------------
+# Points, vectors and transforms
+# ----------------------------------------------------------------
+
+class Point3d:
+    __slots__ = ("X", "Y", "Z")
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        if isinstance(x, (Point3d, Vector3d)):
+            x, y, z = x.X, x.Y, x.Z
+        self.X, self.Y, self.Z = float(x), float(y), float(z)
+
+    def __iter__(self):
+        return iter((self.X, self.Y, self.Z))
+
+    def __repr__(self):
+        return "Point3d(%g, %g, %g)" % (self.X, self.Y, self.Z)
+
+    def __eq__(self, other):
+        return isinstance(other, Point3d) and tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __add__(self, other):
+        return Point3d(self.X + other.X, self.Y + other.Y, self.Z + other.Z)
+
+    def __sub__(self, other):
+        if isinstance(other, Point3d):
+            return Vector3d(self.X - other.X, self.Y - other.Y, self.Z - other.Z)
+        return Point3d(self.X - other.X, self.Y - other.Y, self.Z - other.Z)
+
+    def __mul__(self, s):
+        return Point3d(self.X * s, self.Y * s, self.Z * s)
+
+    __rmul__ = __mul__
+
+    def DistanceTo(self, other):
+        return math.sqrt((self.X - other.X) ** 2 + (self.Y - other.Y) ** 2 + (self.Z - other.Z) ** 2)
+
+    def Transform(self, xform):
+        self.X, self.Y, self.Z = xform._apply(self.X, self.Y, self.Z, 1.0)
+        return True
+
+class Vector3d:
+    __slots__ = ("X", "Y", "Z")
+
+    def __init__(self, x=0.0, y=0.0, z=0.0):
+        if isinstance(x, (Point3d, Vector3d)):
+            x, y, z = x.X, x.Y, x.Z
+        self.X, self.Y, self.Z = float(x), float(y), float(z)
+
+    def __iter__(self):
+        return iter((self.X, self.Y, self.Z))
+
+    def __repr__(self):
+        return "Vector3d(%g, %g, %g)" % (self.X, self.Y, self.Z)
+
+    def __eq__(self, other):
+        return isinstance(other, Vector3d) and tuple(self) == tuple(other)
+
+    def __hash__(self):
+        return hash(tuple(self))
+
+    def __add__(self, other):
+        if isinstance(other, Point3d):
+            return Point3d(self.X + other.X, self.Y + other.Y, self.Z + other.Z)
+        return Vector3d(self.X + other.X, self.Y + other.Y, self.Z + other.Z)
+
+    def __sub__(self, other):
+        return Vector3d(self.X - other.X, self.Y - other.Y, self.Z - other.Z)
+
+    def __neg__(self):
+        return Vector3d(-self.X, -self.Y, -self.Z)
+
+    def __mul__(self, other):
+        # Vector * Vector is the dot product, as in RhinoCommon
+        if isinstance(other, Vector3d):
+            return self.X * other.X + self.Y * other.Y + self.Z * other.Z
+        return Vector3d(self.X * other, self.Y * other, self.Z * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, s):
+        return Vector3d(self.X / s, self.Y / s, self.Z / s)
+
+    @property
+    def Length(self):
+        return math.sqrt(self.X * self.X + self.Y * self.Y + self.Z * self.Z)
+
+    @property
+    def IsZero(self):
+        return self.X == 0 and self.Y == 0 and self.Z == 0
+
+    def Unitize(self):
+        length = self.Length
+        if length <= ZERO_TOLERANCE:
+            return False
+        self.X, self.Y, self.Z = self.X / length, self.Y / length, self.Z / length
+        return True
+
+    def Rotate(self, angle, axis):
+        """Rotates in place about `axis` (Rodrigues' formula)."""
+        k = Vector3d(axis)
+        if not k.Unitize():
+            return False
+        c, s = math.cos(angle), math.sin(angle)
+        dot = k.X * self.X + k.Y * self.Y + k.Z * self.Z
+        cx = k.Y * self.Z - k.Z * self.Y
+        cy = k.Z * self.X - k.X * self.Z
+        cz = k.X * self.Y - k.Y * self.X
+        self.X = self.X * c + cx * s + k.X * dot * (1 - c)
+        self.Y = self.Y * c + cy * s + k.Y * dot * (1 - c)
+        self.Z = self.Z * c + cz * s + k.Z * dot * (1 - c)
+        return True
+
+    def Transform(self, xform):
+        # Vectors ignore the translation part
+        self.X, self.Y, self.Z = xform._apply(self.X, self.Y, self.Z, 0.0)
+        return True
+
+    def PerpendicularTo(self, other):
+        """Sets this vector to one perpendicular to `other` (same rule as Rhino)."""
+        x, y, z = other
+        ax, ay, az = abs(x), abs(y), abs(z)
+        if ax <= ay and ax <= az:
+            self.X, self.Y, self.Z = 0.0, -z, y
+        elif ay <= az:
+            self.X, self.Y, self.Z = -z, 0.0, x
+        else:
+            self.X, self.Y, self.Z = -y, x, 0.0
+        return not self.IsZero
+
+    @staticmethod
+    def CrossProduct(a, b):
+        return Vector3d(a.Y * b.Z - a.Z * b.Y, a.Z * b.X - a.X * b.Z, a.X * b.Y - a.Y * b.X)
+
+    @staticmethod
+    def Multiply(a, b):
+        return a * b
+
+Vector3d.ZAxis = Vector3d(0, 0, 1)
+Vector3d.XAxis = Vector3d(1, 0, 0)
+Vector3d.YAxis = Vector3d(0, 1, 0)
+
+class Transform:
+    """4x4 affine transform."""
+
+    def __init__(self, matrix=None):
+        if matrix is None or np.ndim(matrix) == 0:
+            # Transform(d) is the diagonal transform, as in RhinoCommon
+            self.M = np.diag([1.0 if matrix is None else float(matrix)] * 3 + [1.0])
+        else:
+            self.M = np.asarray(matrix, dtype=np.float64)
+
+    def __getitem__(self, index):
+        return float(self.M[index])
+
+    def __setitem__(self, index, value):
+        self.M[index] = value
+
+    def _apply(self, x, y, z, w):
+        m = self.M.tolist()
+        return (m[0][0] * x + m[0][1] * y + m[0][2] * z + m[0][3] * w,
+                m[1][0] * x + m[1][1] * y + m[1][2] * z + m[1][3] * w,
+                m[2][0] * x + m[2][1] * y + m[2][2] * z + m[2][3] * w)
+
+    def __mul__(self, other):
+        return Transform(self.M @ other.M)
+
+    @staticmethod
+    def Identity():
+        return Transform()
+
+    @staticmethod
+    def Translation(v):
+        m = np.eye(4)
+        m[:3, 3] = tuple(v)
+        return Transform(m)
+
+    @staticmethod
+    def Scale(center, factor):
+        m = np.diag([factor, factor, factor, 1.0])
+        c = np.array(tuple(center))
+        m[:3, 3] = c - factor * c
+        return Transform(m)
+
+    @staticmethod
+    def Rotation(angle, axis, center):
+        """Rotation by `angle` radians about `axis` through `center`."""
+        k = np.array(tuple(axis), dtype=np.float64)
+        k /= np.linalg.norm(k)
+        K = np.array([[0, -k[2], k[1]], [k[2], 0, -k[0]], [-k[1], k[0], 0]])
+        R = np.eye(3) + math.sin(angle) * K + (1 - math.cos(angle)) * (K @ K)
+        m = np.eye(4)
+        m[:3, :3] = R
+        c = np.array(tuple(center), dtype=np.float64)
+        m[:3, 3] = c - R @ c
+        return Transform(m)
+
+
+# ----------------------------------------------------------------
+# Simple geometry
+# ----------------------------------------------------------------
+
+class Interval:
+    __slots__ = ("T0", "T1")
+
+    def __init__(self, t0, t1):
+        self.T0, self.T1 = float(t0), float(t1)
+
+    def __iter__(self):
+        return iter((self.T0, self.T1))
+
+    @property
+    def Length(self):
+        return self.T1 - self.T0
+
+    def ParameterAt(self, normalized):
+        return self.T0 + (self.T1 - self.T0) * normalized
+
+class Line:
+    __slots__ = ("From", "To")
+
+    def __init__(self, start, end):
+        self.From, self.To = Point3d(start), Point3d(end)
+
+    @property
+    def Length(self):
+        return self.From.DistanceTo(self.To)
+
+    @property
+    def Direction(self):
+        return self.To - self.From
+
+    def PointAt(self, t):
+        return self.From + self.Direction * t
+
+    def ToNurbsCurve(self):
+        return NurbsCurve(1, [self.From, self.To], [0.0, 0.0, 1.0, 1.0])
+
+class Polyline(list):
+    def __init__(self, points=()):
+        super().__init__(Point3d(p) for p in points)
+
+    @property
+    def Count(self):
+        return len(self)
+
+    @property
+    def IsClosed(self):
+        return len(self) > 2 and self[0] == self[-1]
+
+    @property
+    def Length(self):
+        return sum(a.DistanceTo(b) for a, b in zip(self, self[1:]))
+
+class Plane:
+    def __init__(self, origin, normal):
+        z = Vector3d(normal)
+        z.Unitize()
+        x = Vector3d()
+        x.PerpendicularTo(z)
+        x.Unitize()
+        self.Origin = Point3d(origin)
+        self.ZAxis = z
+        self.XAxis = x
+        self.YAxis = Vector3d.CrossProduct(z, x)
+
+class Circle:
+    def __init__(self, plane, radius):
+        self.Plane = plane
+        self.Radius = float(radius)
+
+class Cylinder:
+    def __init__(self, circle, height):
+        self.BasePlane = circle.Plane
+        self.Radius = circle.Radius
+        self.TotalHeight = float(height)
+
+class NurbsCurve:
+    """Minimal clamped B-spline curve (lines come out as degree 1)."""
+
+    def __init__(self, degree, points, knots):
+        self.Degree = degree
+        self.Points = [Point3d(p) for p in points]
+        self._knots = np.asarray(knots, dtype=np.float64)
+        self._ctrl = np.array([tuple(p) for p in self.Points])
+
+    @property
+    def Domain(self):
+        return Interval(self._knots[self.Degree], self._knots[-self.Degree - 1])
+
+    def PointAt(self, t):
+        basis = basis_functions(self._knots, self.Degree, np.atleast_1d(t))[0][0]
+        return Point3d(*(basis @ self._ctrl))
+
+    @property
+    def PointAtStart(self):
+        return Point3d(self.Points[0])
+
+    @property
+    def PointAtEnd(self):
+        return Point3d(self.Points[-1])
+
+
+# ----------------------------------------------------------------
+# B-spline basis
+# ----------------------------------------------------------------
+
+def basis_functions(knots, degree, t, derivatives=0):
+    """
+    Dense B-spline basis matrices for parameters t: a list of
+    derivatives + 1 arrays of shape (len(t), n), n = len(knots) - degree - 1.
+    """
+    knots = np.asarray(knots, dtype=np.float64)
+    t = np.asarray(t, dtype=np.float64)[:, None]
+    m = len(knots) - 1
+
+    # Degree 0, with the last parameter falling into the last non-empty span
+    N = ((knots[:-1] <= t) & (t < knots[1:])).astype(np.float64)
+    last = np.flatnonzero(knots[:-1] < knots[1:])[-1]
+    at_end = t[:, 0] >= knots[-1]
+    N[at_end] = 0.0
+    N[at_end, last] = 1.0
+
+    def ratio(a, b):
+        return np.divide(a, b, out=np.zeros(np.broadcast(a, b).shape), where=b != 0)
+
+    tables = [N]
+    for p in range(1, degree + 1):
+        prev = tables[-1]
+        i = np.arange(m - p)
+        left = ratio(t - knots[i], knots[i + p] - knots[i]) * prev[:, i]
+        right = ratio(knots[i + p + 1] - t, knots[i + p + 1] - knots[i + 1]) * prev[:, i + 1]
+        tables.append(left + right)
+
+    def derivative(p, k):
+        if k == 0:
+            return tables[p]
+        lower = derivative(p - 1, k - 1)
+        i = np.arange(m - p)
+        return p * (ratio(lower[:, i], knots[i + p] - knots[i])
+                    - ratio(lower[:, i + 1], knots[i + p + 1] - knots[i + 1]))
+
+    return [derivative(degree, k) if k <= degree else np.zeros_like(tables[degree])
+            for k in range(derivatives + 1)]
+
+def _interpolation_knots(params, degree):
+    """Clamped knot vector by averaging parameters (The NURBS Book, eq. 9.8)."""
+    n = len(params)
+    inner = [params[j:j + degree].mean() for j in range(1, n - degree)]
+    return np.concatenate([np.zeros(degree + 1), inner, np.ones(degree + 1)])
+
+def _chord_params(points, axis):
+    """Chord-length parameters averaged over all rows along `axis`."""
+    d = np.linalg.norm(np.diff(points, axis=axis), axis=-1)
+    total = d.sum(axis=axis, keepdims=True)
+    total[total == 0] = 1.0
+    steps = (d / total).mean(axis=1 - axis)
+    params = np.concatenate([[0.0], np.cumsum(steps)])
+    params[-1] = 1.0
+    return params
+
+
+# ----------------------------------------------------------------
+# NURBS surface
+# ----------------------------------------------------------------
+
+class SurfaceCurvature:
+    def __init__(self, point, normal, gaussian, mean):
+        self.Point = point
+        self.Normal = normal
+        self.Gaussian = gaussian
+        self.Mean = mean
+
+class NurbsSurface:
+    """
+    Non-rational B-spline surface. Control points are an (nu, nv, 3)
+    array; the domain is [0, 1] in both directions.
+    """
+
+    def __init__(self, control, knots_u, knots_v, degree_u, degree_v):
+        self.control = np.asarray(control, dtype=np.float64)
+        self.knots_u = np.asarray(knots_u, dtype=np.float64)
+        self.knots_v = np.asarray(knots_v, dtype=np.float64)
+        self.degree_u = degree_u
+        self.degree_v = degree_v
+
+    @staticmethod
+    def CreateThroughPoints(points, uCount, vCount, uDegree, vDegree, uClosed=False, vClosed=False):
+        """Interpolates a uCount x vCount grid of points (u-major order)."""
+        if uClosed or vClosed:
+            raise ValueError("closed surfaces are not supported headless")
+        grid = np.array([tuple(p) for p in points], dtype=np.float64).reshape(uCount, vCount, 3)
+        return NurbsSurface.through_grid(grid, uDegree, vDegree)
+
+    @staticmethod
+    def through_grid(grid, degree_u=3, degree_v=3):
+        """Interpolating surface through an (nu, nv, 3) array."""
+        nu, nv = grid.shape[:2]
+        degree_u = min(degree_u, nu - 1)
+        degree_v = min(degree_v, nv - 1)
+        pu = _chord_params(grid, 0)
+        pv = _chord_params(grid, 1)
+        knots_u = _interpolation_knots(pu, degree_u)
+        knots_v = _interpolation_knots(pv, degree_v)
+
+        # Solve the u direction, then the v direction
+        Au = basis_functions(knots_u, degree_u, pu)[0]
+        Av = basis_functions(knots_v, degree_v, pv)[0]
+        R = np.linalg.solve(Au, grid.reshape(nu, -1)).reshape(nu, nv, 3)
+        P = np.linalg.solve(Av, R.transpose(1, 0, 2).reshape(nv, -1)).reshape(nv, nu, 3)
+        return NurbsSurface(P.transpose(1, 0, 2), knots_u, knots_v, degree_u, degree_v)
+
+    def Domain(self, direction):
+        return Interval(0.0, 1.0)
+
+    def IsValid(self):
+        return True
+
+    # --- Batched evaluation ---
+    def evaluate_grid(self, u, v, derivatives=0):
+        """
+        Evaluates every (u_i, v_j) pair. Returns a dict of (len(u), len(v), 3)
+        arrays: "S", and with derivatives >= 1 "Su", "Sv", >= 2 "Suu", "Suv", "Svv".
+        """
+        Bu = basis_functions(self.knots_u, self.degree_u, np.atleast_1d(u), derivatives)
+        Bv = basis_functions(self.knots_v, self.degree_v, np.atleast_1d(v), derivatives)
+        names = {(0, 0): "S", (1, 0): "Su", (0, 1): "Sv", (2, 0): "Suu", (1, 1): "Suv", (0, 2): "Svv"}
+        out = {}
+        for (du, dv), name in names.items():
+            if du + dv <= derivatives:
+                out[name] = np.einsum("ai,ijc,bj->abc", Bu[du], self.control, Bv[dv], optimize=True)
+        return out
+
+    def curvature_grid(self, u, v):
+        """(Gaussian, mean) curvature arrays over the (u, v) grid."""
+        d = self.evaluate_grid(u, v, derivatives=2)
+        return fundamental_curvature(d["Su"], d["Sv"], d["Suu"], d["Suv"], d["Svv"])
+
+    # --- Rhino-style single point evaluation ---
+    def _local(self, u, v, derivatives):
+        """Derivatives at one (u, v) using only the non-zero basis window."""
+        Bu = basis_functions(self.knots_u, self.degree_u, [u], derivatives)
+        Bv = basis_functions(self.knots_v, self.degree_v, [v], derivatives)
+        iu = np.flatnonzero(np.any([b[0] != 0 for b in Bu], axis=0))
+        iv = np.flatnonzero(np.any([b[0] != 0 for b in Bv], axis=0))
+        P = self.control[iu[0]:iu[-1] + 1, iv[0]:iv[-1] + 1]
+        Bu = [b[0, iu[0]:iu[-1] + 1] for b in Bu]
+        Bv = [b[0, iv[0]:iv[-1] + 1] for b in Bv]
+        return lambda du, dv: np.einsum("i,ijc,j->c", Bu[du], P, Bv[dv])
+
+    def PointAt(self, u, v):
+        return Point3d(*self._local(u, v, 0)(0, 0))
+
+    def CurvatureAt(self, u, v):
+        d = self._local(u, v, 2)
+        S, Su, Sv = d(0, 0), d(1, 0), d(0, 1)
+        K, H = fundamental_curvature(Su, Sv, d(2, 0), d(1, 1), d(0, 2))
+        n = np.cross(Su, Sv)
+        norm = np.linalg.norm(n)
+        if norm <= ZERO_TOLERANCE:
+            return None
+        return SurfaceCurvature(Point3d(*S), Vector3d(*(n / norm)), float(K), float(H))
+
+def fundamental_curvature(Su, Sv, Suu, Suv, Svv):
+    """Gaussian and mean curvature from first and second derivatives (..., 3)."""
+    n = np.cross(Su, Sv)
+    norm = np.linalg.norm(n, axis=-1, keepdims=True)
+    n = n / np.where(norm > ZERO_TOLERANCE, norm, 1.0)
+    E = (Su * Su).sum(-1)
+    F = (Su * Sv).sum(-1)
+    G = (Sv * Sv).sum(-1)
+    L = (Suu * n).sum(-1)
+    M = (Suv * n).sum(-1)
+    N = (Svv * n).sum(-1)
+    det = E * G - F * F
+    det = np.where(np.abs(det) > ZERO_TOLERANCE, det, np.inf)
+    return (L * N - M * M) / det, (E * N + G * L - 2 * F * M) / (2 * det)
+
+
+# ----------------------------------------------------------------
+# Meshes
+# ----------------------------------------------------------------
+
+class _MeshList(list):
+    def SetColors(self, colors):
+        self[:] = list(colors)
+        return True
+
+class MeshVertexList(_MeshList):
+    def Add(self, x, y=None, z=None):
+        self.append(Point3d(x) if y is None else Point3d(x, y, z))
+        return len(self) - 1
+
+    @property
+    def Count(self):
+        return len(self)
+
+    def ToPoint3dArray(self):
+        return [Point3d(p) for p in self]
+
+class MeshFaceList(_MeshList):
+    def AddFace(self, a, b, c, d=None):
+        # Triangles repeat their last index, as in RhinoCommon
+        self.append((a, b, c, c if d is None else d))
+        return len(self) - 1
+
+    def ToIntArray(self, asTriangles):
+        if asTriangles:
+            return [i for a, b, c, d in self for i in ((a, b, c) if c == d else (a, b, c, a, c, d))]
+        return [i for face in self for i in face]
+
+    @property
+    def Count(self):
+        return len(self)
+
+class MeshVertexColorList(_MeshList):
+    def Add(self, color):
+        self.append(color)
+        return len(self) - 1
+
+class MeshNormalList(_MeshList):
+    def __init__(self, mesh):
+        super().__init__()
+        self._mesh = mesh
+
+    def ComputeNormals(self):
+        """Area-weighted vertex normals."""
+        v, f = self._mesh.to_arrays()[:2]
+        normals = np.zeros_like(v)
+        if len(f):
+            # Quads split into two triangles; degenerate halves of triangles add nothing
+            for a, b, c in ((0, 1, 2), (0, 2, 3)):
+                fn = np.cross(v[f[:, b]] - v[f[:, a]], v[f[:, c]] - v[f[:, a]])
+                for k in (a, b, c):
+                    np.add.at(normals, f[:, k], fn)
+        norm = np.linalg.norm(normals, axis=1, keepdims=True)
+        normals /= np.where(norm > 0, norm, 1.0)
+        self[:] = [Vector3d(*n) for n in normals.tolist()]
+        return True
+
+class Mesh:
+    def __init__(self):
+        self.Vertices = MeshVertexList()
+        self.Faces = MeshFaceList()
+        self.VertexColors = MeshVertexColorList()
+        self.Normals = MeshNormalList(self)
+
+    def Compact(self):
+        return True
+
+    def DuplicateMesh(self):
+        mesh = Mesh()
+        mesh.Vertices.extend(self.Vertices)
+        mesh.Faces.extend(self.Faces)
+        mesh.VertexColors.extend(self.VertexColors)
+        mesh.Normals.extend(self.Normals)
+        return mesh
+
+    def Transform(self, xform):
+        """Transforms the vertices; normals are recomputed if the mesh has them."""
+        v = self.to_arrays()[0]
+        v = v @ xform.M[:3, :3].T + xform.M[:3, 3]
+        self.Vertices[:] = [Point3d(*p) for p in v.tolist()]
+        if self.Normals:
+            self.Normals.ComputeNormals()
+        return True
+
+    def Append(self, other):
+        base = len(self.Vertices)
+        self.Vertices.extend(other.Vertices)
+        self.Faces.extend(tuple(i + base for i in face) for face in other.Faces)
+        self.VertexColors.extend(other.VertexColors)
+        self.Normals.extend(other.Normals)
+
+    def to_arrays(self):
+        """(vertices (V, 3) float, faces (F, 4) int, colors (V, 3) uint8 or None)."""
+        v = np.array([tuple(p) for p in self.Vertices], dtype=np.float64).reshape(-1, 3)
+        f = np.array(self.Faces, dtype=np.int64).reshape(-1, 4)
+        colors = None
+        if self.VertexColors:
+            colors = np.array([(c.R, c.G, c.B) for c in self.VertexColors], dtype=np.uint8)
+        return v, f, colors
+
+    @staticmethod
+    def from_arrays(vertices, faces, colors=None):
+        mesh = Mesh()
+        mesh.Vertices.extend(Point3d(*p) for p in np.asarray(vertices).tolist())
+        faces = np.asarray(faces).reshape(len(faces), -1)
+        if faces.shape[1] == 3:
+            faces = np.column_stack([faces, faces[:, 2]])
+        mesh.Faces.extend(map(tuple, faces.tolist()))
+        if colors is not None:
+            mesh.VertexColors.extend(Color.FromArgb(*c) for c in np.asarray(colors).tolist())
+        return mesh
+
+    @staticmethod
+    def CreateFromCylinder(cylinder, vertical, around):
+        """
+        Open (uncapped) cylinder mesh with `vertical` face rows along the axis
+        and `around` faces around it (at least 3).
+        """
+        around = max(3, int(around))
+        vertical = max(1, int(vertical))
+        plane = cylinder.BasePlane
+        o = np.array(tuple(plane.Origin))
+        x, y, z = (np.array(tuple(a)) for a in (plane.XAxis, plane.YAxis, plane.ZAxis))
+
+        phi = 2 * np.pi * np.arange(around) / around
+        ring = cylinder.Radius * (np.cos(phi)[:, None] * x + np.sin(phi)[:, None] * y)
+        h = np.linspace(0.0, cylinder.TotalHeight, vertical + 1)
+        vertices = (o + h[:, None, None] * z + ring[None]).reshape(-1, 3)
+
+        r, a = np.meshgrid(np.arange(vertical), np.arange(around), indexing="ij")
+        a2 = (a + 1) % around
+        faces = np.stack([r * around + a, r * around + a2,
+                          (r + 1) * around + a2, (r + 1) * around + a], axis=-1).reshape(-1, 4)
+        return Mesh.from_arrays(vertices, faces)
+
+
+# ----------------------------------------------------------------
+# System.Drawing
+# ----------------------------------------------------------------
+
+class Color:
+    __slots__ = ("A", "R", "G", "B")
+
+    def __init__(self, a, r, g, b):
+        self.A, self.R, self.G, self.B = int(a), int(r), int(g), int(b)
+
+    def __eq__(self, other):
+        return isinstance(other, Color) and (self.A, self.R, self.G, self.B) == (other.A, other.R, other.G, other.B)
+
+    def __hash__(self):
+        return hash((self.A, self.R, self.G, self.B))
+
+    def __repr__(self):
+        return "Color(A=%d, R=%d, G=%d, B=%d)" % (self.A, self.R, self.G, self.B)
+
+    @staticmethod
+    def FromArgb(*args):
+        if len(args) == 3:
+            return Color(255, *args)
+        return Color(*args)
+
+Color.Black = Color(255, 0, 0, 0)
+Color.White = Color(255, 255, 255, 255)
+
+
+# ----------------------------------------------------------------
+# scriptcontext and ghpythonlib
+# ----------------------------------------------------------------
+
+class _ObjectTable(list):
+    def _add(self, geometry):
+        self.append(geometry)
+        return uuid.uuid4()
+
+    AddSurface = AddMesh = AddCurve = AddLine = AddPoint = AddPolyline = _add
+
+class _Views:
+    def Redraw(self):
+        pass
+
+class _Doc:
+    def __init__(self):
+        self.Objects = _ObjectTable()
+        self.Views = _Views()
+
+def list_to_tree(nested, source=None):
+    """Nested lists stand in for a DataTree."""
+    return nested
+
+def tree_to_list(tree, retrieve_base=None):
+    return tree
+
+
+# ----------------------------------------------------------------
+# Module registration
+# ----------------------------------------------------------------
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+def build_modules():
+    """Stand-in modules keyed by their Rhino import names."""
+    geometry = _module(
+        "Rhino.Geometry",
+        Point3d=Point3d, Vector3d=Vector3d, Transform=Transform, Interval=Interval,
+        Line=Line, Polyline=Polyline, Plane=Plane, Circle=Circle, Cylinder=Cylinder,
+        NurbsCurve=NurbsCurve, NurbsSurface=NurbsSurface, SurfaceCurvature=SurfaceCurvature,
+        Mesh=Mesh,
+    )
+    components = _module("ghpythonlib.components")
+    treehelpers = _module("ghpythonlib.treehelpers", list_to_tree=list_to_tree, tree_to_list=tree_to_list)
+    drawing = _module("System.Drawing", Color=Color)
+    return {
+        "Rhino": _module("Rhino", Geometry=geometry),
+        "Rhino.Geometry": geometry,
+        "scriptcontext": _module("scriptcontext", doc=_Doc(), sticky={}),
+        "ghpythonlib": _module("ghpythonlib", components=components, treehelpers=treehelpers),
+        "ghpythonlib.components": components,
+        "ghpythonlib.treehelpers": treehelpers,
+        "System": _module("System", Drawing=drawing),
+        "System.Drawing": drawing,
+    }
+
+def rhino_available():
+    try:
+        import Rhino.Geometry  # noqa: F401
+    except ImportError:
+        return False
+    return not getattr(sys.modules.get("Rhino"), "__headless__", False)
+
+def install(force=False):
+    """
+    Registers the stand-ins in sys.modules unless the real Rhino is
+    importable (or force=True). Returns True if installed.
+    """
+    if getattr(sys.modules.get("Rhino"), "__headless__", False):
+        return True
+    if not force and rhino_available():
+        return False
+    modules = build_modules()
+    modules["Rhino"].__headless__ = True
+    sys.modules.update(modules)
+    return True
@@ -0,0 +1,146 @@
+"""
+Assignment 3: Mesh Export
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Writes a mesh given as arrays (vertices (V, 3), faces (F, 4) with triangles
+repeating their last index as in RhinoCommon, optional per-vertex uint8
+RGB) to binary PLY, OBJ or glTF (.gltf with an embedded buffer, or .glb).
+NumPy only, so large canopies can be exported without Rhino.
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import base64
+import json
+import os
+import struct
+import numpy as np
+
+
+# ----------------------------------------------------------------
+# Faces
+# ----------------------------------------------------------------
+
+def triangulate(faces):
+    """(T, 3) triangles: quads split along a-c, degenerate halves of triangles dropped."""
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 4)
+    quads = faces[faces[:, 2] != faces[:, 3]]
+    return np.vstack([faces[:, :3], quads[:, [0, 2, 3]]])
+
+
+# ----------------------------------------------------------------
+# Writers
+# ----------------------------------------------------------------
+
+def write_ply(path, vertices, faces, colors=None):
+    """Binary little-endian PLY with float32 positions and uchar colors."""
+    vertices = np.asarray(vertices, dtype=np.float64)
+    tris = triangulate(faces)
+
+    vertex_type = [("x", "<f4"), ("y", "<f4"), ("z", "<f4")]
+    if colors is not None:
+        vertex_type += [("red", "u1"), ("green", "u1"), ("blue", "u1")]
+    vertex_data = np.empty(len(vertices), dtype=vertex_type)
+    vertex_data["x"], vertex_data["y"], vertex_data["z"] = vertices.T
+    if colors is not None:
+        vertex_data["red"], vertex_data["green"], vertex_data["blue"] = np.asarray(colors, dtype=np.uint8).T
+
+    face_data = np.empty(len(tris), dtype=[("n", "u1"), ("i", "<i4", (3,))])
+    face_data["n"] = 3
+    face_data["i"] = tris
+
+    header = ["ply", "format binary_little_endian 1.0", "element vertex %d" % len(vertices)]
+    header += ["property float %s" % axis for axis in "xyz"]
+    if colors is not None:
+        header += ["property uchar %s" % c for c in ("red", "green", "blue")]
+    header += ["element face %d" % len(tris), "property list uchar int vertex_indices", "end_header"]
+
+    with open(path, "wb") as f:
+        f.write(("\n".join(header) + "\n").encode("ascii"))
+        f.write(vertex_data.tobytes())
+        f.write(face_data.tobytes())
+
+def write_obj(path, vertices, faces, colors=None):
+    """OBJ with quads kept; colors as the common 'v x y z r g b' extension."""
+    vertices = np.asarray(vertices, dtype=np.float64)
+    faces = np.asarray(faces, dtype=np.int64).reshape(-1, 4) + 1
+
+    if colors is None:
+        v_lines = ["v %.6f %.6f %.6f" % tuple(p) for p in vertices.tolist()]
+    else:
+        rgb = np.asarray(colors, dtype=np.float64) / 255.0
+        v_lines = ["v %.6f %.6f %.6f %.4f %.4f %.4f" % tuple(row)
+                   for row in np.hstack([vertices, rgb]).tolist()]
+    f_lines = ["f %d %d %d" % (a, b, c) if c == d else "f %d %d %d %d" % (a, b, c, d)
+               for a, b, c, d in faces.tolist()]
+
+    with open(path, "w") as f:
+        f.write("\n".join(v_lines + f_lines) + "\n")
+
+def write_gltf(path, vertices, faces, colors=None):
+    """glTF 2.0 triangle mesh; binary .glb, otherwise .gltf with an embedded buffer."""
+    positions = np.asarray(vertices, dtype=np.float32)
+    indices = triangulate(faces).astype(np.uint32).ravel()
+
+    # Buffer views: positions, indices, colors; each padded to 4 bytes
+    blobs = [positions.tobytes(), indices.tobytes()]
+    if colors is not None:
+        # RGBA, since vertex attributes have to be 4-byte aligned
+        rgb = np.asarray(colors, dtype=np.uint8)
+        blobs.append(np.hstack([rgb, np.full((len(rgb), 1), 255, np.uint8)]).tobytes())
+    views, offset = [], 0
+    for blob in blobs:
+        views.append({"buffer": 0, "byteOffset": offset, "byteLength": len(blob)})
+        offset += len(blob) + (-len(blob) % 4)
+    buffer = b"".join(blob + b"\0" * (-len(blob) % 4) for blob in blobs)
+    views[1]["target"] = 34963          # ELEMENT_ARRAY_BUFFER
+    for view in views[:1] + views[2:]:
+        view["target"] = 34962          # ARRAY_BUFFER
+
+    accessors = [
+        {"bufferView": 0, "componentType": 5126, "count": len(positions), "type": "VEC3",
+         "min": positions.min(axis=0).tolist(), "max": positions.max(axis=0).tolist()},
+        {"bufferView": 1, "componentType": 5125, "count": len(indices), "type": "SCALAR"},
+    ]
+    attributes = {"POSITION": 0}
+    if colors is not None:
+        accessors.append({"bufferView": 2, "componentType": 5121, "normalized": True,
+                          "count": len(positions), "type": "VEC4"})
+        attributes["COLOR_0"] = 2
+
+    gltf = {
+        "asset": {"version": "2.0", "generator": "ACD25 A3 mesh_export"},
+        "scene": 0,
+        "scenes": [{"nodes": [0]}],
+        # Rhino is Z-up, glTF is Y-up
+        "nodes": [{"mesh": 0, "rotation": [-0.7071067811865476, 0.0, 0.0, 0.7071067811865476]}],
+        "meshes": [{"primitives": [{"attributes": attributes, "indices": 1, "mode": 4}]}],
+        "accessors": accessors,
+        "bufferViews": views,
+        "buffers": [{"byteLength": len(buffer)}],
+    }
+
+    if path.lower().endswith(".glb"):
+        text = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+        text += b" " * (-len(text) % 4)
+        chunks = struct.pack("<II", len(text), 0x4E4F534A) + text
+        chunks += struct.pack("<II", len(buffer), 0x004E4942) + buffer
+        with open(path, "wb") as f:
+            f.write(struct.pack("<III", 0x46546C67, 2, 12 + len(chunks)))
+            f.write(chunks)
+    else:
+        gltf["buffers"][0]["uri"] = ("data:application/octet-stream;base64,"
+                                     + base64.b64encode(buffer).decode("ascii"))
+        with open(path, "w") as f:
+            json.dump(gltf, f)
+
+WRITERS = {".ply": write_ply, ".obj": write_obj, ".gltf": write_gltf, ".glb": write_gltf}
+
+def write_mesh(path, vertices, faces, colors=None):
+    """Picks the writer from the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in WRITERS:
+        raise ValueError("Unsupported mesh format %r (use %s)" % (ext, ", ".join(sorted(WRITERS))))
+    WRITERS[ext](path, vertices, faces, colors)
@@ -10,12 +10,15 @@ Date: November 2025
 
 # r: numpy
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 import random
 import Rhino.Geometry as rg
 import scriptcontext as sc
 import ghpythonlib.components as gh
 import ghpythonlib.treehelpers as th
 import math
+import hashlib
+import time
 import System.Drawing as SD
 
 # ------------------------------
@@ -34,6 +37,31 @@ RADIUS_REDUCTION = branch_reduction
 
 COLOR_BY_LEVEL = True
 
+BATCHED_SURFACE_EVAL = False    # 6.2 from the heightmap instead of PointAt/CurvatureAt per sample
+                                # (close to, not identical with, the NURBS samples)
+
+CROSS_CHECK_SAMPLES = 0         # > 0: compare that many samples with the NURBS surface
+
+BATCHED_SNAPPING = True         # snap each tree's last branches with one grid query
+
+LOCAL_MINIMA_ANCHORS = True     # anchors at local minima of Z instead of the globally lowest points
+
+ANCHOR_COUNT = 14               # anchors kept (most pronounced minima, or lowest points)
+
+ARRAY_PANELS = True             # 6.3-6.5 as array operations, Polylines built only for the outputs
+
+PIPE_INSTANCING = True          # branch pipes as transformed copies of one unit pipe, one batch per tree
+
+MERGED_TREE_MESH = False        # tree_meshes as one mesh with vertex colors, tree_mesh_color unused
+
+VECTORIZED_GROWTH = False       # all trees level by level as arrays (own random stream, so other trees)
+
+STAGE_CACHE = True              # reuse stage results from earlier runs while their inputs are unchanged
+
+STAGE_CACHE_KEY = "canopy_stage_cache"  # sc.sticky entry holding them
+
+STAGE_CACHE_REPORT = False      # print which stages were reused and their times
+
 
 # ------------------------------
 # 3. Helper functions
@@ -68,12 +96,85 @@ def heightmap(U, V, amplitude=1.0, frequency=2.0, phase=0.0, noise_strength=0.0)
     return H
 
 # Gets lowerst points of surface
-def lowest_points(points, count=4):
+def lowest_points(points, count=4, z=None):
     """
     Return the 'count' number of lowest Z-elevation points.
+    Same result as a stable sort by Z, but only partitions the Z array
+    (pass it as `z` if it already exists).
+    """
+    z = np.array([p.Z for p in points]) if z is None else np.asarray(z).ravel()
+    if count >= len(z):
+        order = np.argsort(z, kind="stable")
+    else:
+        # Everything below the count-th value, then ties in input order
+        kth = np.partition(z, count - 1)[count - 1]
+        below = np.flatnonzero(z < kth)
+        ties = np.flatnonzero(z == kth)[:count - len(below)]
+        chosen = np.concatenate([below, ties])
+        order = chosen[np.lexsort((chosen, z[chosen]))]
+    return [points[i] for i in order[:count].tolist()]
+
+# Local minima of the heightmap
+def _plateau_labels(Z, r=1):
+    """Per cell the smallest flat index of its plateau (equal Z, joined within r cells)."""
+    rows, cols = Z.shape
+    labels = np.arange(Z.size).reshape(rows, cols)
+    pairs = []
+    for di in range(-r, r + 1):
+        for dj in range(-r, r + 1):
+            if di or dj:
+                a = (slice(max(di, 0), rows + min(di, 0)), slice(max(dj, 0), cols + min(dj, 0)))
+                b = (slice(max(-di, 0), rows + min(-di, 0)), slice(max(-dj, 0), cols + min(-dj, 0)))
+                equal = Z[a] == Z[b]
+                if equal.any():
+                    pairs.append((a, b, equal))
+    changed = bool(pairs)
+    while changed:
+        before = labels.copy()
+        for a, b, equal in pairs:
+            labels[a] = np.where(equal, np.minimum(labels[a], labels[b]), labels[a])
+        # Labels are cells of the same plateau: jump to their labels
+        labels = labels.ravel()[labels]
+        changed = (labels != before).any()
+    return labels.ravel()
+
+def local_minima(Z, count=None, size=3):
+    """
+    Flat indices of the local minima of the Z grid (points no higher than
+    anything in their size x size neighbourhood; outside the grid counts as
+    higher) and their relief (highest neighbour minus Z), most pronounced
+    dip first: ranked by relief, equal relief by depth.
+    A plateau of equal Z is one minimum, and only if none of its cells has
+    a lower neighbour; its cell nearest the plateau's centre stands for it,
+    with the largest relief of its cells.
+    All windows are compared at once through a strided view of the padded grid.
     """
-    sorted_pts = sorted(points, key=lambda p: p.Z)
-    return sorted_pts[:count]
+    r = size // 2
+    z = Z.ravel()
+    lowest = sliding_window_view(np.pad(Z, r, constant_values=np.inf), (size, size)).min(axis=(2, 3))
+    highest = sliding_window_view(np.pad(Z, r, constant_values=-np.inf), (size, size)).max(axis=(2, 3))
+    is_min = z <= lowest.ravel()
+
+    plateau = _plateau_labels(Z, r)
+    drains = np.bincount(plateau, weights=~is_min, minlength=z.size) > 0
+    cells = np.flatnonzero(is_min & ~drains[plateau])
+    label = plateau[cells]
+
+    # One cell per plateau: the one nearest its centre (single cells are their own)
+    i, j = np.divmod(cells, Z.shape[1])
+    n = np.bincount(label, minlength=z.size)[label]
+    ci = np.bincount(label, weights=i, minlength=z.size)[label] / n
+    cj = np.bincount(label, weights=j, minlength=z.size)[label] / n
+    first = np.lexsort(((i - ci) ** 2 + (j - cj) ** 2, label))
+    first = first[np.r_[True, label[first][1:] != label[first][:-1]]]
+
+    relief = np.zeros(z.size)
+    np.maximum.at(relief, label, highest.ravel()[cells] - z[cells])
+    minima = cells[first]
+    relief = relief[label[first]]
+
+    order = np.lexsort((z[minima], -relief))[:count]
+    return minima[order], relief[order]
 
 # Culls trees in close poximity
 def cull_by_distance(points, min_dist):
@@ -88,6 +189,35 @@ def cull_by_distance(points, min_dist):
             culled.append(p)
     return culled
 
+def cull_by_distance_hashed(points, min_dist):
+    """
+    Same greedy result as cull_by_distance, in near-linear time: accepted
+    points are kept in a spatial hash with cell size min_dist, so each
+    candidate is only compared with accepted points in the 27 cells around it.
+    """
+    if min_dist <= 0:
+        return list(points)
+    cells = {}
+    culled = []
+    for p in points:
+        key = (math.floor(p.X / min_dist), math.floor(p.Y / min_dist), math.floor(p.Z / min_dist))
+        too_close = False
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    for c in cells.get((key[0] + dx, key[1] + dy, key[2] + dz), ()):
+                        if p.DistanceTo(c) < min_dist:
+                            too_close = True
+                            break
+                    if too_close:
+                        break
+                if too_close:
+                    break
+        if not too_close:
+            culled.append(p)
+            cells.setdefault(key, []).append(p)
+    return culled
+
 # Connects branches to canopy
 def nearest_grid_point(pt, grid_points):
     """ Returns (closest_point, distance)"""
@@ -100,6 +230,70 @@ def nearest_grid_point(pt, grid_points):
             best_dist = d
     return best, best_dist
 
+# Spatial index over the regular canopy grid
+class CanopyGridIndex:
+    """
+    Nearest-grid-point queries for many points at once.
+
+    With scipy available, a cKDTree over the grid is built once. Without
+    it, each point is projected onto the regular XY grid; the distance to
+    that grid point bounds how far away (in cells) a closer one can be, and
+    only that window is searched, with the same tie-breaking as
+    nearest_grid_point (first in flat_points order). Both are exact.
+    """
+
+    CANDIDATE_BUDGET = 1 << 22  # (point, candidate) pairs tested per chunk
+
+    def __init__(self, X, Y, Z, use_kdtree=None, tree=None):
+        self.P = np.stack([X, Y, Z], axis=-1).reshape(-1, 3)
+        self.tree = tree    # a cKDTree built earlier for the same grid
+        if tree is None and use_kdtree is not False:
+            try:
+                from scipy.spatial import cKDTree
+                self.tree = cKDTree(self.P)
+            except ImportError:
+                if use_kdtree:
+                    raise
+        self.rows, self.cols = X.shape
+        self.x0, self.y0 = X[0, 0], Y[0, 0]
+        self.dx = X[0, 1] - X[0, 0] if self.cols > 1 else np.inf
+        self.dy = Y[1, 0] - Y[0, 0] if self.rows > 1 else np.inf
+
+    def query(self, points):
+        """Returns (flat indices, distances) of the nearest grid points."""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if self.tree is not None:
+            d, best = self.tree.query(points)
+            return best, d
+
+        j = np.clip(np.rint((points[:, 0] - self.x0) / self.dx), 0, self.cols - 1).astype(int)
+        i = np.clip(np.rint((points[:, 1] - self.y0) / self.dy), 0, self.rows - 1).astype(int)
+        best = i * self.cols + j
+        d2 = ((points - self.P[best]) ** 2).sum(axis=1)
+
+        # A closer grid point lies within sqrt(d2) in XY: search that many cells around
+        reach = np.sqrt(d2)
+        ri = np.minimum(np.ceil(reach / self.dy), self.rows - 1).astype(int)
+        rj = np.minimum(np.ceil(reach / self.dx), self.cols - 1).astype(int)
+        for radius_i, radius_j in np.unique(np.column_stack([ri, rj]), axis=0):
+            sel = np.flatnonzero((ri == radius_i) & (rj == radius_j))
+            di, dj = np.meshgrid(np.arange(-radius_i, radius_i + 1),
+                                 np.arange(-radius_j, radius_j + 1), indexing="ij")
+            di, dj = di.ravel(), dj.ravel()
+            chunk = max(1, self.CANDIDATE_BUDGET // len(di))
+            for s in range(0, len(sel), chunk):
+                part = sel[s:s + chunk]
+                ii = i[part, None] + di
+                jj = j[part, None] + dj
+                inside = (ii >= 0) & (ii < self.rows) & (jj >= 0) & (jj < self.cols)
+                cand = np.where(inside, ii * self.cols + jj, 0)
+                cd2 = ((points[part, None, :] - self.P[cand]) ** 2).sum(axis=-1)
+                cd2[~inside] = np.inf
+                k = cd2.argmin(axis=1)
+                best[part] = cand[np.arange(len(part)), k]
+                d2[part] = cd2[np.arange(len(part)), k]
+        return best, np.sqrt(d2)
+
 def mesh_pipe_from_line(line, radius, sides=24):
     """
     Creates a cylindrical mesh around a line.
@@ -108,6 +302,9 @@ def mesh_pipe_from_line(line, radius, sides=24):
     if line.Length == 0:
         return None
 
+    if PIPE_INSTANCING:
+        return instanced_pipe_meshes([line], [radius], sides)[0]
+
     from_pt = line.From
     to_pt = line.To
 
@@ -206,8 +403,97 @@ def quad_mesh_from_points(pts):
     mesh.Compact()
     return mesh
 
+# ------------------------------------ #
+# 3.2 Batched Surface Evaluation       #
+# ------------------------------------ #
+
+def heightmap_derivatives(U, V, amplitude=1.0, frequency=2.0, phase=0.0):
+    """Analytic H, H_u, H_v, H_uu, H_uv, H_vv of the sin*cos heightmap."""
+    w = 2 * np.pi * frequency
+    sa, ca = np.sin(w * U + phase), np.cos(w * U + phase)
+    sb, cb = np.sin(w * V + phase), np.cos(w * V + phase)
+    H = amplitude * sa * cb
+    return (H,
+            amplitude * w * ca * cb,
+            -amplitude * w * sa * sb,
+            -amplitude * w * w * sa * cb,
+            -amplitude * w * w * ca * sb,
+            -amplitude * w * w * sa * cb)
+
+def graph_curvature(zx, zy, zxx, zxy, zyy):
+    """Gaussian curvature of the graph z(x, y)."""
+    return (zxx * zyy - zxy * zxy) / (1 + zx * zx + zy * zy) ** 2
+
+def surface_grid_analytic(rows, cols, size_x, size_y, z_offset, amplitude, frequency, phase):
+    """
+    Points and Gaussian curvature of the canopy on a rows x cols sample grid
+    in one go. Rows run along Y (heightmap V) and columns along X, like the
+    NURBS surface built through flat_points.
+    """
+    V = np.linspace(0.0, 1.0, rows)[:, None]
+    U = np.linspace(0.0, 1.0, cols)[None, :]
+    H, Hu, Hv, Huu, Huv, Hvv = heightmap_derivatives(U, V, amplitude, frequency, phase)
+
+    P = np.empty((rows, cols, 3))
+    P[..., 0] = U * size_x
+    P[..., 1] = V * size_y
+    P[..., 2] = H + z_offset
+    K = graph_curvature(Hu / size_x, Hv / size_y,
+                        Huu / size_x ** 2, Huv / (size_x * size_y), Hvv / size_y ** 2)
+    return P, K
+
+def _resample(A, rows, cols):
+    """Bilinear resampling of a 2D array onto a rows x cols grid."""
+    fi = np.linspace(0, A.shape[0] - 1, rows)
+    fj = np.linspace(0, A.shape[1] - 1, cols)
+    i0 = np.minimum(fi.astype(int), A.shape[0] - 2)
+    j0 = np.minimum(fj.astype(int), A.shape[1] - 2)
+    ti = (fi - i0)[:, None]
+    tj = (fj - j0)[None, :]
+    a, b = A[i0][:, j0], A[i0][:, j0 + 1]
+    c, d = A[i0 + 1][:, j0], A[i0 + 1][:, j0 + 1]
+    return (a * (1 - tj) + b * tj) * (1 - ti) + (c * (1 - tj) + d * tj) * ti
+
+def surface_grid_finite(X, Y, Z, rows, cols):
+    """
+    Same as surface_grid_analytic for heightmaps without a closed form
+    (noise): second-order finite differences on the sampled Z grid, then
+    resampled onto the rows x cols grid. Z needs at least 2 x 2 samples;
+    below 3 along an axis the differences are first order.
+    """
+    if min(Z.shape) < 2:
+        raise ValueError("heightmap of shape %s is too small for finite differences" % (Z.shape,))
+    edge_order = 2 if min(Z.shape) > 2 else 1
+    dy = Y[1, 0] - Y[0, 0]
+    dx = X[0, 1] - X[0, 0]
+    zy, zx = np.gradient(Z, dy, dx, edge_order=edge_order)
+    zyy, zyx = np.gradient(zy, dy, dx, edge_order=edge_order)
+    zxy, zxx = np.gradient(zx, dy, dx, edge_order=edge_order)
+    K = graph_curvature(zx, zy, zxx, 0.5 * (zxy + zyx), zyy)
+
+    P = np.empty((rows, cols, 3))
+    P[..., 0] = np.linspace(X[0, 0], X[0, -1], cols)[None, :]
+    P[..., 1] = np.linspace(Y[0, 0], Y[-1, 0], rows)[:, None]
+    P[..., 2] = _resample(Z, rows, cols)
+    return P, _resample(K, rows, cols)
+
+def check_against_surface(surface, P, K, samples=32):
+    """Largest point and curvature deviation from the NURBS surface at random samples."""
+    rows, cols = K.shape
+    u0, u1 = surface.Domain(0)
+    v0, v1 = surface.Domain(1)
+    rng = np.random.default_rng(0)
+    dist, dK = 0.0, 0.0
+    for i, j in zip(rng.integers(0, rows, samples), rng.integers(0, cols, samples)):
+        u = u0 + (u1 - u0) * i / float(rows - 1)
+        v = v0 + (v1 - v0) * j / float(cols - 1)
+        dist = max(dist, surface.PointAt(u, v).DistanceTo(rg.Point3d(*P[i, j])))
+        curv = surface.CurvatureAt(u, v)
+        dK = max(dK, abs((curv.Gaussian if curv else 0.0) - K[i, j]))
+    return dist, dK
+
 # ------
-# 3.2 Panels
+# 3.3 Panels
 # ----
 
 import System.Drawing as SD
@@ -244,6 +530,271 @@ def map_K_to_color(K, K_min, K_max):
 
     return SD.Color.FromArgb(r, g, b)
 
+def panel_curvature(K):
+    """Average corner curvature of every quad of a (rows, cols) grid, row-major."""
+    return ((K[:-1, :-1] + K[1:, :-1] + K[1:, 1:] + K[:-1, 1:]) / 4.0).ravel()
+
+def opening_factors(panel_K, K_min, K_max):
+    """map_curvature_to_opening for an array of panel curvatures."""
+    if K_max == K_min:
+        return np.zeros_like(panel_K)
+    return (panel_K - K_min) / (K_max - K_min)
+
+def panel_quads(P, t):
+    """
+    (N, 4, 3) corner arrays of the quads of a (rows, cols, 3) point grid,
+    in the order p1, p2, p3, p4 of section 6.4, and of the quads inset
+    towards their centers by t.
+    """
+    p1, p2, p3, p4 = P[:-1, :-1], P[1:, :-1], P[1:, 1:], P[:-1, 1:]
+    base = np.stack([p1, p2, p3, p4], axis=2).reshape(-1, 4, 3)
+    center = ((p1 + p2 + p3 + p4) / 4).reshape(-1, 1, 3)
+    inset = base + (center - base) * np.reshape(t, (-1, 1, 1))
+    return base, inset
+
+def K_colors(panel_K, K_min, K_max):
+    """map_K_to_color for an array of panel curvatures, as (N, 3) uint8 RGB."""
+    if K_max == K_min:
+        t = np.zeros_like(panel_K)
+    else:
+        t = (panel_K - K_min) / float(K_max - K_min)
+
+    f = np.where(t < 0.5, t * 2.0, (t - 0.5) * 2.0)[:, None]
+    blue_yellow = np.hstack([f * 255, f * 255, 255 - f * 255])
+    yellow_red = np.hstack([np.full_like(f, 255), 255 - f * 255, np.zeros_like(f)])
+    return np.where((t < 0.5)[:, None], blue_yellow, yellow_red).astype(np.uint8)
+
+def quad_corner_indices(rows, cols):
+    """(N, 4) row-major indices of the p1, p2, p3, p4 corners of every quad."""
+    a = (np.arange(rows - 1)[:, None] * cols + np.arange(cols - 1)).ravel()
+    return np.column_stack([a, a + cols, a + cols + 1, a + 1])
+
+def polylines_from_grid(points, rows, cols):
+    """Closed quad rg.Polylines through a row-major list of existing grid points."""
+    return [rg.Polyline([points[a], points[b], points[c], points[d], points[a]])
+            for a, b, c, d in quad_corner_indices(rows, cols).tolist()]
+
+def polylines_from_quads(quads, mask):
+    """Closed rg.Polylines from (N, 4, 3) corners where mask is True, None elsewhere."""
+    polylines = [None] * len(quads)
+    keep = np.flatnonzero(mask)
+    for k, quad in zip(keep.tolist(), quads[keep].tolist()):
+        corners = [rg.Point3d(*p) for p in quad]
+        polylines[k] = rg.Polyline(corners + corners[:1])
+    return polylines
+
+# ------------------------------------ #
+# 3.4 Pipe Instancing                  #
+# ------------------------------------ #
+
+_UNIT_PIPES = {}
+
+def unit_pipe(sides=24):
+    """
+    Pipe of radius 1 and height 1 along Z, tessellated as in
+    mesh_pipe_from_line. Built once per `sides`; returns the mesh, its
+    vertices (V, 3), faces (F, 4) and the axes of its base plane as rows.
+    """
+    if sides not in _UNIT_PIPES:
+        plane = rg.Plane(rg.Point3d(0, 0, 0), rg.Vector3d(0, 0, 1))
+        mesh = rg.Mesh.CreateFromCylinder(rg.Cylinder(rg.Circle(plane, 1.0), 1.0), sides, 1)
+        mesh.Normals.ComputeNormals()
+        mesh.Compact()
+
+        vertices = np.array([(p.X, p.Y, p.Z) for p in mesh.Vertices.ToPoint3dArray()])
+        faces = np.array(mesh.Faces.ToIntArray(False)).reshape(-1, 4)
+        axes = np.array([(a.X, a.Y, a.Z) for a in (plane.XAxis, plane.YAxis, plane.ZAxis)])
+        _UNIT_PIPES[sides] = (mesh, vertices, faces, axes)
+    return _UNIT_PIPES[sides]
+
+def perpendicular_to(v):
+    """Vector3d.PerpendicularTo for an (N, 3) array."""
+    x, y, z = v[:, 0], v[:, 1], v[:, 2]
+    ax, ay, az = np.abs(v).T
+    zero = np.zeros_like(x)
+    first = (ax <= ay) & (ax <= az)
+    second = ~first & (ay <= az)
+    return np.where(first[:, None], np.column_stack([zero, -z, y]),
+                    np.where(second[:, None], np.column_stack([-z, zero, x]),
+                             np.column_stack([-y, x, zero])))
+
+def pipe_frames(starts, ends, radii, axes):
+    """
+    (N, 4, 4) transforms taking the unit pipe (base plane `axes`) onto pipes
+    of `radii` from `starts` to `ends`. Branch planes get their X axis like
+    rg.Plane(origin, normal), so vertices land where mesh_pipe_from_line
+    puts them. Lines must have non-zero length.
+    """
+    d = ends - starts
+    length = np.linalg.norm(d, axis=1)
+    z = d / length[:, None]
+    x = perpendicular_to(z)
+    x /= np.linalg.norm(x, axis=1, keepdims=True)
+    y = np.cross(z, x)
+
+    r = np.asarray(radii, dtype=float)[:, None]
+    scaled = np.stack([x * r, y * r, z * length[:, None]], axis=2)
+
+    M = np.zeros((len(d), 4, 4))
+    M[:, :3, :3] = scaled @ axes
+    M[:, :3, 3] = starts
+    M[:, 3, 3] = 1.0
+    return M
+
+def line_arrays(lines):
+    """(N, 3) start and end points of rg.Lines."""
+    starts = np.array([(l.From.X, l.From.Y, l.From.Z) for l in lines], dtype=float).reshape(-1, 3)
+    ends = np.array([(l.To.X, l.To.Y, l.To.Z) for l in lines], dtype=float).reshape(-1, 3)
+    return starts, ends
+
+def instance_pipes(starts, ends, radii, sides=24):
+    """
+    All pipes merged into one buffer: the unit pipe vertices go through
+    every frame in a single batched matrix product. Returns vertices
+    (N*V, 3), faces (N*F, 4) and the pipe index of each vertex.
+    """
+    _, vertices, faces, axes = unit_pipe(sides)
+    M = pipe_frames(starts, ends, radii, axes)
+    placed = vertices @ M[:, :3, :3].transpose(0, 2, 1) + M[:, None, :3, 3]
+
+    offsets = np.arange(len(M)) * len(vertices)
+    all_faces = (faces[None] + offsets[:, None, None]).reshape(-1, 4)
+    return placed.reshape(-1, 3), all_faces, np.repeat(np.arange(len(M)), len(vertices))
+
+def instanced_pipe_meshes(lines, radii, sides=24):
+    """
+    mesh_pipe_from_line for many lines: one copy of the unit pipe per line,
+    placed by a single transform. None for zero-length lines.
+    """
+    unit, _, _, axes = unit_pipe(sides)
+    starts, ends = line_arrays(lines)
+    keep = np.flatnonzero(np.linalg.norm(ends - starts, axis=1) > 0)
+    frames = pipe_frames(starts[keep], ends[keep], np.asarray(radii, dtype=float)[keep], axes)
+
+    meshes = [None] * len(lines)
+    for k, M in zip(keep.tolist(), frames.tolist()):
+        xform = rg.Transform(1.0)
+        for i in range(3):
+            for j in range(4):
+                xform[i, j] = M[i][j]
+        mesh = unit.DuplicateMesh()
+        mesh.Transform(xform)
+        meshes[k] = mesh
+    return meshes
+
+# ------------------------------------ #
+# 3.5 Merged Tree Mesh                 #
+# ------------------------------------ #
+
+def merge_branch_meshes(meshes, colors):
+    """
+    All branch pipes in one buffer, preallocated from the per-branch counts.
+    Returns vertices (V, 3), faces (F, 4) with vertex offsets applied and
+    per-vertex uint8 RGB from each branch's color. None meshes are skipped.
+    """
+    kept = [(m, c) for m, c in zip(meshes, colors) if m is not None]
+    v_start = np.cumsum([0] + [m.Vertices.Count for m, _ in kept])
+    f_start = np.cumsum([0] + [m.Faces.Count for m, _ in kept])
+
+    vertices = np.empty((v_start[-1], 3))
+    faces = np.empty((f_start[-1], 4), dtype=np.int64)
+    rgb = np.empty((v_start[-1], 3), dtype=np.uint8)
+
+    for k, (mesh, color) in enumerate(kept):
+        v0, v1 = v_start[k], v_start[k + 1]
+        vertices[v0:v1] = [(p.X, p.Y, p.Z) for p in mesh.Vertices.ToPoint3dArray()]
+        faces[f_start[k]:f_start[k + 1]] = np.reshape(mesh.Faces.ToIntArray(False), (-1, 4)) + v0
+        rgb[v0:v1] = (color.R, color.G, color.B)
+
+    return vertices, faces, rgb
+
+def merge_pipe_arrays(starts, ends, radii, levels, sides=24):
+    """
+    merge_branch_meshes straight from branch arrays: the pipes are placed
+    with instance_pipes and colored per vertex with color_for_level.
+    """
+    keep = np.linalg.norm(ends - starts, axis=1) > 0
+    vertices, faces, owner = instance_pipes(starts[keep], ends[keep], radii[keep], sides)
+    palette = [color_for_level(k) for k in range(int(levels.max()) + 1)]
+    level_rgb = np.array([(c.R, c.G, c.B) for c in palette], dtype=np.uint8)
+    return vertices, faces, level_rgb[levels[keep][owner]]
+
+def mesh_from_buffers(vertices, faces, rgb=None):
+    """Single rg.Mesh from vertex/face arrays, with per-vertex colors."""
+    mesh = rg.Mesh()
+    for x, y, z in vertices.tolist():
+        mesh.Vertices.Add(x, y, z)
+    for a, b, c, d in faces.tolist():
+        mesh.Faces.AddFace(a, b, c, d)
+    if rgb is not None:
+        mesh.VertexColors.SetColors([SD.Color.FromArgb(r, g, b) for r, g, b in rgb.tolist()])
+    mesh.Normals.ComputeNormals()
+    mesh.Compact()
+    return mesh
+
+# ------------------------------------ #
+# 3.6 Stage Cache                      #
+# ------------------------------------ #
+
+def script_source():
+    """Text of this script: the GhPython component's code, or the file run headless."""
+    try:
+        return ghenv.Component.Code
+    except NameError:
+        with open(__file__) as f:
+            return f.read()
+
+def input_hash(value, h=None):
+    """SHA-1 of nested tuples/lists of numbers, strings and arrays."""
+    h = hashlib.sha1() if h is None else h
+    if isinstance(value, np.ndarray):
+        h.update(repr((value.dtype.str, value.shape)).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, (tuple, list)):
+        h.update(b"(")
+        for item in value:
+            input_hash(item, h)
+        h.update(b")")
+    else:
+        h.update(repr(value).encode())
+        h.update(b",")
+    return h.hexdigest()
+
+class StageCache:
+    """
+    Results of the pipeline stages, kept in `store` (sc.sticky between
+    Grasshopper runs) and reused while a stage's key is unchanged. The key
+    hashes the script source, the stage's inputs and the keys of the stages
+    it runs after, so a changed slider only reruns the stages downstream of
+    it and any edit to the script reruns them all.
+    """
+
+    def __init__(self, store, source=""):
+        self.store = store
+        self.version = input_hash(source)
+        self.keys = {}
+        self.log = []   # (stage, "hit" or "miss", seconds)
+
+    def run(self, name, inputs, compute, after=()):
+        key = input_hash((self.version, inputs, [self.keys[stage] for stage in after]))
+        self.keys[name] = key
+
+        t0 = time.perf_counter()
+        cached = self.store.get(name)
+        if cached is not None and cached[0] == key:
+            value, status = cached[1], "hit"
+        else:
+            value, status = compute(), "miss"
+            self.store[name] = (key, value)
+        self.log.append((name, status, time.perf_counter() - t0))
+        return value
+
+    def report(self):
+        hits = sum(status == "hit" for _, status, _ in self.log)
+        lines = ["Stage cache: %d of %d stages reused" % (hits, len(self.log))]
+        lines += ["  %-14s %-4s %8.4f s" % entry for entry in self.log]
+        return "\n".join(lines)
+
 # ------------------------------ #
 # 4. Grid, Heightmap and Surface #
 # ------------------------------ #
@@ -251,32 +802,52 @@ def map_K_to_color(K, K_min, K_max):
 divU = int(divU)
 divV = int(divV)
 
-# UV grid and heightmap
-U, V = uv_grid(divU, divV)
-H = heightmap(
-    U, V,
-    amplitude=amplitude,
-    frequency=frequency,
-    phase=phase,
-    noise_strength=noise_strength
-)
+# Stage results kept between runs (see 3.6)
+stage_cache = StageCache(sc.sticky.setdefault(STAGE_CACHE_KEY, {}) if STAGE_CACHE else {}, script_source())
+
+def heightmap_stage():
+    # UV grid and heightmap
+    U, V = uv_grid(divU, divV)
+    H = heightmap(
+        U, V,
+        amplitude=amplitude,
+        frequency=frequency,
+        phase=phase,
+        noise_strength=noise_strength
+    )
 
-# Scale UV to actual XY size
-X = U * size_x
-Y = V * size_y
-Z = H + z_offset
-
-# Flatten points 
-flat_points = [rg.Point3d(X[i,j], Y[i,j], Z[i,j]) for i in range(U.shape[0]) for j in range(U.shape[1])]
-
-# Create NURBS surface through points
-surface = rg.NurbsSurface.CreateThroughPoints(
-    flat_points,
-    U.shape[0],  # points in U direction (rows)
-    U.shape[1],  # points in V direction (columns)
-    3, 3,        # degree in U and V
-    False, False  # non-periodic
+    # Scale UV to actual XY size
+    X = U * size_x
+    Y = V * size_y
+    Z = H + z_offset
+
+    # Flatten points 
+    flat_points = [rg.Point3d(X[i,j], Y[i,j], Z[i,j]) for i in range(U.shape[0]) for j in range(U.shape[1])]
+    return U, V, H, X, Y, Z, flat_points
+
+U, V, H, X, Y, Z, flat_points = stage_cache.run(
+    "heightmap",
+    (divU, divV, size_x, size_y, amplitude, frequency, phase, noise_strength, z_offset),
+    heightmap_stage
 )
+def grid_tree_stage():
+    # The k-d tree is the costly part of the index (None without scipy)
+    return CanopyGridIndex(X, Y, Z).tree
+
+grid_index = CanopyGridIndex(X, Y, Z, tree=stage_cache.run("grid_tree", (), grid_tree_stage,
+                                                           after=("heightmap",)))
+
+def surface_stage():
+    # Create NURBS surface through points
+    return rg.NurbsSurface.CreateThroughPoints(
+        flat_points,
+        U.shape[0],  # points in U direction (rows)
+        U.shape[1],  # points in V direction (columns)
+        3, 3,        # degree in U and V
+        False, False  # non-periodic
+    )
+
+surface = stage_cache.run("surface", (), surface_stage, after=("heightmap",))
 
 # Add to Rhino document
 if surface:
@@ -300,7 +871,8 @@ def grow_tree(base_pt,
               out_colors,
               tilt_rad,
               radius,
-              level
+              level,
+              pending=None
               ):
     """
     Generates branches recursively. 
@@ -308,6 +880,9 @@ def grow_tree(base_pt,
     Appends line geometry to output.
     Thickening of branches
     Per-level coloring
+    With a `pending` list, last-level branches are only reserved here and
+    snapped later for the whole tree at once (snap_pending).
+    out_pipes gets branch_pipe() entries (radii with PIPE_INSTANCING).
     """
 
     # STOP if no more levels
@@ -349,6 +924,13 @@ def grow_tree(base_pt,
         #  SNAP LAST-LEVEL BRANCHES TO GRID POINTS
         # -------------------------------------------
         if levels == 1:
+            if pending is not None:
+                pending.append((len(out_lines), base_pt, child_pt, radius, level))
+                out_lines.append(None)
+                out_pipes.append(None)
+                out_colors.append(None)
+                continue
+
             nearest_pt, dist = nearest_grid_point(child_pt, flat_points)
             line = rg.Line(base_pt, nearest_pt)
 
@@ -359,7 +941,7 @@ def grow_tree(base_pt,
             # do NOT recurse further
 
             # Pipe for last segment
-            pipe = mesh_pipe_from_line(line, radius)
+            pipe = branch_pipe(line, radius)
             out_pipes.append(pipe)
             out_colors.append(color_for_level(level))
 
@@ -370,7 +952,7 @@ def grow_tree(base_pt,
         out_lines.append(line)
 
         # Mesh pipe
-        pipe = mesh_pipe_from_line(line, radius)
+        pipe = branch_pipe(line, radius)
         out_pipes.append(pipe)
         out_colors.append(color_for_level(level))
 
@@ -387,9 +969,30 @@ def grow_tree(base_pt,
                   out_colors,
                   tilt_rad,
                   radius * RADIUS_REDUCTION,
-                  level + 1
+                  level + 1,
+                  pending
                   )
 
+def branch_pipe(line, radius):
+    """
+    Pipe of a grown branch. With PIPE_INSTANCING only its radius is kept;
+    fractal_tree_radial meshes the whole tree in one instanced batch.
+    """
+    return radius if PIPE_INSTANCING else mesh_pipe_from_line(line, radius)
+
+def snap_pending(pending, out_lines, out_pipes, out_colors):
+    """Snaps all reserved last-level branches of a tree with one grid query."""
+    if not pending:
+        return
+    tips = np.array([tuple(child_pt) for _, _, child_pt, _, _ in pending])
+    nearest, _ = grid_index.query(tips)
+
+    for (slot, base_pt, _, radius, level), k in zip(pending, nearest.tolist()):
+        line = rg.Line(base_pt, flat_points[k])
+        out_lines[slot] = line
+        out_pipes[slot] = branch_pipe(line, radius)
+        out_colors[slot] = color_for_level(level)
+
 
 
 def fractal_tree_radial(base_pt,
@@ -418,6 +1021,7 @@ def fractal_tree_radial(base_pt,
     lines = []
     pipes = []
     colors = []
+    pending = [] if BATCHED_SNAPPING else None
 
 
     # Trunk
@@ -427,7 +1031,7 @@ def fractal_tree_radial(base_pt,
 
     lines.append(trunk_line)
 
-    trunk_mesh = mesh_pipe_from_line(trunk_line, trunk_radius)
+    trunk_mesh = branch_pipe(trunk_line, trunk_radius)
     pipes.append(trunk_mesh)
     colors.append(color_for_level(0))
 
@@ -461,7 +1065,7 @@ def fractal_tree_radial(base_pt,
         branch_line = rg.Line(trunk_top, branch_end)
 
         lines.append(branch_line)
-        branch_mesh = mesh_pipe_from_line(branch_line, trunk_radius * RADIUS_REDUCTION)
+        branch_mesh = branch_pipe(branch_line, trunk_radius * RADIUS_REDUCTION)
         pipes.append(branch_mesh)
         colors.append(color_for_level(1))
 
@@ -485,13 +1089,112 @@ def fractal_tree_radial(base_pt,
             colors,
             tilt_rad,
             trunk_radius * RADIUS_REDUCTION,
-            2    # recursion level
+            2,   # recursion level
+            pending
         )
-                
+
+    snap_pending(pending, lines, pipes, colors)
+
+    if PIPE_INSTANCING:
+        # All pipes of the tree in one batch; `pipes` holds their radii so far
+        pipes = instanced_pipe_meshes(lines, pipes)
 
     return lines, pipes, colors
 
 
+# Level-synchronous growth
+def rotate_vectors(v, axis, angle):
+    """Rodrigues' rotation of the rows of v about unit axes by angles (radians)."""
+    cos = np.cos(angle)[:, None]
+    sin = np.sin(angle)[:, None]
+    dot = np.einsum("ij,ij->i", axis, v)[:, None]
+    return v * cos + np.cross(axis, v) * sin + axis * dot * (1 - cos)
+
+def unit_rows(v):
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+def grow_forest_arrays(bases,
+                       trunk_length=5.0,
+                       first_level_min_branches=3,
+                       first_level_max_branches=4,
+                       first_level_angle_min=10,
+                       first_level_angle_max=15,
+                       levels=3,
+                       min_branches=2,
+                       max_branches=4,
+                       length_factor=0.7,
+                       randomness=0.2,
+                       trunk_radius=1.0,
+                       seed=None):
+    """
+    fractal_tree_radial for all trees at once. Each level is grown for
+    every tip of every tree together as (N, 3) arrays: branch counts,
+    tilts and jitter come from one NumPy generator, tilts are applied with
+    Rodrigues' formula and the last level is snapped with one grid query.
+    Returns flat arrays starts (B, 3), ends (B, 3), radii, levels and the
+    tree index of every branch, ordered by tree and then by level.
+    """
+    rng = np.random.default_rng(seed)
+    bases = np.asarray(bases, dtype=float).reshape(-1, 3)
+    n_trees = len(bases)
+    vertical = np.array([0.0, 0.0, 1.0])
+
+    # Trunks
+    trunk_top = bases + vertical * trunk_length
+    out = [(bases, trunk_top, np.full(n_trees, trunk_radius), 0, np.arange(n_trees))]
+
+    # First-level radial branches: tilted from vertical by theta, spread evenly around
+    counts = rng.integers(first_level_min_branches, first_level_max_branches + 1, n_trees)
+    theta = np.radians(rng.uniform(first_level_angle_min, first_level_angle_max, n_trees))
+    tree = np.repeat(np.arange(n_trees), counts)
+    phi = 2 * np.pi * (np.arange(len(tree)) - np.repeat(np.cumsum(counts) - counts, counts)) / counts[tree]
+    h = trunk_length * 0.6
+    vec = np.column_stack([h * np.sin(theta[tree]) * np.sin(phi),
+                           -h * np.sin(theta[tree]) * np.cos(phi),
+                           h * np.cos(theta[tree])])
+    pos = trunk_top[tree] + vec
+    radius = trunk_radius * RADIUS_REDUCTION
+    out.append((trunk_top[tree], pos, np.full(len(tree), radius), 1, tree))
+    tilt = np.radians(rng.uniform(first_level_angle_min, first_level_angle_max, len(tree)))
+
+    # Deeper levels, as grow_tree
+    generations = levels - 1
+    for g in range(generations):
+        level = g + 2
+        counts = rng.integers(min_branches, max_branches + 1, len(pos))
+        parent = np.repeat(np.arange(len(pos)), counts)
+
+        # Same tilted direction for all children of a tip, then jitter each
+        L = np.linalg.norm(vec, axis=1) * length_factor
+        child = unit_rows(vec) * L[:, None]
+        axis = np.cross(vertical, child)
+        axis[np.all(axis == 0, axis=1)] = (1.0, 0.0, 0.0)
+        child = rotate_vectors(child, unit_rows(axis), tilt)[parent]
+
+        child += (rng.random((len(parent), 3)) - 0.5) * randomness * np.array([1.0, 1.0, 0.3])
+        child[:, 2] = np.abs(child[:, 2])
+        child = unit_rows(child) * L[parent, None]
+
+        starts = pos[parent]
+        ends = starts + child
+        if g == generations - 1:
+            # Snap the last branches to the canopy grid
+            ends = grid_index.P[grid_index.query(ends)[0]]
+
+        out.append((starts, ends, np.full(len(parent), radius), level, tree[parent]))
+        pos, vec, tilt, tree = ends, child, tilt[parent], tree[parent]
+        radius *= RADIUS_REDUCTION
+
+    starts = np.vstack([o[0] for o in out])
+    ends = np.vstack([o[1] for o in out])
+    radii = np.concatenate([o[2] for o in out])
+    level = np.concatenate([np.full(len(o[0]), o[3]) for o in out])
+    tree = np.concatenate([o[4] for o in out])
+
+    order = np.lexsort((level, tree))
+    return starts[order], ends[order], radii[order], level[order], tree[order]
+
+
 
 # --------------------------------- #
 # 6. Main                           #
@@ -505,39 +1208,76 @@ seed_everything(seed)
 # ----------------------------------
 # 6.2 Surface sampling and compute Gaussian curvature
 # ----------------------------------
-pts, uv_coords = sample_uniform_grid(surface, divU, divV)
-pts_tree = th.list_to_tree(pts)
+def sampling_stage():
+    grid_P = grid_K = deviation = None
+    # A heightmap without 2 x 2 samples has no finite differences: NURBS loop
+    if BATCHED_SURFACE_EVAL and (noise_strength <= 0 or min(Z.shape) > 1):
+        # Whole (divU+1) x (divV+1) grid at once from the heightmap
+        if noise_strength > 0:
+            grid_P, grid_K = surface_grid_finite(X, Y, Z, divU + 1, divV + 1)
+        else:
+            grid_P, grid_K = surface_grid_analytic(divU + 1, divV + 1, size_x, size_y, z_offset,
+                                                   amplitude, frequency, phase)
+        pts = [[rg.Point3d(*p) for p in row] for row in grid_P.tolist()]
+        curvature_grid = grid_K.tolist()
 
-curvature_grid = [[0]*(divV+1) for _ in range(divU+1)]
+        if CROSS_CHECK_SAMPLES and surface:
+            deviation = check_against_surface(surface, grid_P, grid_K, CROSS_CHECK_SAMPLES)
+    else:
+        pts, uv_coords = sample_uniform_grid(surface, divU, divV)
 
-for i in range(divU + 1):
-    for j in range(divV + 1):
-        u, v = uv_coords[i][j]
-        curv = surface.CurvatureAt(u,v)
-        if curv:
-            curvature_grid[i][j] = curv.Gaussian
+        curvature_grid = [[0]*(divV+1) for _ in range(divU+1)]
 
-        else:
-            curvature_grid[i][j] = 0.0
+        for i in range(divU + 1):
+            for j in range(divV + 1):
+                u, v = uv_coords[i][j]
+                curv = surface.CurvatureAt(u,v)
+                if curv:
+                    curvature_grid[i][j] = curv.Gaussian
+
+                else:
+                    curvature_grid[i][j] = 0.0
+
+    return pts, curvature_grid, grid_P, grid_K, deviation
+
+# deviation: largest (point, K) difference from the NURBS samples, reported in 7
+pts, curvature_grid, grid_P, grid_K, surface_deviation = stage_cache.run(
+    "sampling", (BATCHED_SURFACE_EVAL, CROSS_CHECK_SAMPLES), sampling_stage,
+    after=("heightmap", "surface")
+)
+
+pts_tree = th.list_to_tree(pts)
 
 # ----------------------------------
 # 6.3 Compute quad panel values of curvature
 # ----------------------------------
 
-panel_values = []
-
-for i in range(divU):
-    for j in range(divV):
-        c1 = curvature_grid[i][j]
-        c2 = curvature_grid[i+1][j]
-        c3 = curvature_grid[i+1][j+1]
-        c4 = curvature_grid[i][j+1]
-        K = (c1 + c2 + c3 + c4) / 4.0
-        panel_values.append(K)
-
-# List for indexing of panels
-base_quads = [None] * len(panel_values)
-opening_panels = [None] * len(panel_values)
+def panel_values_stage():
+    panel_grid = panel_K = None
+    if ARRAY_PANELS:
+        # All panels at once from the sample grid; Rhino objects only at the end
+        panel_grid = grid_P if grid_P is not None else np.array([[(p.X, p.Y, p.Z) for p in row] for row in pts])
+        panel_K = panel_curvature(np.asarray(curvature_grid, dtype=float))
+        panel_values = panel_K.tolist()
+    else:
+        panel_values = []
+
+        for i in range(divU):
+            for j in range(divV):
+                c1 = curvature_grid[i][j]
+                c2 = curvature_grid[i+1][j]
+                c3 = curvature_grid[i+1][j+1]
+                c4 = curvature_grid[i][j+1]
+                K = (c1 + c2 + c3 + c4) / 4.0
+                panel_values.append(K)
+
+    edges = quad_edges_from_points(pts)
+    mesh = quad_mesh_from_points(pts)
+    return panel_values, panel_grid, panel_K, edges, mesh
+
+panel_values, panel_grid, panel_K, edges, mesh = stage_cache.run(
+    "panel_values", (ARRAY_PANELS,), panel_values_stage, after=("sampling",)
+)
 
 # Normalize curvature opening to         
 allK = np.array(panel_values)
@@ -553,16 +1293,9 @@ def map_curvature_to_opening(K):
         return 0
     return (K - K_min) / (K_max - K_min)
 
-
-
-
-edges = quad_edges_from_points(pts)
-mesh = quad_mesh_from_points(pts)
-
 # ----------------------------------
 # 6.4 Quad corner calculations
 # ----------------------------------
-idx = 0
 
 def lerp(a, b, t):
     """Linear interpolation between two 3d points"""
@@ -572,107 +1305,183 @@ def lerp(a, b, t):
                       a.Z + (b.Z - a.Z) * t
                     )
 
-for i in range(divU):
-    for j in range (divV):
-
-        quad_id = idx           
-        K = panel_values[idx]
-        t = map_curvature_to_opening(K)
-        idx += 1
-
-        # Generate quad corners
-        p1 = pts[i][j]
-        p2 = pts[i+1][j]
-        p3 = pts[i+1][j+1]
-        p4 = pts[i][j+1]
-
-        #Store original quad
-        base_quads[quad_id] = rg.Polyline([p1, p2, p3, p4, p1])
-
-        # Cull panels based on threshold
-        if t < PANEL_OPENING_THRESHOLD:
-            opening_panels[quad_id] = None
-            continue
-
+def quads_stage():
+    # List for indexing of panels
+    base_quads = [None] * len(panel_values)
+    opening_panels = [None] * len(panel_values)
+
+    if ARRAY_PANELS:
+        panel_t = opening_factors(panel_K, K_min, K_max)
+        base_xyz, inset_xyz = panel_quads(panel_grid, panel_t)
+
+        base_quads = polylines_from_grid([p for row in pts for p in row], divU + 1, divV + 1)
+        opening_panels = polylines_from_quads(inset_xyz, panel_t >= PANEL_OPENING_THRESHOLD)
+        return base_quads, opening_panels
+
+    idx = 0
+    for i in range(divU):
+        for j in range (divV):
+
+            quad_id = idx           
+            K = panel_values[idx]
+            t = map_curvature_to_opening(K)
+            idx += 1
+
+            # Generate quad corners
+            p1 = pts[i][j]
+            p2 = pts[i+1][j]
+            p3 = pts[i+1][j+1]
+            p4 = pts[i][j+1]
+
+            #Store original quad
+            base_quads[quad_id] = rg.Polyline([p1, p2, p3, p4, p1])
+
+            # Cull panels based on threshold
+            if t < PANEL_OPENING_THRESHOLD:
+                opening_panels[quad_id] = None
+                continue
+
+            
+            # Center point
+            center = rg.Point3d(
+                                (p1.X + p2.X + p3.X + p4.X)/4,
+                                (p1.Y + p2.Y + p3.Y + p4.Y)/4,
+                                (p1.Z + p2.Z + p3.Z + p4.Z)/4
+            )
         
-        # Center point
-        center = rg.Point3d(
-                            (p1.X + p2.X + p3.X + p4.X)/4,
-                            (p1.Y + p2.Y + p3.Y + p4.Y)/4,
-                            (p1.Z + p2.Z + p3.Z + p4.Z)/4
-        )
-    
-        # Inset (opening) quad
-        q1 = lerp(p1, center, t)
-        q2 = lerp(p2, center, t)
-        q3 = lerp(p3, center, t)
-        q4 = lerp(p4, center, t)
+            # Inset (opening) quad
+            q1 = lerp(p1, center, t)
+            q2 = lerp(p2, center, t)
+            q3 = lerp(p3, center, t)
+            q4 = lerp(p4, center, t)
 
-        opening_panels[quad_id] = rg.Polyline([q1, q2, q3, q4, q1])
+            opening_panels[quad_id] = rg.Polyline([q1, q2, q3, q4, q1])
 
+    return base_quads, opening_panels
 
+base_quads, opening_panels = stage_cache.run(
+    "quads", (ARRAY_PANELS, PANEL_OPENING_THRESHOLD), quads_stage, after=("panel_values",)
+)
 
 # ----------------------------------
 # 6.5 Color each quad based on curvature
 # ----------------------------------
 
-colored_quad_colors = []
+def colors_stage():
+    if ARRAY_PANELS:
+        panel_rgb = K_colors(panel_K, K_min, K_max)
+        return [SD.Color.FromArgb(r, g, b) for r, g, b in panel_rgb.tolist()]
+
+    colored_quad_colors = []
+
+    for i, quad in enumerate(base_quads):
+        if quad is None:
+            colored_quad_colors.append(SD.Color.Black)
+            continue
 
-for i, quad in enumerate(base_quads):
-    if quad is None:
-        colored_quad_colors.append(SD.Color.Black)
-        continue
+        K = panel_values[i]
+        color = map_K_to_color(K, K_min, K_max)
+        colored_quad_colors.append(color)
+    return colored_quad_colors
 
-    K = panel_values[i]
-    color = map_K_to_color(K, K_min, K_max)
-    colored_quad_colors.append(color)
+# The array path colors from panel_values alone; the loop skips culled quads
+colored_quad_colors = stage_cache.run("colors", (ARRAY_PANELS,), colors_stage,
+                                      after=("panel_values",) if ARRAY_PANELS else ("panel_values", "quads"))
 
 # ----------------------------------
 # 6.6 Anchor finding
 # ----------------------------------
-anchors = lowest_points(flat_points, count=14)
+def anchors_stage():
+    if LOCAL_MINIMA_ANCHORS:
+        anchor_idx, _ = local_minima(Z, count=ANCHOR_COUNT)
+        return [flat_points[k] for k in anchor_idx.tolist()]
+    return lowest_points(flat_points, count=ANCHOR_COUNT, z=Z)
+
+anchors = stage_cache.run("anchors", (LOCAL_MINIMA_ANCHORS, ANCHOR_COUNT), anchors_stage,
+                          after=("heightmap",))
 
 # ----------------------------------
 # 6.7 Tree base preperations
 # ----------------------------------
-treeBases_raw = []
-for pt in anchors:
-    base_pt = rg.Point3d(pt.X, pt.Y, pt.Z - TREE_BASE_OFFSET)
-    treeBases_raw.append(base_pt)
+def tree_bases_stage():
+    treeBases_raw = []
+    for pt in anchors:
+        base_pt = rg.Point3d(pt.X, pt.Y, pt.Z - TREE_BASE_OFFSET)
+        treeBases_raw.append(base_pt)
+
 
+    return cull_by_distance_hashed(treeBases_raw, MIN_TREE_SPACING)
 
-treeBases = cull_by_distance(treeBases_raw, MIN_TREE_SPACING)
+treeBases = stage_cache.run("tree_bases", (TREE_BASE_OFFSET, MIN_TREE_SPACING), tree_bases_stage,
+                            after=("anchors",))
 
 # ----------------------------------
 # 6.8 Generation of trees
 # ----------------------------------
-all_trees_lines = []
-all_trees_pipes = []
-all_trees_colors = []
-
-
-for base_pt in treeBases:
-    tree_lines, tree_pipes, tree_colors = fractal_tree_radial(
-        base_pt=base_pt,
-        trunk_length=trunk_length,
-        first_level_min_branches=first_level_min_branches,
-        first_level_max_branches=first_level_max_branches,
-        first_level_angle_min=first_level_angle_min,
-        first_level_angle_max=first_level_angle_max,
-        levels=levels,
-        min_branches=min_branches,
-        max_branches=max_branches,
-        angle_min=angle_min,
-        angle_max=angle_max,
-        length_factor=length_factor,
-        randomness=randomness,
-        trunk_radius=TRUNK_RADIUS
-    )
-
+def trees_stage():
+    all_trees_lines = []
+    all_trees_pipes = []
+    all_trees_colors = []
+    tree_arrays = None
+
+    if VECTORIZED_GROWTH:
+        # Flat branch arrays for all trees; Rhino objects only for the outputs
+        tree_arrays = grow_forest_arrays(
+            [(p.X, p.Y, p.Z) for p in treeBases],
+            trunk_length=trunk_length,
+            first_level_min_branches=first_level_min_branches,
+            first_level_max_branches=first_level_max_branches,
+            first_level_angle_min=first_level_angle_min,
+            first_level_angle_max=first_level_angle_max,
+            levels=levels,
+            min_branches=min_branches,
+            max_branches=max_branches,
+            length_factor=length_factor,
+            randomness=randomness,
+            trunk_radius=TRUNK_RADIUS,
+            seed=seed
+        )
+        branch_starts, branch_ends, branch_radii, branch_levels, branch_trees = tree_arrays
 
-    all_trees_lines.extend(tree_lines)
-    all_trees_pipes.extend(tree_pipes)
-    all_trees_colors.extend(tree_colors)   
+        all_trees_lines = [rg.Line(rg.Point3d(*p0), rg.Point3d(*p1))
+                           for p0, p1 in zip(branch_starts.tolist(), branch_ends.tolist())]
+        all_trees_pipes = instanced_pipe_meshes(all_trees_lines, branch_radii)
+        all_trees_colors = [color_for_level(k) for k in branch_levels.tolist()]
+    else:
+        for base_pt in treeBases:
+            tree_lines, tree_pipes, tree_colors = fractal_tree_radial(
+                base_pt=base_pt,
+                trunk_length=trunk_length,
+                first_level_min_branches=first_level_min_branches,
+                first_level_max_branches=first_level_max_branches,
+                first_level_angle_min=first_level_angle_min,
+                first_level_angle_max=first_level_angle_max,
+                levels=levels,
+                min_branches=min_branches,
+                max_branches=max_branches,
+                angle_min=angle_min,
+                angle_max=angle_max,
+                length_factor=length_factor,
+                randomness=randomness,
+                trunk_radius=TRUNK_RADIUS
+            )
+
+
+            all_trees_lines.extend(tree_lines)
+            all_trees_pipes.extend(tree_pipes)
+            all_trees_colors.extend(tree_colors)
+
+    return all_trees_lines, all_trees_pipes, all_trees_colors, tree_arrays
+
+all_trees_lines, all_trees_pipes, all_trees_colors, tree_arrays = stage_cache.run(
+    "trees",
+    (seed, trunk_length, first_level_min_branches, first_level_max_branches,
+     first_level_angle_min, first_level_angle_max, levels, min_branches, max_branches,
+     angle_min, angle_max, length_factor, randomness, TRUNK_RADIUS, RADIUS_REDUCTION,
+     VECTORIZED_GROWTH, BATCHED_SNAPPING, PIPE_INSTANCING),
+    trees_stage,
+    after=("heightmap", "tree_bases")
+)
 
 # ---------------------------------- #
 # 7. Output channels                 #
@@ -684,5 +1493,24 @@ d = base_quads                          # base quad panels
 e = colored_quad_colors                 # quad colors
 
 fractal_supports = all_trees_lines      
-tree_meshes = all_trees_pipes          
-tree_mesh_color = all_trees_colors     
\ No newline at end of file
+
+def merged_mesh_stage():
+    if tree_arrays is not None:
+        branch_starts, branch_ends, branch_radii, branch_levels, _ = tree_arrays
+        tree_mesh_buffers = merge_pipe_arrays(branch_starts, branch_ends, branch_radii, branch_levels)
+    else:
+        tree_mesh_buffers = merge_branch_meshes(all_trees_pipes, all_trees_colors)
+    return tree_mesh_buffers, mesh_from_buffers(*tree_mesh_buffers)
+
+if MERGED_TREE_MESH:
+    tree_mesh_buffers, tree_meshes = stage_cache.run("merged_mesh", (), merged_mesh_stage,
+                                                     after=("trees",))  # one mesh, vertex colors
+    tree_mesh_color = None
+else:
+    tree_meshes = all_trees_pipes          
+    tree_mesh_color = all_trees_colors
+
+if STAGE_CACHE and STAGE_CACHE_REPORT:
+    print(stage_cache.report())
+if surface_deviation is not None:
+    print("Batched surface: max deviation from NURBS: point %.4g, K %.4g" % surface_deviation)
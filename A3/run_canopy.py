@@ -0,0 +1,193 @@
+"""
+Assignment 3: Headless Canopy Runner
+
+Author: Hroar Holm Bertelsen
+
+Description:
+Runs parametric_canopy.py outside Grasshopper. The Grasshopper inputs
+(divU, amplitude, z_offset, ...) are read from JSON and injected as script
+globals, and the Rhino modules are replaced by headless_rhino when Rhino is
+not available. The script itself is run unchanged, so the Rhino path stays
+as it is. --export writes the tree pipes as one vertex-colored mesh
+(.ply, .obj, .gltf or .glb).
+
+The script keeps its stage results in sc.sticky. Within one process that
+works as in Grasshopper; --cache keeps sc.sticky in a pickle file so the
+next run only recomputes the stages whose inputs changed.
+
+Usage:
+    python run_canopy.py [--params params.json | --params '{"divU": 40}']
+                         [--set levels=3] [--out summary.json] [--profile 25]
+                         [--export trees.glb] [--cache canopy_cache.pkl]
+"""
+# ----------------------------------------------------------------
+# Imports
+# ----------------------------------------------------------------
+import argparse
+import cProfile
+import json
+import os
+import pickle
+import pstats
+import runpy
+import sys
+import time
+
+import headless_rhino
+import mesh_export
+
+# ----------------------------------------------------------------
+# Parameters
+# ----------------------------------------------------------------
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CANOPY_SCRIPT = os.path.join(BASE_DIR, "parametric_canopy.py")
+
+# Slider values from images/01_Settings.png
+DEFAULT_PARAMS = {
+    "divU": 20,
+    "divV": 40,
+    "size_x": 50.0,
+    "size_y": 50.0,
+    "amplitude": 1.8,
+    "frequency": 1.5,
+    "phase": 2.8,
+    "noise_strength": 0.0,
+    "seed": 47,
+    "z_offset": 14.0,
+    "trunk_length": 8.0,
+    "first_level_min_branches": 3,
+    "first_level_max_branches": 5,
+    "first_level_angle_min": 7,
+    "first_level_angle_max": 20,
+    "levels": 2,
+    "min_branches": 3,
+    "max_branches": 3,
+    "angle_min": 1,
+    "angle_max": 6,
+    "length_factor": 1.0,
+    "randomness": 10.0,
+    "trunk_radius": 0.3,
+    "panel_threshold": 0.82,
+    "branch_reduction": 0.5,
+}
+
+OUTPUTS = ("a", "b", "c", "d", "e", "fractal_supports", "tree_meshes", "tree_mesh_color")
+
+
+# ----------------------------------------------------------------
+# Running
+# ----------------------------------------------------------------
+
+def load_params(source=None, overrides=()):
+    """
+    Defaults updated from `source` (a JSON file path or a JSON string) and
+    then from "key=value" overrides (values parsed as JSON when possible).
+    Raises ValueError for a name the script does not read.
+    """
+    params = dict(DEFAULT_PARAMS)
+    if source:
+        if os.path.isfile(source):
+            with open(source) as f:
+                params.update(json.load(f))
+        else:
+            params.update(json.loads(source))
+    for item in overrides:
+        key, _, value = item.partition("=")
+        try:
+            params[key] = json.loads(value)
+        except json.JSONDecodeError:
+            params[key] = value
+
+    unknown = sorted(set(params) - set(DEFAULT_PARAMS))
+    if unknown:
+        raise ValueError("unknown parameters: %s" % ", ".join(unknown))
+    return params
+
+def run(params, script=CANOPY_SCRIPT, cache_path=None):
+    """
+    Runs the canopy script with `params` as globals; returns its namespace.
+    With `cache_path`, sc.sticky is loaded from and saved to that file.
+    """
+    headless_rhino.install()
+    sticky = sys.modules["scriptcontext"].sticky
+    if cache_path and os.path.isfile(cache_path):
+        with open(cache_path, "rb") as f:
+            sticky.update(pickle.load(f))
+
+    ns = runpy.run_path(script, init_globals=dict(params), run_name="__canopy__")
+
+    if cache_path:
+        with open(cache_path, "wb") as f:
+            pickle.dump(dict(sticky), f, protocol=pickle.HIGHEST_PROTOCOL)
+    return ns
+
+def summarize(ns):
+    """Counts of the Grasshopper outputs in a finished namespace."""
+    def count(value):
+        if value is None:
+            return 0
+        return sum(v is not None for v in value) if isinstance(value, list) else 1
+
+    summary = {name: count(ns.get(name)) for name in OUTPUTS}
+    summary["tree_bases"] = len(ns.get("treeBases", []))
+    if "stage_cache" in ns:
+        summary["stages"] = {name: status for name, status, _ in ns["stage_cache"].log}
+    return summary
+
+def export_trees(ns, path):
+    """Writes the merged tree mesh of a finished namespace; returns (vertices, faces)."""
+    buffers = ns.get("tree_mesh_buffers")
+    if buffers is None:
+        buffers = ns["merge_branch_meshes"](ns["all_trees_pipes"], ns["all_trees_colors"])
+    mesh_export.write_mesh(path, *buffers)
+    return len(buffers[0]), len(buffers[1])
+
+
+# ----------------------------------------------------------------
+# Main
+# ----------------------------------------------------------------
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the A3 canopy pipeline headless")
+    parser.add_argument("--params", help="JSON file or JSON string with Grasshopper inputs")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="override one parameter (repeatable)")
+    parser.add_argument("--out", help="write a JSON summary of the outputs")
+    parser.add_argument("--profile", type=int, metavar="N",
+                        help="profile the run and print the N most expensive functions")
+    parser.add_argument("--cache", metavar="PATH",
+                        help="keep stage results in this file between runs")
+    parser.add_argument("--export", metavar="PATH",
+                        help="write the tree pipes as one colored mesh (.ply/.obj/.gltf/.glb)")
+    args = parser.parse_args(argv)
+
+    try:
+        params = load_params(args.params, args.set)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    t0 = time.perf_counter()
+    if args.profile:
+        profiler = cProfile.Profile()
+        ns = profiler.runcall(run, params, cache_path=args.cache)
+    else:
+        ns = run(params, cache_path=args.cache)
+    elapsed = time.perf_counter() - t0
+
+    summary = summarize(ns)
+    summary["seconds"] = elapsed
+    for key, value in summary.items():
+        print("%-18s %s" % (key, value))
+
+    if args.profile:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(args.profile)
+    if args.export:
+        vertices, faces = export_trees(ns, args.export)
+        print("Wrote %s (%d vertices, %d faces)" % (args.export, vertices, faces))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({"params": params, "summary": summary}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()